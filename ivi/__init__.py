@@ -29,6 +29,10 @@ THE SOFTWARE.
 __all__ = [
         # Base IVI class
         "ivi",
+        # Host-side waveform measurements
+        "measurement",
+        # Trace archive files
+        "tracefile",
         # IVI abstract classes
         "scope",
         "dmm",
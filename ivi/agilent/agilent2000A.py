@@ -38,7 +38,7 @@ ScreenshotImageFormatMapping = {
 
 OutputMode = set(['function'])
 OperationMode = set(['continuous', 'burst'])
-StandardWaveformMapping = {
+StandardWaveformMapping = ivi.ValueMapping({
         'sine': 'sin',
         'square': 'squ',
         #'triangle': 'tri',
@@ -48,7 +48,7 @@ StandardWaveformMapping = {
         'pulse': 'puls',
         'noise': 'nois',
         'dc': 'dc'
-        }
+        })
 
 class agilent2000A(agilentBaseInfiniiVision, fgen.Base, fgen.StdFunc, fgen.ModulateAM, fgen.ModulateFM):
     "Agilent InfiniiVision 2000A series IVI oscilloscope driver"
@@ -265,7 +265,7 @@ class agilent2000A(agilentBaseInfiniiVision, fgen.Base, fgen.StdFunc, fgen.Modul
         if not self._driver_operation_simulate and not self._get_cache_valid(index=index):
             resp = self._ask(":%s:function?" % self._output_name[index])
             value = resp.lower()
-            value = [k for k,v in self._output_standard_waveform_mapping.items() if v==value][0]
+            value = self._output_standard_waveform_mapping.reverse(value)
             self._output_standard_waveform_waveform[index] = value
             self._set_cache_valid(index=index)
         return self._output_standard_waveform_waveform[index]
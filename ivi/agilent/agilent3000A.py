@@ -33,7 +33,7 @@ from .. import ivi
 from .. import fgen
 
 OutputMode = set(['function', 'arbitrary'])
-StandardWaveformMapping = {
+StandardWaveformMapping = ivi.ValueMapping({
         'sine': 'sin',
         'square': 'squ',
         #'triangle': 'tri',
@@ -48,7 +48,7 @@ StandardWaveformMapping = {
         'expfall': 'expf',
         'cardiac': 'card',
         'gaussian': 'gaus'
-        }
+        })
 
 class agilent3000A(agilent2000A, fgen.ArbWfm, fgen.ArbFrequency,
                 fgen.ArbChannelWfm):
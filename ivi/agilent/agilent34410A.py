@@ -31,7 +31,7 @@ from .. import ivi
 from .. import dmm
 from .. import scpi
 
-class agilent34410A(scpi.dmm.Base):
+class agilent34410A(scpi.dmm.Base, scpi.dmm.MultiPoint, scpi.dmm.SoftwareTrigger):
     "Agilent 34410A IVI DMM driver"
     
     def __init__(self, *args, **kwargs):
@@ -41,6 +41,9 @@ class agilent34410A(scpi.dmm.Base):
         
         self._memory_size = 5
         
+        self._multi_point_binary_transfer = True
+        self._multi_point_reading_memory_size = 50000
+        
         self._identity_description = "Agilent 34410A/11A IVI DMM driver"
         self._identity_identifier = ""
         self._identity_revision = ""
@@ -34,5 +34,7 @@ class agilent34411A(agilent34410A):
         
         super(agilent34411A, self).__init__(*args, **kwargs)
         
+        self._multi_point_reading_memory_size = 1000000
+        
     
     
@@ -35,6 +35,9 @@ class agilent34461A(agilent34401A, extra.common.Title):
         self.__dict__.setdefault('_instrument_id', '34401A')
         
         super(agilent34461A, self).__init__(*args, **kwargs)
+        
+        self._multi_point_binary_transfer = True
+        self._multi_point_reading_memory_size = 10000
 
         self._add_method('system.display_string',
             self._system_display_string,
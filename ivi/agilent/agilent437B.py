@@ -27,8 +27,6 @@ THE SOFTWARE.
 from .. import ivi
 from .. import pwrmeter
 
-import time
-
 Units = set(['dBm', 'Watts'])
 
 class agilent437B(ivi.Driver, pwrmeter.Base, pwrmeter.ManualRange,
@@ -123,9 +121,6 @@ class agilent437B(ivi.Driver, pwrmeter.Base, pwrmeter.ManualRange,
         #    error_message = error_message.strip(' "')
         return (error_code, error_message)
     
-    def _utility_lock_object(self):
-        pass
-    
     def _utility_reset(self):
         if not self._driver_operation_simulate:
             self._write("*RST")
@@ -145,9 +140,6 @@ class agilent437B(ivi.Driver, pwrmeter.Base, pwrmeter.ManualRange,
         return (code, message)
         raise ivi.OperationNotSupportedException()
     
-    def _utility_unlock_object(self):
-        pass
-    
     
     def _init_channels(self):
         try:
@@ -321,14 +313,9 @@ class agilent437B(ivi.Driver, pwrmeter.Base, pwrmeter.ManualRange,
 
         self._write("CS")
         self._write("ZE")
-        it = 0
-        while True:
-            val = self._read_stb()
-            if val & 2:
-                break
-            if val & 8 or it > 20:
-                return
-            time.sleep(0.5)
+        # status byte bit 1 is set on completion, bit 3 on error
+        if not self._wait_for_stb(2 | 8, 10) or not self._read_stb() & 2:
+            return
         
         self._channel_zero_state[index] = 'complete'
     
@@ -343,14 +330,9 @@ class agilent437B(ivi.Driver, pwrmeter.Base, pwrmeter.ManualRange,
 
         self._write("CS")
         self._write("CLEN")
-        it = 0
-        while True:
-            val = self._read_stb()
-            if val & 2:
-                break
-            if val & 8 or it > 20:
-                return
-            time.sleep(0.5)
+        # status byte bit 1 is set on completion, bit 3 on error
+        if not self._wait_for_stb(2 | 8, 10) or not self._read_stb() & 2:
+            return
 
         self._channel_calibration_state[index] = 'complete'
 
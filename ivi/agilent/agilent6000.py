@@ -23,7 +23,8 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 
 """
-import time
+import struct
+
 from .agilentBaseInfiniiVision import *
 
 CaptureMode = {
@@ -95,24 +96,18 @@ class agilent6000(agilentBaseInfiniiVision):
     def _measurement_single_shot_initiate(self):
         self._write(':stop')
         self._write(':single')
-        while True:
-            if '+1' in self._ask(':AER?'):
-                break
-            time.sleep(0.001)
+        self._wait_for_operation_complete()
 
     def _measurement_fetch_waveform_single(self, index):
         index = ivi.get_index(self._channel_name, index)
 
         if self._driver_operation_simulate:
             return list()
-        while True:
-            if int(self._ask(':OPERegister:CONDition?')) & 8 !=8:
-                break
-            time.sleep(0.001)
-        self._write(":waveform:byteorder msbfirst")
-        self._write(":waveform:unsigned 1")
-        self._write(":waveform:format word")
-        self._write(":waveform:source %s" % self._channel_name[index])
+        self._wait_for(lambda: int(self._ask(':OPERegister:CONDition?')) & 8 != 8, max_interval=0.01)
+        self._write_setting(":waveform:byteorder msbfirst")
+        self._write_setting(":waveform:unsigned 1")
+        self._write_setting(":waveform:format word")
+        self._write_setting(":waveform:source %s" % self._channel_name[index])
 
         # Read preamble
 
@@ -165,10 +160,10 @@ class agilent6000(agilentBaseInfiniiVision):
         if self._driver_operation_simulate:
             return list()
 
-        self._write(":waveform:byteorder msbfirst")
-        self._write(":waveform:unsigned 1")
-        self._write(":waveform:format word")
-        self._write(":waveform:source %s" % self._channel_name[index])
+        self._write_setting(":waveform:byteorder msbfirst")
+        self._write_setting(":waveform:unsigned 1")
+        self._write_setting(":waveform:format word")
+        self._write_setting(":waveform:source %s" % self._channel_name[index])
 
         # Read preamble
 
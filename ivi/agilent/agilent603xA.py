@@ -130,9 +130,6 @@ class agilent603xA(ivi.Driver, dcpwr.Base, dcpwr.Measurement):
             error_message = error_message.strip(' "')
         return (error_code, error_message)
     
-    def _utility_lock_object(self):
-        pass
-    
     def _utility_reset(self):
         if not self._driver_operation_simulate:
             self._write("CLR")
@@ -150,9 +147,6 @@ class agilent603xA(ivi.Driver, dcpwr.Base, dcpwr.Measurement):
                 message = "Self test failed"
         return (code, message)
     
-    def _utility_unlock_object(self):
-        pass
-    
     
     
     def _init_outputs(self):
@@ -281,24 +275,24 @@ class agilent603xA(ivi.Driver, dcpwr.Base, dcpwr.Measurement):
             t = 0
         elif range_type == 'current':
             t = 1
-        k = dcpwr.get_range(self._output_spec[index]['range'], t, range_val)
-        if k < 0:
+        k = self._get_output_range(index, 'range', t, range_val)
+        if k is None:
             raise ivi.OutOfRangeException()
-        self._output_voltage_max[index] = self._output_range[index][k][0]
-        self._output_current_max[index] = self._output_range[index][k][1]
+        self._output_spec[index]['voltage_max'] = self._output_spec[index]['range'][k][0]
+        self._output_spec[index]['current_max'] = self._output_spec[index]['range'][k][1]
         # do nothing - autoranging supply; no command to set range
     
     def _output_query_current_limit_max(self, index, voltage_level):
         index = ivi.get_index(self._output_name, index)
         if voltage_level < 0 or voltage_level >  self._output_spec[index]['voltage_max']:
             raise ivi.OutOfRangeException()
-        return self._output_current_max[index]
+        return self._output_spec[index]['current_max']
     
     def _output_query_voltage_level_max(self, index, current_limit):
         index = ivi.get_index(self._output_name, index)
         if current_limit < 0 or current_limit >  self._output_spec[index]['current_max']:
             raise ivi.OutOfRangeException()
-        return self._output_voltage_max[index]
+        return self._output_spec[index]['voltage_max']
     
     def _output_query_output_state(self, index, state):
         index = ivi.get_index(self._output_name, index)
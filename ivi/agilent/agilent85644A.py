@@ -24,17 +24,15 @@ THE SOFTWARE.
 
 """
 
-import time
-
 from .. import ivi
 from .. import scpi
 
 Source = set(['internal', 'external'])
-ALCSourceMapping = {'internal': 'int',
-                    'external': 'diode'}
+ALCSourceMapping = ivi.ValueMapping({'internal': 'int',
+                    'external': 'diode'})
 PowerMode = set(['fixed', 'sweep'])
-FrequencyModeMapping = {'cw': 'cw',
-                        'sweep': 'sweep'}
+FrequencyModeMapping = ivi.ValueMapping({'cw': 'cw',
+                        'sweep': 'sweep'})
 TrackingHost = set(['hp8560', 'hp8561', 'hp8562', 'hp8562old', 'hp8563', 'hp8563e', 'hp8566',
                     'hp8593', 'hp8594', 'hp8595', 'hp8596', 'hp8340_5', 'hp8340_1', 'hp8341_5',
                     'hp8341_1', 'hp70909', 'hp70910', 'hp83590_5', 'hp83590_1', 'hp83592_5',
@@ -206,9 +204,6 @@ class agilent85644A(ivi.Driver, scpi.common.Memory):
             error_message = error_message.strip(' "')
         return (error_code, error_message)
 
-    def _utility_lock_object(self):
-        pass
-
     def _utility_reset(self):
         if not self._driver_operation_simulate:
             self._write("*RST")
@@ -223,15 +218,11 @@ class agilent85644A(ivi.Driver, scpi.common.Memory):
         if not self._driver_operation_simulate:
             self._write("*TST?")
             # wait for test to complete
-            time.sleep(30)
-            code = int(self._read())
+            code = int(self._read_with_timeout(30))
             if code != 0:
                 message = "Self test failed"
         return (code, message)
 
-    def _utility_unlock_object(self):
-        pass
-
 
     def _get_rf_frequency(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
@@ -262,7 +253,7 @@ class agilent85644A(ivi.Driver, scpi.common.Memory):
     def _get_rf_frequency_mode(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask("source:frequency:mode?").lower()
-            self._rf_frequency_mode = [k for k,v in FrequencyModeMapping.items() if v==value][0]
+            self._rf_frequency_mode = FrequencyModeMapping.reverse(value)
             self._set_cache_valid()
         return self._rf_frequency_mode
 
@@ -452,7 +443,7 @@ class agilent85644A(ivi.Driver, scpi.common.Memory):
     def _get_alc_source(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask("source:power:alc:source?").lower()
-            self._alc_source = [k for k,v in ALCSourceMapping.items() if v==value][0]
+            self._alc_source = ALCSourceMapping.reverse(value)
             self._set_cache_valid()
         return self._alc_source
 
@@ -27,10 +27,9 @@ THE SOFTWARE.
 from .. import ivi
 from .. import extra
 from .. import scpi
-import time
 
-AmplitudeUnitsMapping = {'dBm' : 'dbm',
-                         'watt' : 'w'}
+AmplitudeUnitsMapping = ivi.ValueMapping({'dBm' : 'dbm',
+                         'watt' : 'w'})
 DetectorType = set(['auto_peak', 'average', 'maximum_peak', 'minimum_peak', 'sample', 'rms'])
 TraceType = set(['clear_write', 'maximum_hold', 'minimum_hold', 'video_average', 'view', 'store'])
 VerticalScale = set(['linear', 'logarithmic'])
@@ -425,9 +424,6 @@ class agilent86140B(ivi.Driver, extra.common.Screenshot, scpi.common.Memory):
             error_message = error_message.strip(' "')
         return (error_code, error_message)
     
-    def _utility_lock_object(self):
-        pass
-    
     def _utility_reset(self):
         if not self._driver_operation_simulate:
             self._write("*RST")
@@ -446,9 +442,6 @@ class agilent86140B(ivi.Driver, extra.common.Screenshot, scpi.common.Memory):
                 message = "Self test failed"
         return (code, message)
     
-    def _utility_unlock_object(self):
-        pass
-    
     
     def _init_traces(self):
         try:
@@ -464,7 +457,7 @@ class agilent86140B(ivi.Driver, extra.common.Screenshot, scpi.common.Memory):
         
         self.traces._set_list(self._trace_name)
     
-    def _display_fetch_screenshot(self, format='gif'):
+    def _display_fetch_screenshot(self, format='gif', invert=False):
         if self._driver_operation_simulate:
             return b''
         
@@ -476,14 +469,16 @@ class agilent86140B(ivi.Driver, extra.common.Screenshot, scpi.common.Memory):
         self._write("hcopy:device:language \"%s\"" % format)
         self._write("hcopy:data?")
         
-        time.sleep(25)
-        
-        return self._read_ieee_block()
+        return self._with_io_timeout(25, self._read_ieee_block)
+    
+    def _display_fetch_screenshot_array(self, invert=False):
+        # none of the hard copy formats can be decoded
+        raise ivi.ValueNotSupportedException()
     
     def _get_level_amplitude_units(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask("unit:pow?").lower()
-            self._level_amplitude_units = [k for k,v in AmplitudeUnitsMapping.items() if v==value][0]
+            self._level_amplitude_units = AmplitudeUnitsMapping.reverse(value)
             self._set_cache_valid()
         return self._level_amplitude_units
     
@@ -236,9 +236,6 @@ class agilent8642A(ivi.Driver, rfsiggen.Base, rfsiggen.ModulateAM,
                 error_message = Messages[error_code]
         return (error_code, error_message)
     
-    def _utility_lock_object(self):
-        pass
-    
     def _utility_reset(self):
         if not self._driver_operation_simulate:
             self._write("IP")
@@ -252,9 +249,6 @@ class agilent8642A(ivi.Driver, rfsiggen.Base, rfsiggen.ModulateAM,
         message = "Self test passed"
         return (code, message)
     
-    def _utility_unlock_object(self):
-        pass
-    
     
     
     def _get_rf_frequency(self):
@@ -308,12 +302,6 @@ class agilent8642A(ivi.Driver, rfsiggen.Base, rfsiggen.ModulateAM,
             return self._read_stb() & (1 << 4) != 0
         return True
     
-    def _rf_wait_until_settled(self, maximum_time):
-        t = 0
-        while not self._rf_is_settled() and t < maximum_time:
-            time.sleep(0.01)
-            t = t + 0.01
-    
     def _get_analog_modulation_am_enabled(self):
         return self._analog_modulation_am_enabled
     
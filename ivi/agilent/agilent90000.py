@@ -309,12 +309,12 @@ class agilent90000(agilentBaseInfiniium):
             return list()
         
         if sys.byteorder == 'little':
-            self._write(":waveform:byteorder lsbfirst")
+            self._write_setting(":waveform:byteorder lsbfirst")
         else:
-            self._write(":waveform:byteorder msbfirst")
-        self._write(":waveform:format word")
-        self._write(":waveform:streaming on")
-        self._write(":waveform:source %s" % self._channel_name[index])
+            self._write_setting(":waveform:byteorder msbfirst")
+        self._write_setting(":waveform:format word")
+        self._write_setting(":waveform:streaming on")
+        self._write_setting(":waveform:source %s" % self._channel_name[index])
         
         # Read preamble
         
@@ -124,9 +124,6 @@ class agilentBase8340(rfsiggen.Base, rfsiggen.ModulateAM, rfsiggen.ModulateFM,
         #        error_message = Messages[error_code]
         return (error_code, error_message)
 
-    def _utility_lock_object(self):
-        pass
-
     def _utility_reset(self):
         if not self._driver_operation_simulate:
             self._write("IP")
@@ -140,9 +137,6 @@ class agilentBase8340(rfsiggen.Base, rfsiggen.ModulateAM, rfsiggen.ModulateFM,
         message = "Self test passed"
         return (code, message)
 
-    def _utility_unlock_object(self):
-        pass
-
 
     def _memory_save(self, index):
         index = int(index)
@@ -225,12 +219,6 @@ class agilentBase8340(rfsiggen.Base, rfsiggen.ModulateAM, rfsiggen.ModulateFM,
             return self._read_stb() & (1 << 4) != 0
         return True
 
-    def _rf_wait_until_settled(self, maximum_time):
-        t = 0
-        while not self._rf_is_settled() and t < maximum_time:
-            time.sleep(0.01)
-            t = t + 0.01
-
     def _get_analog_modulation_am_enabled(self):
         #if not self._driver_operation_simulate and not self._get_cache_valid():
         #    self._analog_modulation_am_enabled = bool(int(self._ask("OPAM")))
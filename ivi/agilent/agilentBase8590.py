@@ -28,7 +28,6 @@ import array
 import io
 import struct
 import sys
-import time
 
 import numpy as np
 
@@ -38,19 +37,19 @@ from .. import ivi
 from .. import specan
 from .. import extra
 
-AmplitudeUnitsMapping = {'dBm' : 'dbm',
+AmplitudeUnitsMapping = ivi.ValueMapping({'dBm' : 'dbm',
                          'dBmV' : 'dbmv',
                          'dBuV' : 'dbuv',
                          'volt' : 'v',
-                         'watt' : 'w'}
-DetectorTypeMapping = {'maximum_peak' : 'pos',
+                         'watt' : 'w'})
+DetectorTypeMapping = ivi.ValueMapping({'maximum_peak' : 'pos',
                        'minimum_peak' : 'neg',
-                       'sample' : 'smp'}
+                       'sample' : 'smp'})
 #TraceType = set(['clear_write', 'maximum_hold', 'minimum_hold', 'video_average', 'view', 'store'])
 VerticalScale = set(['linear', 'logarithmic'])
 #AcquisitionStatus = set(['complete', 'in_progress', 'unknown'])
-ALCSourceMapping = {'internal': 'int',
-                    'external': 'ext'}
+ALCSourceMapping = ivi.ValueMapping({'internal': 'int',
+                    'external': 'ext'})
 PowerMode = set(['fixed', 'sweep'])
 
 class agilentBase8590(ivi.Driver, specan.Base,
@@ -225,9 +224,6 @@ class agilentBase8590(ivi.Driver, specan.Base,
             error_message = error_message.strip(' "')
         return (error_code, error_message)
     
-    def _utility_lock_object(self):
-        pass
-    
     def _utility_reset(self):
         if not self._driver_operation_simulate:
             self._write("IP")
@@ -242,16 +238,11 @@ class agilentBase8590(ivi.Driver, specan.Base,
         if not self._driver_operation_simulate:
             self._write("CNF?")
             # wait for test to complete
-            time.sleep(40)
-            # TODO any way to check status?
-            code = int(self._read())
+            code = int(self._read_with_timeout(40))
             if code != 0:
                 message = "Self test failed"
         return (code, message)
     
-    def _utility_unlock_object(self):
-        pass
-
 
 
     def _init_traces(self):
@@ -317,10 +308,20 @@ class agilentBase8590(ivi.Driver, specan.Base,
         
         #format = ScreenshotImageFormatMapping[format]
         
+        img = self._display_fetch_screenshot_array(invert)
+
+        bmp = hprtl.generate_bmp(img)
+
+        return bmp
+    
+    def _display_fetch_screenshot_array(self, invert=False):
+        if self._driver_operation_simulate:
+            return np.zeros((0, 0, 3), dtype=np.uint8)
+        
         self._write("PRNPRT 0")
         self._write("PRINT 1")
         
-        rtl = io.BytesIO(self._read_raw())
+        rtl = self._read_raw()
 
         img = hprtl.parse_hprtl(rtl)
 
@@ -330,9 +331,7 @@ class agilentBase8590(ivi.Driver, specan.Base,
         np.multiply(img[:,:,1], 255/88, out=img[:,:,1], casting='unsafe')
         np.multiply(img[:,:,2], 255/85, out=img[:,:,2], casting='unsafe')
 
-        bmp = hprtl.generate_bmp(img)
-
-        return bmp
+        return img
     
     def _memory_save(self, index):
         index = int(index)
@@ -463,7 +462,7 @@ class agilentBase8590(ivi.Driver, specan.Base,
     def _get_alc_source(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask("srcalc?").lower()
-            self._alc_source = [k for k,v in ALCSourceMapping.items() if v==value][0]
+            self._alc_source = ALCSourceMapping.reverse(value)
             self._set_cache_valid()
         return self._alc_source
 
@@ -478,7 +477,7 @@ class agilentBase8590(ivi.Driver, specan.Base,
     def _get_level_amplitude_units(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask("aunits?").lower()
-            self._level_amplitude_units = [k for k,v in AmplitudeUnitsMapping.items() if v==value][0]
+            self._level_amplitude_units = AmplitudeUnitsMapping.reverse(value)
             self._set_cache_valid()
         return self._level_amplitude_units
     
@@ -517,7 +516,7 @@ class agilentBase8590(ivi.Driver, specan.Base,
     def _get_acquisition_detector_type(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask("det?").lower()
-            self._acquisition_detector_type = [k for k,v in DetectorTypeMapping.items() if v==value][0]
+            self._acquisition_detector_type = DetectorTypeMapping.reverse(value)
             self._set_cache_valid()
         return self._acquisition_detector_type
     
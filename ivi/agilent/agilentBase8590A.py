@@ -48,19 +48,27 @@ class agilentBase8590A(agilentBase8590):
 
         #format = ScreenshotImageFormatMapping[format]
 
+        img = self._display_fetch_screenshot_array(invert)
+
+        bmp = hprtl.generate_bmp(img)
+
+        return bmp
+
+    def _display_fetch_screenshot_array(self, invert=False):
+        if self._driver_operation_simulate:
+            return np.zeros((0, 0, 3), dtype=np.uint8)
+
         self._write("PRINT 1")
 
-        rtl = io.BytesIO(self._read_raw())
+        rtl = self._read_raw()
 
         img = hprtl.parse_hprtl(rtl)
 
         # rescale to get white background
         # presuming background of (90, 88, 85)
-        img[:,:,0] *= 255/90
-        img[:,:,1] *= 255/88
-        img[:,:,2] *= 255/85
+        np.multiply(img[:,:,0], 255/90, out=img[:,:,0], casting='unsafe')
+        np.multiply(img[:,:,1], 255/88, out=img[:,:,1], casting='unsafe')
+        np.multiply(img[:,:,2], 255/85, out=img[:,:,2], casting='unsafe')
 
-        bmp = hprtl.generate_bmp(img)
-
-        return bmp
+        return img
 
@@ -29,7 +29,7 @@ from .. import rfsiggen
 from .. import extra
 from .. import scpi
 
-LFGeneratorWaveformMapping = {
+LFGeneratorWaveformMapping = ivi.ValueMapping({
     'sine': 'sine',
     'dual_sine': 'dual',
     'swept_sine': 'swep',
@@ -40,7 +40,7 @@ LFGeneratorWaveformMapping = {
     'pulse': 'puls',
     'noise': 'nois',
     'dc': 'dc'
-    }
+    })
 
 class agilentBaseESG(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.common.Reset,
                      scpi.common.SelfTest,
@@ -130,12 +130,6 @@ class agilentBaseESG(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.common
     def _utility_disable(self):
         pass
 
-    def _utility_lock_object(self):
-        pass
-
-    def _utility_unlock_object(self):
-        pass
-
 
     def _load_catalog(self):
         self._catalog = list()
@@ -315,12 +309,6 @@ class agilentBaseESG(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.common
             return int(self._ask("status:questionable:power:condition?")) & (1 << 1) == 0
         return True
 
-    def _rf_wait_until_settled(self, maximum_time):
-        t = 0
-        while not self._rf_is_settled() and t < maximum_time:
-            time.sleep(0.01)
-            t = t + 0.01
-
     def _get_analog_modulation_am_enabled(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             self._analog_modulation_am_enabled = bool(int(self._ask("am:state?")))
@@ -526,7 +514,7 @@ class agilentBaseESG(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.common
     def _get_lf_generator_waveform(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask("lfoutput:function:shape?").lower()
-            self._lf_generator_waveform = [k for k,v in LFGeneratorWaveformMapping.items() if v==value][0]
+            self._lf_generator_waveform = LFGeneratorWaveformMapping.reverse(value)
             self._set_cache_valid()
         return self._lf_generator_waveform
 
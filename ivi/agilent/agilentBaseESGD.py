@@ -51,21 +51,46 @@ class agilentBaseESGD(agilentBaseESG, rfsiggen.ModulateIQ, rfsiggen.IQImpairment
         self._digital_modulation_arb_waveform_quantum = 2
         self._digital_modulation_arb_waveform_size_min = 16
         self._digital_modulation_arb_waveform_size_max = 10240
+        self._digital_modulation_arb_chunk_size = 65536
+        self._digital_modulation_arb_pending = dict()
+
+        self._arb_catalog = ivi.Catalog()
 
         self._identity_description = "Agilent ESG-D series IVI RF signal generator driver"
         self._identity_supported_instrument_models = list(['E4430B', 'E4431B', 'E4432B', 'E4433B',
                 'E4434B', 'E4435B', 'E4436B', 'E4437B'])
 
+        self._add_property('digital_modulation.arb.catalog_ttl',
+                        self._get_digital_modulation_arb_catalog_ttl,
+                        self._set_digital_modulation_arb_catalog_ttl,
+                        None,
+                        ivi.Doc("""
+                        Maximum age in seconds of the locally kept listing of the waveforms in
+                        the ARB memory before it is read back from the instrument, or None to
+                        keep it until the attribute cache is invalidated.
+                        """))
+
     def _load_arb_catalog(self):
-        self._arb_catalog = list()
-        self._arb_catalog_names = list()
+        # catalog is kept up to date locally, only read it back when invalid
+        if self._get_cache_valid() and not self._arb_catalog.expired():
+            return
+        entries = list()
         if not self._driver_operation_simulate:
             raw = self._ask("mmemory:catalog? \"arbi:\"").lower()
 
             l = raw.split(',')
             l = [s.strip('"') for s in l]
-            self._arb_catalog = [l[i:i+3] for i in range(2, len(l), 3)]
-            self._arb_catalog_names = [l[0] for l in self._arb_catalog]
+            entries = [l[i:i+3] for i in range(2, len(l), 3)]
+        self._arb_catalog.update(entries)
+        self._set_cache_valid()
+
+    def _get_digital_modulation_arb_catalog_ttl(self):
+        return self._arb_catalog.ttl
+
+    def _set_digital_modulation_arb_catalog_ttl(self, value):
+        if value is not None:
+            value = float(value)
+        self._arb_catalog.ttl = value
 
     def _get_iq_enabled(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
@@ -189,6 +214,14 @@ class agilentBaseESGD(agilentBaseESG, rfsiggen.ModulateIQ, rfsiggen.IQImpairment
 
     def _set_digital_modulation_arb_selected_waveform(self, value):
         value = str(value).lower()
+        # waveform must exist on arb; it may have been uploaded by something
+        # other than this driver, so read the catalog back once before failing
+        self._load_arb_catalog()
+        if value not in self._arb_catalog:
+            self._set_cache_valid(False, 'load_arb_catalog')
+            self._load_arb_catalog()
+        if value not in self._arb_catalog:
+            raise ivi.ValueNotSupportedException()
         if not self._driver_operation_simulate:
             self._write("radio:arb:waveform \"ARBI:%s\"" % value)
         self._digital_modulation_arb_selected_waveform = value
@@ -247,65 +280,75 @@ class agilentBaseESGD(agilentBaseESG, rfsiggen.ModulateIQ, rfsiggen.IQImpairment
             raise ivi.ValueNotSupportedException()
         self._digital_modulation_arb_external_trigger_slope = value
 
-    def _digital_modulation_arb_write_waveform(self, name, idata, qdata, more_data_pending=False):
-        yi = None
-        yq = None
-
-        if type(idata) == list and type(idata[0]) == float:
+    def _get_arb_waveform_samples(self, data):
+        if type(data) == list and (len(data) == 0 or type(data[0]) == float):
             # list
-            yi = np.array(idata)
-        elif type(idata) == np.ndarray and len(idata.shape) == 1:
+            return np.array(data)
+        elif isinstance(data, np.ndarray) and len(data.shape) == 1:
             # 1D array
-            yi = idata
-        elif type(idata) == np.ndarray and len(idata.shape) == 2 and idata.shape[0] == 1:
+            return data
+        elif isinstance(data, np.ndarray) and len(data.shape) == 2 and data.shape[0] == 1:
             # 2D array, hieght 1
-            yi = idata[0]
-        elif type(idata) == np.ndarray and len(idata.shape) == 2 and idata.shape[1] == 1:
+            return data[0]
+        elif isinstance(data, np.ndarray) and len(data.shape) == 2 and data.shape[1] == 1:
             # 2D array, width 1
-            yi = idata[:,0]
-        else:
-            xi, yi = ivi.get_sig(idata)
+            return data[:,0]
+        elif isinstance(data, (tuple, np.ndarray)) or (type(data) == list and type(data[0]) == tuple):
+            # x, y signal
+            x, y = ivi.get_sig(data)
+            return y
+        # iterable of samples or sample arrays
+        return data
 
-        if type(qdata) == list and type(qdata[0]) == float:
-            # list
-            yq = np.array(qdata)
-        elif type(qdata) == np.ndarray and len(qdata.shape) == 1:
-            # 1D array
-            yq = qdata
-        elif type(qdata) == np.ndarray and len(qdata.shape) == 2 and qdata.shape[0] == 1:
-            # 2D array, hieght 1
-            yq = qdata[0]
-        elif type(qdata) == np.ndarray and len(qdata.shape) == 2 and qdata.shape[1] == 1:
-            # 2D array, width 1
-            yq = qdata[:,0]
-        else:
-            xq, yq = ivi.get_sig(qdata)
+    def _encode_arb_waveform(self, data, buf):
+        for y in ivi.iter_sample_chunks(self._get_arb_waveform_samples(data), self._digital_modulation_arb_chunk_size):
+            # clip on [-1,1] and rescale to [0,1]
+            y = (y.clip(-1, 1)+1)/2
 
-        if more_data_pending:
-            # TODO: implement this flag
-            raise ivi.ValueNotSupportedException()
+            # scale to 14 bits
+            y = np.rint(y * ((1 << 14)-1)).astype(int) & 0x00003fff
 
-        if len(yi) != len(yq):
-            raise ivi.ValueNotSupportedException()
-        if len(yi) % self._digital_modulation_arb_waveform_quantum != 0:
-            raise ivi.ValueNotSupportedException()
+            buf.write(y.astype('>i2').tobytes())
+
+    def _digital_modulation_arb_write_waveform(self, name, idata, qdata, more_data_pending=False):
+        # encoded data is accumulated in bounded memory until the last part
+        if name not in self._digital_modulation_arb_pending:
+            self._digital_modulation_arb_pending[name] = (ivi.BlockBuffer(), ivi.BlockBuffer())
+        ibuf, qbuf = self._digital_modulation_arb_pending[name]
+
+        try:
+            self._encode_arb_waveform(idata, ibuf)
+            self._encode_arb_waveform(qdata, qbuf)
+
+            if more_data_pending:
+                return
 
-        # clip on [-1,1] and rescale to [0,1]
-        yic = (yi.clip(-1, 1)+1)/2
-        yqc = (yq.clip(-1, 1)+1)/2
+            del self._digital_modulation_arb_pending[name]
 
-        # scale to 14 bits
-        yib = np.rint(yic * ((1 << 14)-1)).astype(int) & 0x00003fff
-        yqb = np.rint(yqc * ((1 << 14)-1)).astype(int) & 0x00003fff
+            if len(ibuf) != len(qbuf):
+                raise ivi.ValueNotSupportedException()
+            if (len(ibuf) // 2) % self._digital_modulation_arb_waveform_quantum != 0:
+                raise ivi.ValueNotSupportedException()
 
-        raw_i_data = yib.astype('>i2').tobytes()
-        raw_q_data = yqb.astype('>i2').tobytes()
+            self._write_ieee_block_chunks(ibuf.chunks(), len(ibuf), 'mmemory:data "ARBI:%s", ' % name)
+            self._write_ieee_block_chunks(qbuf.chunks(), len(qbuf), 'mmemory:data "ARBQ:%s", ' % name)
 
-        self._write_ieee_block(raw_i_data, 'mmemory:data "ARBI:%s", ' % name)
-        self._write_ieee_block(raw_q_data, 'mmemory:data "ARBQ:%s", ' % name)
+            self._load_arb_catalog()
+            self._arb_catalog.add(str(name).lower())
+        except:
+            self._digital_modulation_arb_pending.pop(name, None)
+            ibuf.close()
+            qbuf.close()
+            raise
+
+        ibuf.close()
+        qbuf.close()
 
     def _digital_modulation_arb_clear_all_waveforms(self):
-        pass
+        for ibuf, qbuf in self._digital_modulation_arb_pending.values():
+            ibuf.close()
+            qbuf.close()
+        self._digital_modulation_arb_pending.clear()
 
     def _get_digital_modulation_base_standard_names(self):
         return self._digital_modulation_base_standard_names
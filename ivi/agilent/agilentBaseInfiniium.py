@@ -78,6 +78,7 @@ class agilentBaseInfiniium(agilentBaseScope):
 
         self._horizontal_divisions = 10
         self._vertical_divisions = 8
+        self._waveform_sample_format = 'h'
 
         self._display_screenshot_image_format_mapping = ScreenshotImageFormatMapping
         self._display_color_grade = False
@@ -225,11 +226,11 @@ class agilentBaseInfiniium(agilentBaseScope):
             return list()
 
         if sys.byteorder == 'little':
-            self._write(":waveform:byteorder lsbfirst")
+            self._write_setting(":waveform:byteorder lsbfirst")
         else:
-            self._write(":waveform:byteorder msbfirst")
-        self._write(":waveform:format word")
-        self._write(":waveform:source %s" % self._channel_name[index])
+            self._write_setting(":waveform:byteorder msbfirst")
+        self._write_setting(":waveform:format word")
+        self._write_setting(":waveform:source %s" % self._channel_name[index])
 
         # Read preamble
 
@@ -262,6 +263,71 @@ class agilentBaseInfiniium(agilentBaseScope):
 
         return data
 
+    def _setup_waveform_transfer(self, index):
+        if sys.byteorder == 'little':
+            self._write_setting(":waveform:byteorder lsbfirst")
+        else:
+            self._write_setting(":waveform:byteorder msbfirst")
+        self._write_setting(":waveform:format word")
+        self._write_setting(":waveform:source %s" % self._channel_name[index])
+
+    def _read_waveform_preamble(self, trace, peak_detect = False):
+        pre = self._ask(":waveform:preamble?").split(',')
+
+        acq_format = int(pre[0])
+        acq_type = int(pre[1])
+        points = int(pre[2])
+        trace.average_count = int(pre[3])
+        trace.x_increment = float(pre[4])
+        trace.x_origin = float(pre[5])
+        trace.x_reference = int(float(pre[6]))
+        trace.y_increment = float(pre[7])
+        trace.y_origin = float(pre[8])
+        trace.y_reference = int(float(pre[9]))
+        trace.y_hole = 31232
+
+        if peak_detect and acq_type != 1:
+            raise scope.InvalidAcquisitionTypeException()
+
+        if acq_format != 2:
+            raise ivi.UnexpectedResponseException()
+
+        return points
+
+    def _measurement_fetch_waveform_segmented(self, index):
+        index = ivi.get_index(self._channel_name, index)
+
+        if self._driver_operation_simulate:
+            return ivi.TraceYTSegmented()
+
+        count = self._get_acquisition_segmented_acquired_count()
+
+        self._setup_waveform_transfer(index)
+
+        trace = ivi.TraceYTSegmented()
+
+        # Read preamble; points is the length of each segment
+        points = self._read_waveform_preamble(trace)
+
+        # Read all segments in one transfer
+        self._write(":waveform:segmented:all 1")
+        try:
+            raw_data = self._ask_for_ieee_block(":waveform:data?")
+        finally:
+            self._write(":waveform:segmented:all 0")
+
+        # Read time tags of all segments in one query
+        time_tag = [float(x) for x in self._ask(":waveform:segmented:xlist? ttag").split(',')]
+
+        if len(raw_data) != 2*count*points:
+            raise ivi.UnexpectedResponseException()
+
+        # Store in trace object
+        trace.y_raw = np.frombuffer(raw_data, 'h', count*points).reshape(count, points)
+        trace.time_tag = np.array(time_tag[0:count])
+
+        return trace
+
     def _measurement_read_waveform(self, index, maximum_time):
         return self._measurement_fetch_waveform(index)
 
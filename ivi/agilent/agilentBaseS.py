@@ -429,7 +429,7 @@ class agilentBaseS(agilentBaseInfiniium):
                 if src == 'line':
                     value = 'ac_line'
             else:
-                value = [k for k,v in TriggerTypeMapping.items() if v==value][0]
+                value = TriggerTypeMapping.reverse(value)
             self._trigger_type = value
             self._set_cache_valid()
         return self._trigger_type
@@ -474,12 +474,12 @@ class agilentBaseS(agilentBaseInfiniium):
             return list()
 
         if sys.byteorder == 'little':
-            self._write(":waveform:byteorder lsbfirst")
+            self._write_setting(":waveform:byteorder lsbfirst")
         else:
-            self._write(":waveform:byteorder msbfirst")
-        self._write(":waveform:format word")
-        self._write(":waveform:streaming on")
-        self._write(":waveform:source %s" % self._channel_name[index])
+            self._write_setting(":waveform:byteorder msbfirst")
+        self._write_setting(":waveform:format word")
+        self._write_setting(":waveform:streaming on")
+        self._write_setting(":waveform:source %s" % self._channel_name[index])
 
         trace = ivi.TraceYT()
 
@@ -550,7 +550,7 @@ class agilentBaseS(agilentBaseInfiniium):
                              self._reference_level_middle,
                              self._reference_level_low))
 
-    def _measurement_fetch_waveform_measurement(self, index, measurement_function, ref_channel = None):
+    def _measurement_command(self, index, measurement_function, ref_channel = None, query = True):
         "just a copy from agilentBaseScope so that the local MeasurementFunctionMapping is used"
         index = ivi.get_index(self._channel_name, index)
         if index < self._analog_channel_count:
@@ -561,20 +561,19 @@ class agilentBaseS(agilentBaseInfiniium):
             if measurement_function not in MeasurementFunctionMappingDigital:
                 raise ivi.ValueNotSupportedException()
             func = MeasurementFunctionMappingDigital[measurement_function]
-        if not self._driver_operation_simulate:
-            l = func.split(' ')
+        l = func.split(' ')
+        if query:
             l[0] = l[0] + '?'
-            if len(l) > 1:
-                l[-1] = l[-1] + ','
-            func = ' '.join(l)
-            query = ":measure:%s %s" % (func, self._channel_name[index])
-            if measurement_function in ['ratio', 'phase', 'delay']:
-                if hasattr(ref_channel, 'name'):
-                    ref_channel = ref_channel.name
-                ref_index = ivi.get_index(self._channel_name, ref_channel)
-                query += ", %s" % self._channel_name[ref_index]
-            return float(self._ask(query))
-        return 0
+        if len(l) > 1:
+            l[-1] = l[-1] + ','
+        func = ' '.join(l)
+        cmd = ":measure:%s %s" % (func, self._channel_name[index])
+        if measurement_function in ['ratio', 'phase', 'delay']:
+            if hasattr(ref_channel, 'name'):
+                ref_channel = ref_channel.name
+            ref_index = ivi.get_index(self._channel_name, ref_channel)
+            cmd += ", %s" % self._channel_name[ref_index]
+        return cmd
 
     def _set_working_directory(self,value):
         if not self._driver_operation_simulate:
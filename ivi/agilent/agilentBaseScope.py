@@ -28,18 +28,20 @@ import array
 import sys
 import time
 
+import numpy as np
+
 from .. import ivi
 from .. import scope
 from .. import scpi
 from .. import extra
 
-AcquisitionTypeMapping = {
+AcquisitionTypeMapping = ivi.ValueMapping({
         'normal': 'norm',
         'peak_detect': 'peak',
         'high_resolution': 'hres',
-        'average': 'aver'}
+        'average': 'aver'})
 VerticalCoupling = set(['ac', 'dc'])
-TriggerTypeMapping = {
+TriggerTypeMapping = ivi.ValueMapping({
         'edge': 'edge',
         'width': 'glit',
         'glitch': 'glit',
@@ -58,7 +60,7 @@ TriggerTypeMapping = {
         'spi': 'spi',
         'uart': 'uart',
         'usb': 'usb',
-        'flexray': 'flex'}
+        'flexray': 'flex'})
 TriggerCouplingMapping = {
         'ac': ('ac', 0, 0),
         'dc': ('dc', 0, 0),
@@ -70,7 +72,7 @@ TriggerCouplingMapping = {
         'hf_noise_reject': ('dc', 1, 1),
         'hf_noise_reject_ac': ('ac', 1, 1),
         'lf_noise_reject': ('lfr', 1, 0)}
-TVTriggerEventMapping = {'field1': 'fie1',
+TVTriggerEventMapping = ivi.ValueMapping({'field1': 'fie1',
         'field2': 'fie2',
         'any_field': 'afi',
         'any_line': 'alin',
@@ -80,8 +82,8 @@ TVTriggerEventMapping = {'field1': 'fie1',
         'line_field2': 'lfi2',
         'line': 'line',
         'line_alternate': 'lalt',
-        'lvertical': 'lver'}
-TVTriggerFormatMapping = {'generic': 'gen',
+        'lvertical': 'lver'})
+TVTriggerFormatMapping = ivi.ValueMapping({'generic': 'gen',
         'ntsc': 'ntsc',
         'pal': 'pal',
         'palm': 'palm',
@@ -97,20 +99,20 @@ TVTriggerFormatMapping = {'generic': 'gen',
         'p1080l60hz': 'p1080l60hz',
         'i1080l50hz': 'i1080l50hz',
         'i1080': 'i1080l50hz',
-        'i1080l60hz': 'i1080l60hz'}
-PolarityMapping = {'positive': 'pos',
-        'negative': 'neg'}
-GlitchConditionMapping = {'less_than': 'less',
-        'greater_than': 'gre'}
-WidthConditionMapping = {'within': 'rang'}
-SampleModeMapping = {'real_time': 'rtim',
+        'i1080l60hz': 'i1080l60hz'})
+PolarityMapping = ivi.ValueMapping({'positive': 'pos',
+        'negative': 'neg'})
+GlitchConditionMapping = ivi.ValueMapping({'less_than': 'less',
+        'greater_than': 'gre'})
+WidthConditionMapping = ivi.ValueMapping({'within': 'rang'})
+SampleModeMapping = ivi.ValueMapping({'real_time': 'rtim',
         'equivalent_time': 'etim',
-        'segmented': 'segm'}
-SlopeMapping = {
+        'segmented': 'segm'})
+SlopeMapping = ivi.ValueMapping({
         'positive': 'pos',
         'negative': 'neg',
         'either': 'eith',
-        'alternating': 'alt'}
+        'alternating': 'alt'})
 MeasurementFunctionMapping = {
         'rise_time': 'risetime',
         'fall_time': 'falltime',
@@ -148,16 +150,16 @@ ScreenshotImageFormatMapping = {
         'bmp8': 'bmp8bit',
         'png': 'png',
         'png24': 'png'}
-TimebaseModeMapping = {
+TimebaseModeMapping = ivi.ValueMapping({
         'main': 'main',
         'window': 'wind',
         'xy': 'xy',
-        'roll': 'roll'}
-TimebaseReferenceMapping = {
+        'roll': 'roll'})
+TimebaseReferenceMapping = ivi.ValueMapping({
         'left': 'left',
         'center': 'cent',
-        'right': 'righ'}
-TriggerModifierMapping = {'none': 'normal', 'auto': 'auto'}
+        'right': 'righ'})
+TriggerModifierMapping = ivi.ValueMapping({'none': 'normal', 'auto': 'auto'})
 
 class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.common.Reset,
                        scpi.common.SelfTest, scpi.common.Memory,
@@ -167,6 +169,7 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
                        scope.ContinuousAcquisition, scope.AverageAcquisition,
                        scope.SampleMode, scope.TriggerModifier, scope.AutoSetup,
                        extra.common.SystemSetup, extra.common.Screenshot,
+                       extra.scope.SegmentedWaveform, extra.scope.DigitalWaveform,
                        ivi.Driver):
     "Agilent generic IVI oscilloscope driver"
     
@@ -199,6 +202,9 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
         
         self._horizontal_divisions = 10
         self._vertical_divisions = 8
+        self._waveform_sample_format = 'H'
+        self._measurement_results_max = 4
+        self._measurement_continuous_triggered = False
         
         self._acquisition_segmented_count = 2
         self._acquisition_segmented_index = 1
@@ -492,12 +498,6 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
     def _utility_disable(self):
         pass
     
-    def _utility_lock_object(self):
-        pass
-    
-    def _utility_unlock_object(self):
-        pass
-    
     def _init_channels(self):
         try:
             super(agilentBaseScope, self)._init_channels()
@@ -627,7 +627,7 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
     def _get_timebase_mode(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":timebase:mode?").lower()
-            self._timebase_mode = [k for k,v in TimebaseModeMapping.items() if v==value][0]
+            self._timebase_mode = TimebaseModeMapping.reverse(value)
             self._set_cache_valid()
         return self._timebase_mode
     
@@ -642,7 +642,7 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
     def _get_timebase_reference(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":timebase:reference?").lower()
-            self._timebase_reference = [k for k,v in TimebaseReferenceMapping.items() if v==value][0]
+            self._timebase_reference = TimebaseReferenceMapping.reverse(value)
             self._set_cache_valid()
         return self._timebase_reference
     
@@ -793,7 +793,7 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
     def _get_acquisition_type(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":acquire:type?").lower()
-            self._acquisition_type = [k for k,v in AcquisitionTypeMapping.items() if v==value][0]
+            self._acquisition_type = AcquisitionTypeMapping.reverse(value)
             self._set_cache_valid()
         return self._acquisition_type
     
@@ -1104,7 +1104,7 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
     def _get_trigger_edge_slope(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":trigger:edge:slope?").lower()
-            self._trigger_edge_slope = [k for k,v in SlopeMapping.items() if v==value][0]
+            self._trigger_edge_slope = SlopeMapping.reverse(value)
             self._set_cache_valid()
         return self._trigger_edge_slope
     
@@ -1149,7 +1149,7 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
                 else:
                     value = 'glitch'
             else:
-                value = [k for k,v in TriggerTypeMapping.items() if v==value][0]
+                value = TriggerTypeMapping.reverse(value)
             self._trigger_type = value
             self._set_cache_valid()
         return self._trigger_type
@@ -1177,7 +1177,7 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":trigger:tv:mode?").lower()
             # may need processing
-            self._trigger_tv_trigger_event = [k for k,v in TVTriggerEventMapping.items() if v==value][0]
+            self._trigger_tv_trigger_event = TVTriggerEventMapping.reverse(value)
             self._set_cache_valid()
         return self._trigger_tv_trigger_event
     
@@ -1209,7 +1209,7 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
     def _get_trigger_tv_polarity(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":trigger:tv:polarity?").lower()
-            self._trigger_tv_polarity = [k for k,v in PolarityMapping.items() if v==value][0]
+            self._trigger_tv_polarity = PolarityMapping.reverse(value)
             self._set_cache_valid()
         return self._trigger_tv_polarity
     
@@ -1224,7 +1224,7 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
     def _get_trigger_tv_signal_format(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":trigger:tv:standard?").lower()
-            self._trigger_tv_signal_format = [k for k,v in TVTriggerFormatMapping.items() if v==value][0]
+            self._trigger_tv_signal_format = TVTriggerFormatMapping.reverse(value)
             self._set_cache_valid()
         return self._trigger_tv_signal_format
     
@@ -1240,7 +1240,7 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":trigger:glitch:qualifier?").lower()
             if value in GlitchConditionMapping.values():
-                self._trigger_glitch_condition = [k for k,v in GlitchConditionMapping.items() if v==value][0]
+                self._trigger_glitch_condition = GlitchConditionMapping.reverse(value)
                 self._set_cache_valid()
         return self._trigger_glitch_condition
     
@@ -1274,7 +1274,7 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":trigger:glitch:qualifier?").lower()
             if value in WidthConditionMapping.values():
-                self._trigger_width_condition = [k for k,v in WidthConditionMapping.items() if v==value][0]
+                self._trigger_width_condition = WidthConditionMapping.reverse(value)
                 self._set_cache_valid()
         return self._trigger_width_condition
     
@@ -1315,7 +1315,7 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
     def _get_trigger_width_polarity(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":trigger:glitch:polarity?").lower()
-            self._trigger_width_polarity = [k for k,v in PolarityMapping.items() if v==value][0]
+            self._trigger_width_polarity = PolarityMapping.reverse(value)
             self._set_cache_valid()
         return self._trigger_width_polarity
     
@@ -1333,23 +1333,16 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
     def _set_trigger_ac_line_slope(self, value):
         self._set_trigger_edge_slope(value)
     
-    def _measurement_fetch_waveform(self, index):
-        index = ivi.get_index(self._channel_name, index)
-
-        if self._driver_operation_simulate:
-            return ivi.TraceYT()
-
-        self._write(":waveform:source %s" % self._channel_name[index])
+    def _setup_waveform_transfer(self, index):
+        self._write_setting(":waveform:source %s" % self._channel_name[index])
         if sys.byteorder == 'little':
-            self._write(":waveform:byteorder lsbfirst")
+            self._write_setting(":waveform:byteorder lsbfirst")
         else:
-            self._write(":waveform:byteorder msbfirst")
-        self._write(":waveform:unsigned 1")
-        self._write(":waveform:format word")
+            self._write_setting(":waveform:byteorder msbfirst")
+        self._write_setting(":waveform:unsigned 1")
+        self._write_setting(":waveform:format word")
 
-        trace = ivi.TraceYT()
-
-        # Read preamble
+    def _read_waveform_preamble(self, trace, peak_detect = False):
         pre = self._ask(":waveform:preamble?").split(',')
 
         acq_format = int(pre[0])
@@ -1364,11 +1357,26 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
         trace.y_reference = int(float(pre[9]))
         trace.y_hole = 0
 
-        if acq_type == 1:
+        if (acq_type == 1) != peak_detect:
             raise scope.InvalidAcquisitionTypeException()
 
         if acq_format != 1:
-            raise UnexpectedResponseException()
+            raise ivi.UnexpectedResponseException()
+
+        return points
+
+    def _measurement_fetch_waveform(self, index):
+        index = ivi.get_index(self._channel_name, index)
+
+        if self._driver_operation_simulate:
+            return ivi.TraceYT()
+
+        self._setup_waveform_transfer(index)
+
+        trace = ivi.TraceYT()
+
+        # Read preamble
+        points = self._read_waveform_preamble(trace)
 
         # Read waveform data
         raw_data = self._ask_for_ieee_block(":waveform:data?")
@@ -1379,6 +1387,112 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
 
         return trace
     
+    def _measurement_fetch_digital_waveform(self, packed = False):
+        if self._digital_channel_count == 0:
+            raise ivi.OperationNotSupportedException()
+
+        if self._driver_operation_simulate:
+            return ivi.TraceYT()
+
+        trace = ivi.TraceYT()
+        data = None
+
+        # Read each pod of eight digital channels once
+        for k in range(0, self._digital_channel_count, 8):
+            self._write_setting(":waveform:source pod%d" % (k // 8 + 1))
+            self._write_setting(":waveform:format byte")
+
+            # Read preamble
+            pre = self._ask(":waveform:preamble?").split(',')
+
+            points = int(pre[2])
+            trace.average_count = int(pre[3])
+            trace.x_increment = float(pre[4])
+            trace.x_origin = float(pre[5])
+            trace.x_reference = int(float(pre[6]))
+
+            # Read waveform data
+            raw_data = self._ask_for_ieee_block(":waveform:data?")
+            self._read_raw() # flush buffer
+
+            y_raw = np.frombuffer(raw_data[0:points], 'B').astype(np.uint16) << k
+
+            if data is None:
+                data = y_raw
+            else:
+                n = min(len(data), len(y_raw))
+                data = data[0:n] | y_raw[0:n]
+
+        # Store in trace object
+        if packed:
+            trace.y_raw = data
+        else:
+            trace.y_raw = ivi.unpack_bits(data, self._digital_channel_count)
+
+        return trace
+
+    def _measurement_iter_waveform_chunks(self, index, chunk_points = 1000000):
+        index = ivi.get_index(self._channel_name, index)
+
+        if self._driver_operation_simulate:
+            return
+
+        self._setup_waveform_transfer(index)
+
+        trace = ivi.TraceYT()
+
+        # Read preamble
+        points = self._read_waveform_preamble(trace)
+
+        # Read waveform data as it arrives; the session lock is held until
+        # the transfer completes or the generator is closed
+        with self._session_lock:
+            self._write(":waveform:data?")
+            block = self._read_ieee_block_chunks(chunk_points*2)
+            offset = 0
+            try:
+                for raw_data in block:
+                    y_raw = np.frombuffer(raw_data, self._waveform_sample_format)[0:max(points-offset, 0)]
+                    if len(y_raw) > 0:
+                        yield trace.chunk(offset, y_raw)
+                    offset += len(y_raw)
+            finally:
+                block.close()
+                self._read_raw() # flush buffer
+
+    def _measurement_fetch_waveform_segmented(self, index):
+        index = ivi.get_index(self._channel_name, index)
+
+        if self._driver_operation_simulate:
+            return ivi.TraceYTSegmented()
+
+        count = self._get_acquisition_segmented_acquired_count()
+
+        self._setup_waveform_transfer(index)
+
+        trace = ivi.TraceYTSegmented()
+
+        # Read preamble; scaling is common to all segments
+        points = self._read_waveform_preamble(trace)
+
+        # Read waveform data and time tag of each segment
+        raw_data = bytearray()
+        time_tag = list()
+
+        for k in range(count):
+            self._write(":acquire:segmented:index %d" % (k+1))
+            time_tag.append(float(self._ask(":waveform:segmented:ttag?")))
+            raw_data.extend(self._ask_for_ieee_block(":waveform:data?")[0:points*2])
+            self._read_raw() # flush buffer
+
+        self._set_cache_valid(False, 'acquisition_segmented_index')
+
+        # Store in trace object
+        trace.y_raw = np.frombuffer(raw_data, 'H', count*points).reshape(count, points)
+        trace.time_tag = np.array(time_tag)
+
+        return trace
+    
     def _measurement_read_waveform(self, index, maximum_time):
         return self._measurement_fetch_waveform(index)
     
@@ -1388,6 +1502,43 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
             self._write(":digitize")
             self._set_cache_valid(False, 'trigger_continuous')
     
+    def _measurement_continuous_arm(self):
+        if not self._driver_operation_simulate:
+            # clear the trigger event register before arming
+            self._ask(":ter?")
+            self._write(":single")
+            self._measurement_continuous_triggered = False
+            self._set_cache_valid(False, 'trigger_continuous')
+    
+    def _measurement_continuous_wait(self, timeout):
+        # the run bit in the operation status condition register may not be
+        # set yet right after :single, so first wait for the latched trigger
+        # event, then for the run bit to clear at the end of the acquisition
+        def complete():
+            if not self._measurement_continuous_triggered:
+                self._measurement_continuous_triggered = int(self._ask(":ter?")) == 1
+                if not self._measurement_continuous_triggered:
+                    return False
+            return int(self._ask(":operegister:condition?")) & 8 == 0
+        return self._wait_for(complete, timeout, max_interval=0.01)
+    
+    def _measurement_continuous_read(self, index):
+        index = ivi.get_index(self._channel_name, index)
+
+        trace = ivi.TraceYT()
+
+        if self._driver_operation_simulate:
+            return trace, np.zeros(0, self._waveform_sample_format)
+
+        self._setup_waveform_transfer(index)
+        points = self._read_waveform_preamble(trace)
+
+        raw_data = self._ask_for_ieee_block(":waveform:data?")
+        self._read_raw() # flush buffer
+
+        dtype = np.dtype(self._waveform_sample_format)
+        return trace, np.frombuffer(raw_data[0:points*dtype.itemsize], dtype)
+    
     def _get_reference_levels(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             thresh, mode, high, middle, low = self._ask(":measure:define? thresholds").split(',')
@@ -1454,7 +1605,7 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
                         self._reference_level_middle,
                         self._reference_level_low))
     
-    def _measurement_fetch_waveform_measurement(self, index, measurement_function, ref_channel = None):
+    def _measurement_command(self, index, measurement_function, ref_channel = None, query = True):
         index = ivi.get_index(self._channel_name, index)
         if index < self._analog_channel_count:
             if measurement_function not in MeasurementFunctionMapping:
@@ -1464,21 +1615,86 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
             if measurement_function not in MeasurementFunctionMappingDigital:
                 raise ivi.ValueNotSupportedException()
             func = MeasurementFunctionMappingDigital[measurement_function]
-        if not self._driver_operation_simulate:
-            l = func.split(' ')
+        l = func.split(' ')
+        if query:
             l[0] = l[0] + '?'
-            if len(l) > 1:
-                l[-1] = l[-1] + ','
-            func = ' '.join(l)
-            query = ":measure:%s %s" % (func, self._channel_name[index])
-            if measurement_function in ['ratio', 'phase', 'delay']:
-                if hasattr(ref_channel, 'name'):
-                    ref_channel = ref_channel.name
-                ref_index = ivi.get_index(self._channel_name, ref_channel)
-                query += ", %s" % self._channel_name[ref_index]
+        if len(l) > 1:
+            l[-1] = l[-1] + ','
+        func = ' '.join(l)
+        cmd = ":measure:%s %s" % (func, self._channel_name[index])
+        if measurement_function in ['ratio', 'phase', 'delay']:
+            if hasattr(ref_channel, 'name'):
+                ref_channel = ref_channel.name
+            ref_index = ivi.get_index(self._channel_name, ref_channel)
+            cmd += ", %s" % self._channel_name[ref_index]
+        return cmd
+    
+    def _measurement_fetch_waveform_measurement(self, index, measurement_function, ref_channel = None):
+        query = self._measurement_command(index, measurement_function, ref_channel)
+        if not self._driver_operation_simulate:
             return float(self._ask(query))
         return 0
     
+    def _parse_measurement_results(self, resp):
+        "Split a :measure:results? response into a list of (label, values) records"
+        # each record is a label followed by its numeric fields; the number
+        # of fields depends on the model and firmware
+        records = list()
+        for v in resp.split(','):
+            try:
+                x = float(v)
+            except ValueError:
+                records.append((v.strip(), list()))
+                continue
+            if not records:
+                raise ivi.UnexpectedResponseException()
+            records[-1][1].append(x)
+        return records
+    
+    def _measurement_fetch_waveform_measurements(self, measurements, statistics = False):
+        """Fetch several measurements at once
+        
+        With statistics, the measurements are installed on the instrument and
+        read back from the results table.  This clears any measurements the
+        user had installed, as the instrument cannot report them in a form that
+        can be sent back.  The statistics mode is restored afterwards.
+        """
+        result, l = self._init_measurement_results(measurements)
+        cmds = [self._measurement_command(index, func, ref, not statistics) for index, func, ref in l]
+        if self._driver_operation_simulate:
+            return result
+        if not statistics:
+            # all queries in a single message, responses are separated by ;
+            result['value'] = [float(v) for v in self._ask(";".join(cmds)).split(';')]
+            return result
+        # install the measurements and read them back from the results
+        # table, as many at a time as the instrument can display
+        mode = self._ask(":measure:statistics?")
+        self._write(":measure:statistics on")
+        try:
+            n = self._measurement_results_max
+            for k in range(0, len(cmds), n):
+                self._write(":measure:clear")
+                for cmd in cmds[k:k+n]:
+                    self._write(cmd)
+                records = self._parse_measurement_results(self._ask(":measure:results?"))
+                if len(records) < len(cmds[k:k+n]):
+                    raise ivi.UnexpectedResponseException()
+                # current, minimum, maximum, mean, std dev, count
+                for j in range(len(cmds[k:k+n])):
+                    r = records[j][1]
+                    if len(r) < 6:
+                        raise ivi.UnexpectedResponseException()
+                    result[k+j]['value'] = r[0]
+                    result[k+j]['minimum'] = r[1]
+                    result[k+j]['maximum'] = r[2]
+                    result[k+j]['mean'] = r[3]
+                    result[k+j]['std_dev'] = r[4]
+                    result[k+j]['count'] = int(r[5])
+        finally:
+            self._write(":measure:statistics %s" % mode)
+        return result
+    
     def _measurement_read_waveform_measurement(self, index, measurement_function, maximum_time):
         return self._measurement_fetch_waveform_measurement(index, measurement_function)
     
@@ -1490,8 +1706,25 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
     
     def _measurement_fetch_waveform_min_max(self, index):
         index = ivi.get_index(self._channel_name, index)
-        data = list()
-        return data
+
+        if self._driver_operation_simulate:
+            return ivi.TraceYTMinMax()
+
+        self._setup_waveform_transfer(index)
+
+        trace = ivi.TraceYT()
+
+        # Read preamble
+        points = self._read_waveform_preamble(trace, True)
+
+        # Read waveform data, peak detect records hold min/max pairs
+        raw_data = self._ask_for_ieee_block(":waveform:data?")
+        self._read_raw() # flush buffer
+
+        dtype = np.dtype(self._waveform_sample_format)
+        y_raw = np.frombuffer(raw_data, dtype, len(raw_data) // dtype.itemsize)
+
+        return trace.min_max_pairs(y_raw, points)
     
     def _measurement_read_waveform_min_max(self, index, maximum_time):
         return self._measurement_fetch_waveform_min_max(index)
@@ -1528,7 +1761,7 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
     def _get_acquisition_sample_mode(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":acquire:mode?").lower()
-            self._acquisition_sample_mode = [k for k,v in SampleModeMapping.items() if v==value][0]
+            self._acquisition_sample_mode = SampleModeMapping.reverse(value)
             self._set_cache_valid()
         return self._acquisition_sample_mode
     
@@ -1543,7 +1776,7 @@ class agilentBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.comm
     def _get_trigger_modifier(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":trigger:sweep?").lower()
-            self._trigger_modifier = [k for k,v in TriggerModifierMapping.items() if v==value][0]
+            self._trigger_modifier = TriggerModifierMapping.reverse(value)
             self._set_cache_valid()
         return self._trigger_modifier
 
@@ -92,12 +92,6 @@ class agilentU2000(scpi.common.IdnCommand, scpi.common.ErrorQuery,
     def _utility_disable(self):
         pass
     
-    def _utility_lock_object(self):
-        pass
-    
-    def _utility_unlock_object(self):
-        pass
-    
     
     def _init_channels(self):
         try:
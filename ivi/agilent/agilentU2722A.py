@@ -24,6 +24,8 @@ THE SOFTWARE.
 
 """
 
+import numpy as np
+
 from .. import ivi
 from .. import dcpwr
 from .. import extra
@@ -111,12 +113,6 @@ class agilentU2722A(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.common.
     def _utility_disable(self):
         pass
 
-    def _utility_lock_object(self):
-        pass
-
-    def _utility_unlock_object(self):
-        pass
-
     def _init_outputs(self):
         try:
             super(agilentU2722A, self)._init_outputs()
@@ -281,7 +277,7 @@ class agilentU2722A(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.common.
         if len(self._output_spec[index][range_type+'_range']) < 2:
             # do not set range if there is only one range
             return
-        k = dcpwr.get_range(self._output_spec[index][range_type+'_range'], None, range_val)
+        k = self._get_output_range(index, range_type+'_range', None, range_val)
         if k is None:
             raise ivi.OutOfRangeException()
         if range_type == 'voltage':
@@ -325,3 +321,17 @@ class agilentU2722A(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.common.
             if not self._driver_operation_simulate:
                 return float(self._ask("measure:current? (@%d)" % (index+1)))
         return 0
+
+    def _measure_outputs(self, outputs = None):
+        if outputs is None:
+            outputs = range(self._output_count)
+        indices = [ivi.get_index(self._output_name, k) for k in outputs]
+        if self._driver_operation_simulate or len(indices) == 0:
+            return np.zeros((len(indices), 2))
+        # one channel list query per measurement type
+        chan = ','.join(str(k+1) for k in indices)
+        voltage = [float(x) for x in self._ask("measure:voltage? (@%s)" % chan).split(',')]
+        current = [float(x) for x in self._ask("measure:current? (@%s)" % chan).split(',')]
+        if len(voltage) != len(indices) or len(current) != len(indices):
+            raise ivi.UnexpectedResponseException()
+        return np.array([voltage, current]).T
@@ -118,9 +118,6 @@ class anritsuMN9610B(ivi.Driver):
             error_message = ["No error", "Command error", "Execution error", "Command and execution error"][error_code]
         return (error_code, error_message)
 
-    def _utility_lock_object(self):
-        pass
-
     def _utility_reset(self):
         pass
 
@@ -134,9 +131,6 @@ class anritsuMN9610B(ivi.Driver):
             pass
         return (code, message)
 
-    def _utility_unlock_object(self):
-        pass
-
 
 
     def _get_attenuation(self):
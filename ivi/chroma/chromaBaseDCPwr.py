@@ -26,6 +26,7 @@ THE SOFTWARE.
 
 from .. import ivi
 from .. import dcpwr
+from .. import extra
 from .. import scpi
 
 TrackingType = set(['floating'])
@@ -34,7 +35,7 @@ TriggerSourceMapping = {
         'bus': 'bus'}
 
 class chromaBaseDCPwr(scpi.dcpwr.Base, scpi.dcpwr.Trigger, scpi.dcpwr.SoftwareTrigger,
-                scpi.dcpwr.Measurement):
+                scpi.dcpwr.Measurement, extra.dcpwr.List):
     "Chroma ATE generic IVI DC power supply driver"
     
     def __init__(self, *args, **kwargs):
@@ -104,6 +105,38 @@ class chromaBaseDCPwr(scpi.dcpwr.Base, scpi.dcpwr.Trigger, scpi.dcpwr.SoftwareTr
 
         self.outputs._set_list(self._output_name)
 
+    def _set_output_list_count(self, index, value):
+        value = int(value)
+        if value < 1 or value > 15000:
+            raise ivi.OutOfRangeException()
+        super(chromaBaseDCPwr, self)._set_output_list_count(index, value)
+
+    def _output_list_configure(self, index, voltage, current, dwell):
+        super(chromaBaseDCPwr, self)._output_list_configure(index, voltage, current, dwell)
+        index = ivi.get_index(self._output_name, index)
+        if not self._driver_operation_simulate:
+            # steps are stored as the sequences of program 1
+            self._write("PROG:SEL 1")
+            self._write("PROG:CLE")
+            self._write("PROG:LINK 0")
+            self._write("PROG:COUN %d" % self._output_list_count[index])
+            for k in range(len(self._output_list_voltage[index])):
+                self._write("PROG:SEQ:SEL %d;:PROG:SEQ:TYPE AUTO;:PROG:SEQ:VOLT %.3f;:PROG:SEQ:CURR %.3f;:PROG:SEQ:TIME %.3f" %
+                        (k+1, self._output_list_voltage[index][k], self._output_list_current[index][k], self._output_list_dwell[index][k]))
+            self._write("PROG:SAV")
+
+    def _output_list_initiate(self, index):
+        index = ivi.get_index(self._output_name, index)
+        if not self._driver_operation_simulate:
+            self._write("PROG:SEL 1")
+            self._write("PROG:COUN %d" % self._output_list_count[index])
+            self._write("PROG:RUN ON")
+
+    def _output_list_abort(self, index):
+        index = ivi.get_index(self._output_name, index)
+        if not self._driver_operation_simulate:
+            self._write("PROG:RUN OFF")
+
     
     
     
@@ -105,12 +105,6 @@ class colbyPDL10A(scpi.common.IdnCommand, scpi.common.Reset,
                 error_code = 0
         return (error_code, error_message)
 
-    def _utility_lock_object(self):
-        pass
-
-    def _utility_unlock_object(self):
-        pass
-
     def _get_delay(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             resp = self._ask("del?")
@@ -24,6 +24,10 @@ THE SOFTWARE.
 
 """
 
+import bisect
+
+import numpy as np
+
 from . import ivi
 
 # Parameter Values
@@ -34,19 +38,62 @@ OutputState = set(['constant_voltage', 'constant_current', 'over_voltage',
 MeasurementType = set(['current', 'voltage'])
 
 
+class RangeTable(object):
+    "Sorted, immutable index of instrument ranges"
+    
+    def __init__(self, range_list, offset=None):
+        l = list()
+        for i in range_list:
+            if offset is None:
+                l.append((abs(range_list[i]), i))
+            else:
+                l.append((abs(range_list[i][offset]), i))
+        # descending stable sort, then reverse, so that the last of several
+        # equal ranges wins, as with the original linear search
+        l.sort(key=lambda x: x[0], reverse=True)
+        l.reverse()
+        self._limits = tuple(x[0] for x in l)
+        self._keys = tuple(x[1] for x in l)
+        self._limit_array = np.array(self._limits, dtype=float)
+    
+    def __len__(self):
+        return len(self._keys)
+    
+    def lookup(self, val):
+        "Return the key of the smallest range covering val, or None"
+        i = bisect.bisect_left(self._limits, abs(val))
+        if i < len(self._keys):
+            return self._keys[i]
+        return None
+    
+    def lookup_array(self, values):
+        "Return an object array of range keys for values, None where out of range"
+        ind = np.searchsorted(self._limit_array, np.abs(np.asarray(values, dtype=float)))
+        keys = np.array(self._keys + (None,), dtype=object)
+        return keys[ind]
+
+
 def get_range(range_list, offset, val):
-    l = list()
-    for i in range_list:
-        if offset is None:
-            l.append((i, abs(range_list[i])))
-        else:
-            l.append((i, abs(range_list[i][offset])))
-    l.sort(key=lambda x: x[1], reverse=True)
-    k = None
-    for i in range(len(l)):
-        if l[i][1] >= abs(val):
-            k = l[i][0]
-    return k
+    return RangeTable(range_list, offset).lookup(val)
+
+
+def get_range_array(range_list, offset, values):
+    return RangeTable(range_list, offset).lookup_array(values)
+
+
+def build_range_tables(spec):
+    "Build range tables for each output spec, keyed by (range name, offset)"
+    tables = list()
+    for s in spec:
+        d = dict()
+        for name in s:
+            if name == 'range':
+                d[(name, 0)] = RangeTable(s[name], 0)
+                d[(name, 1)] = RangeTable(s[name], 1)
+            elif name.endswith('_range'):
+                d[(name, None)] = RangeTable(s[name], None)
+        tables.append(d)
+    return tables
 
 
 class Base(ivi.IviContainer):
@@ -300,6 +347,22 @@ class Base(ivi.IviContainer):
         
         self.outputs._set_list(self._output_name)
     
+    def _get_output_spec(self):
+        return self.__dict__.get('_output_spec_list')
+    
+    def _set_output_spec(self, value):
+        # precompute range tables whenever the output spec is replaced
+        self.__dict__['_output_spec_list'] = value
+        self.__dict__['_output_range_tables'] = build_range_tables(value)
+    
+    _output_spec = property(_get_output_spec, _set_output_spec)
+    
+    def _get_output_range(self, index, name, offset, val):
+        return self._output_range_tables[index][(name, offset)].lookup(val)
+    
+    def _get_output_range_array(self, index, name, offset, values):
+        return self._output_range_tables[index][(name, offset)].lookup_array(values)
+    
     def _get_output_current_limit(self, index):
         index = ivi.get_index(self._output_name, index)
         return self._output_current_limit[index]
@@ -385,12 +448,11 @@ class Base(ivi.IviContainer):
             t = 0
         elif range_type == 'current':
             t = 1
-        k = dcpwr.get_range(self._output_range[index], t, range_val)
-        if k < 0:
+        k = self._get_output_range(index, 'range', t, range_val)
+        if k is None:
             raise ivi.OutOfRangeException()
-        self._output_spec[index]['voltage_max'] = self._output_range[index][k][0]
-        self._output_spec[index]['current_max'] = self._output_range[index][k][1]
-        pass
+        self._output_spec[index]['voltage_max'] = self._output_spec[index]['range'][k][0]
+        self._output_spec[index]['current_max'] = self._output_spec[index]['range'][k][1]
     
     def _output_configure_ovp(self, index, enabled, limit):
         if enabled:
@@ -620,6 +682,17 @@ class Measurement(ivi.IviContainer):
                         * 'voltage'
                         * 'current'
                         """, cls, grp, '7.2.1'))
+        self._add_method('measure_outputs',
+                        self._measure_outputs,
+                        ivi.Doc("""
+                        Measures the voltage and current of several outputs at once and returns
+                        them as a NumPy array with one row per output, holding the measured
+                        voltage and current in that order.
+                        
+                        outputs is a list of output names or indices. If it is not specified,
+                        all of the outputs are measured. Drivers use a single query for all of
+                        the outputs where the instrument supports it.
+                        """))
     
     def _output_measure(self, index, type):
         index = ivi.get_index(self._output_name, index)
@@ -627,5 +700,12 @@ class Measurement(ivi.IviContainer):
             raise ivi.ValueNotSupportedException()
         return 0
     
+    def _measure_outputs(self, outputs = None):
+        if outputs is None:
+            outputs = range(self._output_count)
+        indices = [ivi.get_index(self._output_name, k) for k in outputs]
+        return np.array([[self._output_measure(k, 'voltage'), self._output_measure(k, 'current')] for k in indices],
+                        dtype=float).reshape(-1, 2)
+    
     
 
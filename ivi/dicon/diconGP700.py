@@ -217,9 +217,6 @@ class diconGP700(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.common.Res
     def _utility_disable(self):
         pass
     
-    def _utility_lock_object(self):
-        pass
-    
     def _utility_reset(self):
         if not self._driver_operation_simulate:
             self._write("*RST")
@@ -227,9 +224,6 @@ class diconGP700(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.common.Res
             self._clear()
             self.driver_operation.invalidate_all_attributes()
     
-    def _utility_unlock_object(self):
-        pass
-    
     
     def _init_channels(self):
         try:
@@ -24,8 +24,14 @@ THE SOFTWARE.
 
 """
 
+import time
+
+import numpy as np
+
 from . import ivi
 
+class ReadingMemoryOverflowException(ivi.IviException): pass
+
 # Parameter Values
 ApertureTimeUnits = set(['seconds', 'powerline_cycles'])
 Auto = set(['off', 'on', 'once'])
@@ -449,6 +455,8 @@ class MultiPoint(ivi.IviContainer):
                         self._measurement_fetch_multi_point)
         self._add_method('measurement.read_multi_point',
                         self._measurement_read_multi_point)
+        self._add_method('measurement.iter_readings',
+                        self._measurement_iter_readings)
         
     
     def _get_trigger_measurement_complete_destination(self):
@@ -498,6 +506,60 @@ class MultiPoint(ivi.IviContainer):
     def _measurement_read_multi_point(self, max_time, num_of_measurements = 0):
         pass
     
+    def _measurement_remove_readings(self, max_count):
+        # returns (readings, overflow) with at most max_count readings removed
+        # from instrument reading memory
+        return np.zeros(max_count), False
+    
+    def _measurement_iter_readings(self, chunk_size = 1000, interval = 0.1, buffer_size = None, max_time = None):
+        # drain instrument reading memory into a ring buffer while the
+        # acquisition is running and yield fixed size chunks.  Only as many
+        # readings as fit in the ring buffer are removed, the rest stay in the
+        # instrument until the consumer catches up.
+        chunk_size = int(chunk_size)
+        if buffer_size is None:
+            buffer_size = 10 * chunk_size
+        buffer_size = int(buffer_size)
+        if chunk_size < 1 or buffer_size < chunk_size:
+            raise ivi.OutOfRangeException()
+        
+        remaining = self._get_trigger_multi_point_count()
+        if remaining != float('inf'):
+            remaining *= self._get_trigger_multi_point_sample_count()
+        
+        buf = np.empty(buffer_size)
+        head = 0
+        count = 0
+        t_end = None if max_time is None else time.time() + max_time
+        
+        while remaining > 0 or count > 0:
+            n = 0
+            if remaining > 0:
+                data, overflow = self._measurement_remove_readings(int(min(buffer_size - count, remaining)))
+                if overflow:
+                    raise ReadingMemoryOverflowException()
+                n = len(data)
+                tail = (head + count) % buffer_size
+                k = min(n, buffer_size - tail)
+                buf[tail:tail+k] = data[:k]
+                buf[:n-k] = data[k:]
+                count += n
+                remaining -= n
+            
+            while count >= chunk_size or (count > 0 and remaining <= 0):
+                k = min(count, chunk_size)
+                yield np.take(buf, np.arange(head, head+k), mode='wrap')
+                head = (head + k) % buffer_size
+                count -= k
+            
+            if t_end is not None and time.time() > t_end:
+                break
+            if n == 0 and remaining > 0:
+                time.sleep(interval)
+        
+        if count > 0:
+            yield np.take(buf, np.arange(head, head+count), mode='wrap')
+    
     
 class TriggerSlope(ivi.IviContainer):
     "Extension IVI methods for DMMs that can specify the polarity of the external trigger signal"
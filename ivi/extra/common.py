@@ -24,6 +24,8 @@ THE SOFTWARE.
 
 """
 
+import numpy as np
+
 from .. import ivi
 
 class SerialNumber(ivi.IviContainer):
@@ -159,9 +161,22 @@ class Screenshot(ivi.IviContainer):
                         Captures the screen and transfers it in the specified format.
                         The display graticule is optionally inverted.
                         """))
+        self._add_method('display.fetch_screenshot_array',
+                        self._display_fetch_screenshot_array,
+                        ivi.Doc("""
+                        Captures the screen and returns it as a (height, width, 3) uint8 numpy
+                        array of RGB pixels. Drivers that decode the screen data themselves
+                        return the pixels directly without encoding an image file first.
+                        The display graticule is optionally inverted.
+                        """))
     
     def _display_fetch_screenshot(self, format='png', invert=False):
         return b''
     
+    def _display_fetch_screenshot_array(self, invert=False):
+        if self._driver_operation_simulate:
+            return np.zeros((0, 0, 3), dtype=np.uint8)
+        return ivi.decode_bmp(self._display_fetch_screenshot('bmp', invert))
+    
     
 
@@ -24,6 +24,8 @@ THE SOFTWARE.
 
 """
 
+import numpy as np
+
 from .. import ivi
 
 class OCP(ivi.IviContainer):
@@ -116,3 +118,129 @@ class OCP(ivi.IviContainer):
     
     
 
+
+class List(ivi.IviContainer):
+    "Extension IVI methods for power supplies supporting hardware list (sequence) mode"
+    
+    def __init__(self, *args, **kwargs):
+        super(List, self).__init__(*args, **kwargs)
+        
+        self._output_list_voltage = list()
+        self._output_list_current = list()
+        self._output_list_dwell = list()
+        self._output_list_count = list()
+        self._output_list_length_max = 100
+        self._output_list_dwell_min = 0
+        self._output_list_dwell_max = None
+        
+        self._add_property('outputs[].list.count',
+                        self._get_output_list_count,
+                        self._set_output_list_count,
+                        None,
+                        ivi.Doc("""
+                        Specifies the number of times the list is executed when it is initiated.
+                        A value of 0 repeats the list until it is aborted, if the instrument
+                        supports it.
+                        """))
+        self._add_property('outputs[].list.length',
+                        self._get_output_list_length,
+                        None,
+                        None,
+                        ivi.Doc("""
+                        Returns the number of steps in the list last configured.
+                        """))
+        self._add_method('outputs[].list.configure',
+                        self._output_list_configure,
+                        ivi.Doc("""
+                        Uploads a list of steps to the instrument. Each step sets the voltage
+                        level and current limit of the output and holds them for the dwell time
+                        in seconds before moving to the next step.
+                        
+                        voltage, current and dwell are sequences of the same length. current and
+                        dwell may also be single values that apply to every step.
+                        
+                        The list is executed by the instrument when it is initiated with the
+                        Initiate function, so the steps are timed by the instrument instead of
+                        by the host.
+                        """))
+        self._add_method('outputs[].list.initiate',
+                        self._output_list_initiate,
+                        ivi.Doc("""
+                        Starts execution of the configured list.
+                        """))
+        self._add_method('outputs[].list.abort',
+                        self._output_list_abort,
+                        ivi.Doc("""
+                        Stops execution of the list.
+                        """))
+    
+    def _init_outputs(self):
+        try:
+            super(List, self)._init_outputs()
+        except AttributeError:
+            pass
+        
+        self._output_list_voltage = list()
+        self._output_list_current = list()
+        self._output_list_dwell = list()
+        self._output_list_count = list()
+        for i in range(self._output_count):
+            self._output_list_voltage.append(list())
+            self._output_list_current.append(list())
+            self._output_list_dwell.append(list())
+            self._output_list_count.append(1)
+    
+    def _get_output_list_count(self, index):
+        index = ivi.get_index(self._output_name, index)
+        return self._output_list_count[index]
+    
+    def _set_output_list_count(self, index, value):
+        index = ivi.get_index(self._output_name, index)
+        value = int(value)
+        if value < 0:
+            raise ivi.OutOfRangeException()
+        self._output_list_count[index] = value
+    
+    def _get_output_list_length(self, index):
+        index = ivi.get_index(self._output_name, index)
+        return len(self._output_list_voltage[index])
+    
+    def _output_list_configure(self, index, voltage, current, dwell):
+        index = ivi.get_index(self._output_name, index)
+        voltage = [float(v) for v in voltage]
+        n = len(voltage)
+        try:
+            current = [float(v) for v in current]
+        except TypeError:
+            current = [float(current)] * n
+        try:
+            dwell = [float(v) for v in dwell]
+        except TypeError:
+            dwell = [float(dwell)] * n
+        if len(current) != n or len(dwell) != n:
+            raise ivi.ValueNotSupportedException()
+        if n == 0 or n > self._output_list_length_max:
+            raise ivi.OutOfRangeException()
+        if min(dwell) < self._output_list_dwell_min:
+            raise ivi.OutOfRangeException()
+        if self._output_list_dwell_max is not None and max(dwell) > self._output_list_dwell_max:
+            raise ivi.OutOfRangeException()
+        # levels must be within the output spec, which may be negative
+        spec = self._output_spec[index]
+        for values, limit in ((voltage, spec['voltage_max']), (current, spec['current_max'])):
+            values = np.array(values)
+            if limit >= 0:
+                if (values < 0).any() or (values > limit).any():
+                    raise ivi.OutOfRangeException()
+            else:
+                if (values > 0).any() or (values < limit).any():
+                    raise ivi.OutOfRangeException()
+        self._output_list_voltage[index] = voltage
+        self._output_list_current[index] = current
+        self._output_list_dwell[index] = dwell
+    
+    def _output_list_initiate(self, index):
+        index = ivi.get_index(self._output_name, index)
+    
+    def _output_list_abort(self, index):
+        index = ivi.get_index(self._output_name, index)
@@ -0,0 +1,91 @@
+"""
+
+Python Interchangeable Virtual Instrument Library
+
+Copyright (c) 2012-2017 Alex Forencich
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+from .. import ivi
+
+class SegmentedWaveform(ivi.IviContainer):
+    "Extension IVI methods for oscilloscopes supporting segmented memory acquisition"
+    
+    def __init__(self, *args, **kwargs):
+        super(SegmentedWaveform, self).__init__(*args, **kwargs)
+        
+        self._add_method('channels[].measurement.fetch_waveform_segmented',
+                        self._measurement_fetch_waveform_segmented,
+                        ivi.Doc("""
+                        This function returns all of the segments the oscilloscope acquired for
+                        the specified channel in a previously initiated segmented memory
+                        acquisition. The segments are transferred in as few transfers as the
+                        instrument allows.
+                        
+                        The return value is a TraceYTSegmented object. The raw sample data is
+                        stored as a 2D array with one row per segment in y_raw, and the scaled
+                        voltages are available as a 2D array in y. The time tag of each segment,
+                        in seconds relative to the first segment, is stored in time_tag. Indexing
+                        or iterating over the trace returns individual segments as TraceYT
+                        objects.
+                        
+                        This function does not check the instrument status. Typically, the
+                        end-user calls this function only in a sequence of calls to other
+                        low-level driver functions. The sequence performs one operation. The
+                        end-user uses the low-level functions to optimize one or more aspects of
+                        interaction with the instrument. Call the Error Query function at the
+                        conclusion of the sequence to check the instrument status.
+                        """))
+    
+    def _measurement_fetch_waveform_segmented(self, index):
+        index = ivi.get_index(self._channel_name, index)
+        return ivi.TraceYTSegmented()
+
+
+
+class DigitalWaveform(ivi.IviContainer):
+    "Extension IVI methods for mixed signal oscilloscopes"
+    
+    def __init__(self, *args, **kwargs):
+        super(DigitalWaveform, self).__init__(*args, **kwargs)
+        
+        self._add_method('measurement.fetch_digital_waveform',
+                        self._measurement_fetch_digital_waveform,
+                        ivi.Doc("""
+                        This function returns the waveforms of all of the digital channels from
+                        a previously initiated acquisition. The digital channels are read from
+                        the instrument in as few transfers as possible, typically one per pod of
+                        eight channels, instead of once per channel.
+                        
+                        The return value is a TraceYT object. If packed is True, y_raw holds one
+                        integer per point with bit n set when digital channel n is high.
+                        Otherwise, y_raw is a boolean array with one row per digital channel.
+                        
+                        This function does not check the instrument status. Typically, the
+                        end-user calls this function only in a sequence of calls to other
+                        low-level driver functions. The sequence performs one operation. The
+                        end-user uses the low-level functions to optimize one or more aspects of
+                        interaction with the instrument. Call the Error Query function at the
+                        conclusion of the sequence to check the instrument status.
+                        """))
+    
+    def _measurement_fetch_digital_waveform(self, packed = False):
+        return ivi.TraceYT()
@@ -24,6 +24,9 @@ THE SOFTWARE.
 
 """
 
+import hashlib
+import json
+
 from . import ivi
 
 # Exceptions
@@ -492,6 +495,7 @@ class ArbWfm(ivi.IviContainer):
         self._arbitrary_waveform_size_max = 0
         self._arbitrary_waveform_size_min = 0
         self._arbitrary_waveform_quantum = 0
+        self._arbitrary_waveform_cache = dict()
         
         self._add_property('outputs[].arbitrary.gain',
                         self._get_output_arbitrary_gain,
@@ -589,6 +593,22 @@ class ArbWfm(ivi.IviContainer):
                         to the Handle parameter of the Configure Arbitrary Waveform function to
                         produce that waveform.
                         """)
+        self._add_method('arbitrary.waveform.save_cache',
+                        self._arbitrary_waveform_save_cache,
+                        """
+                        Saves the waveform cache to a file. Drivers that support it keep a cache
+                        of the waveforms created in the instrument memory, keyed by a hash of the
+                        encoded data and format, so that creating the same waveform again returns
+                        the existing handle instead of uploading the data again.
+                        """)
+        self._add_method('arbitrary.waveform.load_cache',
+                        self._arbitrary_waveform_load_cache,
+                        """
+                        Loads a waveform cache previously saved with
+                        arbitrary.waveform.save_cache, for example from an earlier session with
+                        the same instrument. Entries are checked against the waveforms held by
+                        the instrument before a handle is reused.
+                        """)
         
     
     def _init_outputs(self):
@@ -653,7 +673,7 @@ class ArbWfm(ivi.IviContainer):
         return self._arbitrary_waveform_quantum
     
     def _arbitrary_waveform_clear(self, handle):
-        pass
+        self._arbitrary_waveform_cache_evict(handle)
     
     def _arbitrary_waveform_configure(self, index, handle, gain, offset):
         self._set_output_arbitrary_waveform(index, handle)
@@ -663,6 +683,50 @@ class ArbWfm(ivi.IviContainer):
     def _arbitrary_waveform_create(self, data):
         return "handle"
     
+    def _arbitrary_waveform_cache_key(self, data, *args):
+        # hash of the encoded waveform data, as bytes or an iterable of chunks,
+        # and the parameters it was encoded with
+        h = hashlib.sha1(repr(args).encode('utf-8'))
+        if isinstance(data, bytes):
+            data = [data]
+        for chunk in data:
+            h.update(chunk)
+        return h.hexdigest()
+    
+    def _arbitrary_waveform_cache_lookup(self, key):
+        # entries are [handle, size] with the size of the encoded data in
+        # bytes, so a file replaced under the same name is not reused
+        entry = self._arbitrary_waveform_cache.get(key)
+        if entry is None:
+            return None
+        handle, size = entry
+        if not self._arbitrary_waveform_exists(handle, size):
+            self._arbitrary_waveform_cache_evict(handle)
+            return None
+        return handle
+    
+    def _arbitrary_waveform_cache_store(self, key, handle, size = None):
+        self._arbitrary_waveform_cache_evict(handle)
+        self._arbitrary_waveform_cache[key] = [handle, size]
+    
+    def _arbitrary_waveform_cache_evict(self, handle = None):
+        if handle is None:
+            self._arbitrary_waveform_cache.clear()
+        else:
+            for key in [k for k, v in self._arbitrary_waveform_cache.items() if v[0] == handle]:
+                del self._arbitrary_waveform_cache[key]
+    
+    def _arbitrary_waveform_exists(self, handle, size = None):
+        return True
+    
+    def _arbitrary_waveform_save_cache(self, filename):
+        with open(filename, 'w') as f:
+            json.dump(self._arbitrary_waveform_cache, f, indent=1, sort_keys=True)
+    
+    def _arbitrary_waveform_load_cache(self, filename):
+        with open(filename, 'r') as f:
+            self._arbitrary_waveform_cache.update(json.load(f))
+    
     
 class ArbFrequency(ivi.IviContainer):
     "Extension IVI methods for function generators that can produce arbitrary waveforms with variable rate"
@@ -817,7 +881,9 @@ class ArbSeq(ivi.IviContainer):
         return self._arbitrary_sequence_length_min
     
     def _arbitrary_clear_memory(self):
-        pass
+        # the waveform cache belongs to ArbWfm
+        if hasattr(self, '_arbitrary_waveform_cache_evict'):
+            self._arbitrary_waveform_cache_evict()
     
     def _arbitrary_sequence_clear(self, handle):
         pass
@@ -81,12 +81,6 @@ class ics8099(scpi.common.IdnCommand, scpi.common.Reset,
     def _utility_disable(self):
         pass
 
-    def _utility_lock_object(self):
-        pass
-
-    def _utility_unlock_object(self):
-        pass
-    
     
     def _read_register(self, register):
         #read 16 bit registers
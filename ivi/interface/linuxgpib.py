@@ -27,6 +27,10 @@ THE SOFTWARE.
 import Gpib
 import re
 
+# timeout settings T10us through T1000s, index 0 (TNONE) disables the timeout
+Timeouts = [None, 10e-6, 30e-6, 100e-6, 300e-6, 1e-3, 3e-3, 10e-3, 30e-3, 100e-3,
+        300e-3, 1, 3, 10, 30, 100, 300, 1000]
+
 def parse_visa_resource_string(resource_string):
     # valid resource strings:
     # GPIB::10::INSTR
@@ -64,6 +68,26 @@ class LinuxGpibInstrument:
             pad = addr
 
         self.gpib = Gpib.Gpib(name, pad, sad, timeout, send_eoi, eos_mode)
+        self._timeout = timeout
+
+    @property
+    def timeout(self):
+        "I/O timeout in seconds"
+        return Timeouts[self._timeout]
+
+    @timeout.setter
+    def timeout(self, value):
+        # round up to the next available setting
+        if value is None:
+            t = 0
+        else:
+            t = len(Timeouts) - 1
+            for i in range(1, len(Timeouts)):
+                if Timeouts[i] >= value:
+                    t = i
+                    break
+        self.gpib.timeout(t)
+        self._timeout = t
 
     def write_raw(self, data):
         "Write binary data to instrument"
@@ -155,6 +155,14 @@ class SerialInstrument:
             while not self.serial.getDSR():
                 time.sleep(0.01)
     
+    def write_raw_chunks(self, chunks):
+        "Write binary data from an iterable of chunks as a single message"
+        for chunk in chunks:
+            self.serial.write(chunk)
+        
+        # termination character, delay and flow control
+        self.write_raw(b'')
+    
     def read_raw(self, num=-1):
         "Read binary data from instrument"
         
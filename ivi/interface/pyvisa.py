@@ -78,10 +78,43 @@ class PyVisaInstrument:
             self.instrument.close()
         self.instrument = None
 
+    @property
+    def timeout(self):
+        "I/O timeout in seconds"
+        t = self.instrument.timeout
+        if t is None:
+            return None
+        return t / 1000.0
+
+    @timeout.setter
+    def timeout(self, value):
+        self.instrument.timeout = None if value is None else value * 1000
+
     def write_raw(self, data):
         "Write binary data to instrument"
         self.instrument.write_raw(data)
 
+    def write_raw_chunks(self, chunks):
+        "Write binary data from an iterable of chunks as a single message"
+        if not hasattr(self.instrument, 'send_end'):
+            # old style PyVISA
+            self.instrument.write_raw(b''.join(chunks))
+            return
+        send_end = self.instrument.send_end
+        try:
+            # only terminate the message after the last chunk
+            self.instrument.send_end = False
+            last = None
+            for chunk in chunks:
+                if last is not None:
+                    self.instrument.write_raw(last)
+                last = chunk
+            self.instrument.send_end = send_end
+            if last is not None:
+                self.instrument.write_raw(last)
+        finally:
+            self.instrument.send_end = send_end
+
     def read_raw(self, num=-1):
         "Read binary data from instrument"
         # PyVISA only supports reading entire buffer
@@ -26,8 +26,14 @@ THE SOFTWARE.
 
 # import libraries
 import inspect
+import itertools
 import numpy as np
 import re
+import struct
+import tempfile
+import threading
+import time
+import warnings
 from functools import partial
 
 # try importing drivers
@@ -137,6 +143,86 @@ def get_index_dict(l):
     return d
 
 
+def scpi_short_form(value):
+    """Return the SCPI short form of a lower case long form, e.g. 'positive:channel1' -> 'pos:chan1'"""
+    def short(m):
+        word = m.group(0)
+        if len(word) <= 4:
+            return word
+        if word[3] in 'aeiou':
+            return word[:3]
+        return word[:4]
+    return re.sub('[a-z]+', short, value)
+
+
+class ValueMapping(dict):
+    """Mapping from IVI values to instrument values with reverse lookup
+
+    reverse() maps an instrument response back to the IVI value through a
+    precomputed index.  String responses are normalized by case, surrounding
+    whitespace and quotes, and are also matched against the SCPI short form of
+    the mapped values.  Where several IVI values map to the same instrument
+    value, the first one wins, as with a linear search."""
+
+    def __init__(self, *args, **kwargs):
+        super(ValueMapping, self).__init__(*args, **kwargs)
+        self._reverse = None
+
+    def _normalize(self, value):
+        if isinstance(value, str):
+            return value.strip().strip('"\'').lower()
+        return value
+
+    def _build_reverse(self):
+        d = {}
+        for k, v in self.items():
+            d.setdefault(self._normalize(v), k)
+        for k, v in self.items():
+            if isinstance(v, str):
+                d.setdefault(scpi_short_form(self._normalize(v)), k)
+        self._reverse = d
+
+    def reverse(self, value):
+        "Return the IVI value for an instrument value"
+        if self._reverse is None:
+            self._build_reverse()
+        try:
+            return self._reverse[self._normalize(value)]
+        except (KeyError, TypeError):
+            raise UnexpectedResponseException()
+
+    def copy(self):
+        return ValueMapping(self)
+
+    def __setitem__(self, key, value):
+        super(ValueMapping, self).__setitem__(key, value)
+        self._reverse = None
+
+    def __delitem__(self, key):
+        super(ValueMapping, self).__delitem__(key)
+        self._reverse = None
+
+    def update(self, *args, **kwargs):
+        super(ValueMapping, self).update(*args, **kwargs)
+        self._reverse = None
+
+    def setdefault(self, key, default=None):
+        self._reverse = None
+        return super(ValueMapping, self).setdefault(key, default)
+
+    def pop(self, *args):
+        self._reverse = None
+        return super(ValueMapping, self).pop(*args)
+
+    def popitem(self):
+        self._reverse = None
+        return super(ValueMapping, self).popitem()
+
+    def clear(self):
+        super(ValueMapping, self).clear()
+        self._reverse = None
+
+
 class PropertyCollection(object):
     "A building block to create hierarchical trees of methods and properties"
     def __init__(self):
@@ -484,10 +570,11 @@ class TraceYT(TraceY):
         self.x_increment = 1
         self.x_origin = 0
         self.x_reference = 0
+        self.trigger_time = None
 
     @property
     def x(self):
-        return ((np.arange(len(self.y_raw)) - self.x_reference) * self.x_increment) + self.x_origin
+        return ((np.arange(np.shape(self.y_raw)[-1]) - self.x_reference) * self.x_increment) + self.x_origin
 
     @property
     def t(self):
@@ -502,6 +589,294 @@ class TraceYT(TraceY):
     def __iter__(self):
         return ((((i - self.x_reference) * self.x_increment) + self.x_origin, float('nan') if y == self.y_hole else ((y - self.y_reference) * self.y_increment) + self.y_origin) for i, y in enumerate(self.y_raw))
 
+    def _copy_scaling(self, trace):
+        trace.average_count = self.average_count
+        trace.x_increment = self.x_increment
+        trace.x_origin = self.x_origin
+        trace.x_reference = self.x_reference
+        trace.y_increment = self.y_increment
+        trace.y_origin = self.y_origin
+        trace.y_reference = self.y_reference
+        trace.y_hole = self.y_hole
+        trace.trigger_time = self.trigger_time
+        return trace
+
+    def chunk(self, offset, y_raw):
+        "Return a TraceYT with the same scaling for samples starting at offset"
+        trace = self._copy_scaling(TraceYT())
+        trace.x_reference = self.x_reference - offset
+        trace.y_raw = y_raw
+        return trace
+
+    def min_max(self, y_min, y_max):
+        "Return a TraceYTMinMax with the same scaling from minimum and maximum records"
+        trace = self._copy_scaling(TraceYTMinMax())
+        trace.y_raw = np.stack((y_min, y_max))
+        return trace
+
+    def min_max_pairs(self, data, points = None):
+        """Return a TraceYTMinMax with the same scaling from interleaved min/max pairs
+
+        When points is the number of values in data rather than the number of
+        pairs, the time scale is stretched so that each pair is placed at the
+        time of its first value.
+        """
+        data = np.asarray(data)
+        n = np.shape(data)[-1] // 2
+        trace = self.min_max(data[..., 0:2*n:2], data[..., 1:2*n:2])
+        if points is not None and points != n:
+            trace.x_increment = self.x_increment * 2
+            trace.x_reference = self.x_reference / 2
+        return trace
+
+    def _min_max_raw(self):
+        y = np.asarray(self.y_raw)
+        return y, y
+
+    def decimate_min_max(self, bins):
+        """Return a TraceYTMinMax reducing the trace to bins min/max pairs
+
+        Samples are split into bins of (nearly) equal size along the last axis,
+        so segmented traces are decimated segment by segment.  Holes are
+        ignored unless a whole bin consists of holes.
+        """
+        lo, hi = self._min_max_raw()
+        n = np.shape(lo)[-1]
+        if n == 0:
+            return self.min_max(lo, hi)
+        bins = max(min(int(bins), n), 1)
+        edges = (np.arange(bins) * n) // bins
+        if self.y_hole is not None:
+            lo = np.where(lo == self.y_hole, np.inf, lo)
+            hi = np.where(hi == self.y_hole, -np.inf, hi)
+        y_min = np.minimum.reduceat(lo, edges, axis=-1)
+        y_max = np.maximum.reduceat(hi, edges, axis=-1)
+        if self.y_hole is not None:
+            y_min[np.isinf(y_min)] = self.y_hole
+            y_max[np.isinf(y_max)] = self.y_hole
+        if self.y_increment < 0:
+            y_min, y_max = y_max, y_min
+        trace = self.min_max(y_min, y_max)
+        trace.x_increment = self.x_increment * n / bins
+        trace.x_reference = self.x_reference * bins / n
+        return trace
+
+
+class TraceYTSegmented(TraceYT):
+    "Segmented Y-T trace object"
+    def __init__(self):
+        super(TraceYTSegmented, self).__init__()
+        self.time_tag = None
+
+    def segment(self, index):
+        "Return a single segment as a TraceYT object"
+        return self.chunk(0, self.y_raw[index])
+
+    def __getitem__(self, index):
+        return self.segment(index)
+
+    def __iter__(self):
+        return (self.segment(i) for i in range(len(self.y_raw)))
+
+
+class TraceYTMinMax(TraceYT):
+    """Min/max envelope Y-T trace object
+
+    y_raw holds the minimum and maximum records stacked along the first axis.
+    """
+    @property
+    def y_min_raw(self):
+        return self.y_raw[0]
+
+    @property
+    def y_max_raw(self):
+        return self.y_raw[1]
+
+    @property
+    def y_min(self):
+        return self.y[0]
+
+    @property
+    def y_max(self):
+        return self.y[1]
+
+    def _min_max_raw(self):
+        y = np.asarray(self.y_raw)
+        return y[0], y[1]
+
+    def __getitem__(self, index):
+        x = ((index - self.x_reference) * self.x_increment) + self.x_origin
+        return (x,) + tuple(float('nan') if y == self.y_hole else ((y - self.y_reference) * self.y_increment) + self.y_origin for y in (self.y_raw[0][index], self.y_raw[1][index]))
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def __len__(self):
+        return np.shape(self.y_raw)[-1]
+
+    def count(self):
+        return len(self)
+
+
+class Sampler(object):
+    """Periodically sample driver values on a background thread
+
+    Each source is a callable, such as
+    ``lambda: psu.outputs[0].measure('voltage')``. Samples are stored with a
+    time stamp in a preallocated ring buffer, and the driver session lock is
+    held while the sources of one sample are read, so code that holds
+    utility.lock_object is never interleaved with the sampler.
+    """
+    def __init__(self, driver, interval = 0.1, length = 10000):
+        self.driver = driver
+        self.interval = interval
+        self.length = length
+        self.error = None
+        self._names = list()
+        self._sources = list()
+        self._thresholds = list()
+        self._buffer = None
+        self._index = 0
+        self._count = 0
+        self._thread = None
+        self._stop = threading.Event()
+        self._sample_lock = threading.Lock()
+        self._paused = False
+
+    def add_source(self, name, func):
+        "Add a value to sample; func is called with no arguments"
+        if self._thread is not None:
+            raise OperationNotSupportedException()
+        self._names.append(name)
+        self._sources.append(func)
+
+    def add_threshold(self, name, level, callback, direction = 'either'):
+        """Call callback(name, time, value) when a source crosses level
+
+        direction is 'rising', 'falling' or 'either'
+        """
+        if direction not in ('rising', 'falling', 'either'):
+            raise ValueNotSupportedException()
+        self._thresholds.append((self._names.index(name), level, callback, direction))
+
+    @property
+    def names(self):
+        return list(self._names)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def paused(self):
+        return self._paused
+
+    def start(self):
+        "Start sampling"
+        if self.running:
+            return
+        self._buffer = np.full((self.length, len(self._sources)+1), float('nan'))
+        self._index = 0
+        self._count = 0
+        self._stop.clear()
+        self._paused = False
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        "Stop sampling and wait for the sampling thread to exit"
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._thread = None
+
+    def pause(self):
+        "Pause sampling; returns once any sample in progress is complete"
+        with self._sample_lock:
+            self._paused = True
+
+    def resume(self):
+        "Resume sampling"
+        self._paused = False
+
+    def get_samples(self):
+        """Return (t, values) of the buffered samples in chronological order
+
+        t holds the time stamps from time.time() and values holds one column
+        per source.
+        """
+        with self._sample_lock:
+            if self._buffer is None:
+                return np.zeros(0), np.zeros((0, len(self._sources)))
+            if self._count < self.length:
+                data = self._buffer[0:self._count].copy()
+            else:
+                data = np.roll(self._buffer, -self._index, axis=0)
+        return data[:, 0], data[:, 1:]
+
+    def _run(self):
+        next_time = time.time()
+        while not self._stop.is_set():
+            if not self._paused:
+                self._sample()
+            next_time += self.interval
+            delay = next_time - time.time()
+            if delay < 0:
+                # fell behind; skip missed samples
+                next_time = time.time()
+                delay = 0
+            self._stop.wait(delay)
+
+    def _lock_session(self):
+        "Acquire the driver session lock, or return False once paused or stopped"
+        # the session lock is taken before the sample lock and without
+        # blocking, so that a caller holding utility.lock_object can still
+        # pause or stop the sampler
+        while not self.driver._session_lock.acquire(False):
+            if self._paused or self._stop.is_set():
+                return False
+            self._stop.wait(0.001)
+        return True
+
+    def _sample(self):
+        crossings = list()
+        if not self._lock_session():
+            return
+        try:
+            with self._sample_lock:
+                if self._paused:
+                    return
+                row = np.empty(len(self._sources)+1)
+                row[0] = time.time()
+                for k, func in enumerate(self._sources):
+                    try:
+                        row[k+1] = func()
+                    except Exception as e:
+                        self.error = e
+                        row[k+1] = float('nan')
+                self._store(row, crossings)
+        finally:
+            self.driver._session_lock.release()
+
+        # run callbacks without holding any locks
+        for callback, name, t, value in crossings:
+            callback(name, t, value)
+
+    def _store(self, row, crossings):
+        "Store a sample in the ring buffer and collect threshold crossings"
+        if self._count > 0:
+            last = self._buffer[(self._index - 1) % self.length]
+            for k, level, callback, direction in self._thresholds:
+                rising = last[k+1] < level <= row[k+1]
+                falling = last[k+1] > level >= row[k+1]
+                if (rising and direction != 'falling') or (falling and direction != 'rising'):
+                    crossings.append((callback, self._names[k], row[0], row[k+1]))
+
+        self._buffer[self._index] = row
+        self._index = (self._index + 1) % self.length
+        self._count += 1
+
 
 def add_attribute(obj, name, attr, doc = None):
     IviContainer._add_attribute(obj, name, attr, doc)
@@ -528,7 +903,85 @@ def build_ieee_block(data):
     # ex: #800002000 prefixes 2000 data bytes
     return str('#8%08d' % len(data)).encode('utf-8') + data
 
-    
+
+def ieee_block_header(length):
+    "Build IEEE block header for length data bytes"
+    n = '%08d' % length
+    return str('#%d%s' % (len(n), n)).encode('utf-8')
+
+
+class BlockBuffer(object):
+    """Binary block data assembled in bounded memory
+
+    Data is kept in memory up to max_size bytes and then spilled to a
+    temporary file.  chunks() iterates over the contents, so the block can be
+    written to the instrument without building the whole byte string.
+    """
+    def __init__(self, max_size = 1 << 20, chunk_size = 1 << 16):
+        self.chunk_size = chunk_size
+        self._file = tempfile.SpooledTemporaryFile(max_size)
+        self._length = 0
+
+    def __len__(self):
+        return self._length
+
+    def write(self, data):
+        self._file.seek(0, 2)
+        self._file.write(data)
+        self._length += len(data)
+
+    def chunks(self):
+        self._file.seek(0)
+        return iter(lambda: self._file.read(self.chunk_size), b'')
+
+    def close(self):
+        self._file.close()
+
+
+class Catalog(object):
+    """Listing of files stored in instrument memory
+
+    Entries are lists of fields with the file name first and are indexed by
+    name.  Drivers update the listing locally as they create and delete files
+    and only read it back from the instrument when their cache has been
+    invalidated or when the listing is older than ttl seconds (None to keep
+    it until invalidated).
+    """
+    def __init__(self, ttl = None):
+        self.ttl = ttl
+        self.time = 0
+        self._entries = dict()
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def __iter__(self):
+        return iter(list(self._entries.values()))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def names(self):
+        return list(self._entries.keys())
+
+    def get(self, name):
+        "Return the entry for name, or None if there is no such file"
+        return self._entries.get(name)
+
+    def expired(self):
+        return self.ttl is not None and time.time() - self.time > self.ttl
+
+    def update(self, entries):
+        self._entries = dict((e[0], e) for e in entries)
+        self.time = time.time()
+
+    def add(self, name, *fields):
+        self._entries[name] = [name] + list(fields)
+
+    def remove(self, name):
+        self._entries.pop(name, None)
+
+
 def decode_ieee_block(data):
     "Decode IEEE block"
     # IEEE block binary data is prefixed with #lnnnnnnnn
@@ -556,6 +1009,62 @@ def decode_ieee_block(data):
         return data[ind:]
 
 
+def decode_bmp(data):
+    "Decode an uncompressed BMP image into a (height, width, 3) uint8 RGB array"
+    if len(data) < 54 or data[0:2] != b'BM':
+        raise FileFormatException()
+
+    offset, = struct.unpack_from('<L', data, 10)
+    header_size, width, height, planes, bpp, compression, image_size, xres, yres, colors = \
+        struct.unpack_from('<LllHHLLllL', data, 14)
+
+    if header_size < 40 or bpp not in (1, 4, 8, 24, 32) or compression not in (0, 3):
+        raise FileFormatException()
+    if compression == 3 and bpp != 32:
+        raise FileFormatException()
+
+    top_down = height < 0
+    height = abs(height)
+    row_size = ((bpp * width + 31) // 32) * 4
+
+    if len(data) < offset + row_size * height:
+        raise FileFormatException()
+
+    rows = np.frombuffer(data, np.uint8, row_size * height, offset).reshape(height, row_size)
+
+    if not top_down:
+        rows = rows[::-1]
+
+    if compression == 3:
+        # BI_BITFIELDS, channel masks follow the 40 byte header
+        masks = struct.unpack_from('<LLL', data, 54)
+        pix = np.ascontiguousarray(rows).view('<u4')[:, 0:width]
+        img = np.zeros((height, width, 3), np.uint8)
+        for k, mask in enumerate(masks):
+            if mask == 0:
+                continue
+            shift = (mask & -mask).bit_length() - 1
+            scale = (mask >> shift) + 1
+            img[:, :, k] = ((pix & mask) >> shift).astype(np.uint32) * 256 // scale
+    elif bpp >= 24:
+        # BGR or BGRX pixels
+        img = rows[:, 0:width*bpp//8].reshape(height, width, bpp//8)[:, :, 2::-1]
+    else:
+        # palette indices
+        if colors == 0:
+            colors = 1 << bpp
+        palette = np.frombuffer(data, np.uint8, colors*4, 14+header_size).reshape(colors, 4)[:, 2::-1]
+        if bpp == 1:
+            index = np.unpackbits(rows, axis=1)
+        elif bpp == 4:
+            index = np.stack((rows >> 4, rows & 15), axis=2).reshape(height, -1)
+        else:
+            index = rows
+        img = palette[index[:, 0:width]]
+
+    return np.ascontiguousarray(img)
+
+
 def get_sig(sig):
     "Parse various signal inputs into x and y components"
     if type(sig) == tuple and len(sig) == 2:
@@ -585,11 +1094,68 @@ def get_sig(sig):
     return x, y
 
 
+def iter_sample_chunks(data, chunk_size = 65536):
+    """Iterate over signal samples as float arrays of at most chunk_size values
+
+    data can be a list or array, including memory mapped arrays which are
+    only read one chunk at a time, or any iterable of samples or of sample
+    arrays.
+    """
+    if isinstance(data, list) and (len(data) == 0 or np.ndim(data[0]) == 0):
+        data = np.array(data, dtype=float)
+    if isinstance(data, np.ndarray):
+        data = data.reshape(-1)
+        for k in range(0, len(data), chunk_size):
+            yield np.asarray(data[k:k+chunk_size], dtype=float)
+        return
+    buf = list()
+    for item in data:
+        if np.ndim(item) == 0:
+            buf.append(item)
+            if len(buf) >= chunk_size:
+                yield np.array(buf, dtype=float)
+                buf = list()
+        else:
+            if len(buf) > 0:
+                yield np.array(buf, dtype=float)
+                buf = list()
+            for chunk in iter_sample_chunks(np.asarray(item), chunk_size):
+                yield chunk
+    if len(buf) > 0:
+        yield np.array(buf, dtype=float)
+
+
 def rms(y):
     "Calculate the RMS value of the signal"
     return np.linalg.norm(y) / np.sqrt(y.size)
 
 
+def unpack_bits(data, count):
+    "Unpack the low count bits of each sample into a (count, samples) boolean array"
+    data = np.asarray(data)
+    return ((data[np.newaxis, :] >> np.arange(count, dtype=data.dtype)[:, np.newaxis]) & 1).astype(bool)
+
+
+def parse_values(s, delim=',', converter=float):
+    "Parse a delimited string of values, as a numpy array for float and int"
+    if converter not in (float, int):
+        return [converter(v) for v in s.split(delim)]
+    if not s.strip():
+        return np.zeros(0, dtype=converter)
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', DeprecationWarning)
+            values = np.fromstring(s, dtype=converter, sep=delim)
+    except ValueError:
+        values = None
+    if values is None or len(values) != s.count(delim) + 1:
+        # depending on the numpy version, fromstring either stops at the first
+        # value it cannot parse or raises, so fall back to element-wise
+        # conversion to get a proper error or result
+        values = np.array([converter(v) for v in s.split(delim)], dtype=converter)
+    return values
+
+
 def trim_doc(docstring):
     if not docstring:
         return ''
@@ -1461,6 +2027,8 @@ class DriverUtility(IviContainer):
     def __init__(self, *args, **kwargs):
         super(DriverUtility, self).__init__(*args, **kwargs)
         
+        self._session_lock = threading.RLock()
+        
         self._add_method('utility.disable',
                         self._utility_disable,
                         """
@@ -1591,7 +2159,7 @@ class DriverUtility(IviContainer):
         return (error_code, error_message)
     
     def _utility_lock_object(self):
-        pass
+        self._session_lock.acquire()
     
     def _utility_reset(self):
         pass
@@ -1605,7 +2173,11 @@ class DriverUtility(IviContainer):
         return (code, message)
     
     def _utility_unlock_object(self):
-        pass
+        try:
+            self._session_lock.release()
+        except RuntimeError:
+            # not locked by this thread
+            pass
 
 
 class Driver(DriverOperation, DriverIdentity, DriverUtility):
@@ -1623,6 +2195,7 @@ class Driver(DriverOperation, DriverIdentity, DriverUtility):
         self._initialized = False
         self.__dict__.setdefault('_instrument_id', '')
         self._cache_valid = dict()
+        self._setting_cache = dict()
         
         super(Driver, self).__init__(*args, **kwargs)
         
@@ -2015,6 +2588,18 @@ class Driver(DriverOperation, DriverIdentity, DriverUtility):
     def _driver_operation_invalidate_all_attributes(self):
         self._cache_valid = dict()
 
+    def _write_setting(self, data, encoding = 'utf-8'):
+        "Write setting command, skipping it if the instrument already has this setting"
+        # settings are keyed on the command header, so a command is only
+        # resent when its arguments differ from those last written or when
+        # the cache has been invalidated (reset, setup recall, etc.)
+        tag = 'setting' + data.split(' ', 1)[0].lower()
+        if self._get_cache_valid(tag) and self._setting_cache.get(tag) == data:
+            return
+        self._write(data, encoding)
+        self._setting_cache[tag] = data
+        self._set_cache_valid(True, tag)
+
     def _write_raw(self, data):
         "Write binary data to instrument"
         if self._driver_operation_simulate:
@@ -2024,6 +2609,25 @@ class Driver(DriverOperation, DriverIdentity, DriverUtility):
             raise NotInitializedException()
         self._interface.write_raw(data)
     
+    def _write_raw_chunks(self, chunks):
+        """Write binary data to instrument from an iterable of chunks as one message
+        
+        The chunks are only streamed when the interface implements
+        write_raw_chunks (PyVISA and pySerial).  Other interfaces, such as
+        python-vxi11 and python-usbtmc, can only send complete messages, so the
+        chunks are joined first and the whole message is held in memory.
+        """
+        if self._driver_operation_simulate:
+            print("[simulating] Call to write_raw")
+            return
+        if not self._initialized or self._interface is None:
+            raise NotInitializedException()
+        if hasattr(self._interface, 'write_raw_chunks'):
+            self._interface.write_raw_chunks(chunks)
+        else:
+            # interface can only send complete messages
+            self._interface.write_raw(b''.join(chunks))
+    
     def _read_raw(self, num=-1):
         "Read binary data from instrument"
         if self._driver_operation_simulate:
@@ -2040,12 +2644,13 @@ class Driver(DriverOperation, DriverIdentity, DriverUtility):
             return b''
         if not self._initialized or self._interface is None:
             raise NotInitializedException()
-        try:
-            return self._interface.ask_raw(data, num)
-        except AttributeError:
-            # if interface does not implement ask_raw, emulate it
-            self._write_raw(data)
-            return self._read_raw(num)
+        with self._session_lock:
+            try:
+                return self._interface.ask_raw(data, num)
+            except AttributeError:
+                # if interface does not implement ask_raw, emulate it
+                self._write_raw(data)
+                return self._read_raw(num)
     
     def _write(self, data, encoding = 'utf-8'):
         "Write string to instrument"
@@ -2084,21 +2689,24 @@ class Driver(DriverOperation, DriverIdentity, DriverUtility):
             return ''
         if not self._initialized or self._interface is None:
             raise NotInitializedException()
-        try:
-            return self._interface.ask(data, num, encoding)
-        except AttributeError:
-            # if interface does not implement ask, emulate it
-            if type(data) is tuple or type(data) is list:
-            #    # recursive call for a list of commands
-                val = list()
-                for data_i in data:
-                    val.append(self._ask(data_i, num, encoding))
-                return val
-
-            self._write(data, encoding)
-            return self._read(num, encoding)
-    
-    def _ask_for_values(self, msg, delim=',', converter=float, array=True):
+        # hold the session lock so that a query from another thread cannot
+        # be interleaved between the write and the read
+        with self._session_lock:
+            try:
+                return self._interface.ask(data, num, encoding)
+            except AttributeError:
+                # if interface does not implement ask, emulate it
+                if type(data) is tuple or type(data) is list:
+                #    # recursive call for a list of commands
+                    val = list()
+                    for data_i in data:
+                        val.append(self._ask(data_i, num, encoding))
+                    return val
+
+                self._write(data, encoding)
+                return self._read(num, encoding)
+    
+    def _ask_for_values(self, msg, delim=',', converter=float, array=True, binary_dtype=None, out=None):
         '''
         write then read a list or array of data
         
@@ -2112,14 +2720,51 @@ class Driver(DriverOperation, DriverIdentity, DriverUtility):
             a datatype used to typecase the elements in the returned list
         array: bool
             convert the output to a numpy array 
+        binary_dtype : numpy dtype
+            if the response is an IEEE block, interpret its contents as binary
+            data of this type instead of delimited text
+        out : numpy array
+            preallocated array to store the values in; a view of the filled
+            part of out is returned
         
         '''
-        s = self._ask(msg)
-        s_split = s.split(delim)
-        out = map(converter, s_split)
+        if binary_dtype is None:
+            s = self._ask(msg)
+        else:
+            with self._session_lock:
+                self._write(msg)
+                ch = self._read_raw(1)
+                if ch == b'#':
+                    l = int(self._read_raw(1))
+                    if l > 0:
+                        raw_data = self._read_raw(int(self._read_raw(l)))
+                        self._read_raw() # flush buffer
+                    else:
+                        raw_data = self._read_raw()
+                    return self._store_values(np.frombuffer(raw_data, binary_dtype), array, out)
+                s = (ch + self._read_raw()).decode('utf-8').rstrip('\r\n')
+        
+        if s.startswith('#'):
+            # definite length block with text contents
+            l = int(s[1])
+            if l > 0:
+                s = s[2+l:2+l+int(s[2:2+l])]
+            else:
+                s = s[2:]
+        
+        return self._store_values(parse_values(s, delim, converter), array, out)
+    
+    def _store_values(self, values, array, out):
+        if out is not None:
+            if len(values) > len(out):
+                raise OutOfRangeException()
+            out[:len(values)] = values
+            return out[:len(values)]
         if array:
-            out = np.array(out)
-        return out
+            return np.asarray(values)
+        if isinstance(values, np.ndarray):
+            return values.tolist()
+        return values
     
     def _read_stb(self):
         "Read status byte"
@@ -2171,6 +2816,57 @@ class Driver(DriverOperation, DriverIdentity, DriverUtility):
             raise NotInitializedException()
         return self._interface.local()
     
+    def _with_io_timeout(self, timeout, func, *args, **kwargs):
+        """Call func with the interface I/O timeout extended to at least timeout seconds
+        
+        Interfaces without an adjustable timeout fall back to waiting the full
+        timeout before calling func.
+        """
+        if timeout is None:
+            return func(*args, **kwargs)
+        if not hasattr(self._interface, 'timeout'):
+            time.sleep(timeout)
+            return func(*args, **kwargs)
+        old = self._interface.timeout
+        if old is None or old >= timeout:
+            return func(*args, **kwargs)
+        self._interface.timeout = timeout
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self._interface.timeout = old
+    
+    def _read_with_timeout(self, timeout, num=-1, encoding = 'utf-8'):
+        "Read string, waiting up to timeout seconds for the instrument to respond"
+        return self._with_io_timeout(timeout, self._read, num, encoding)
+    
+    def _wait_for(self, condition, timeout=None, interval=0.001, max_interval=0.1):
+        "Poll condition with exponential backoff until it returns True or timeout seconds elapse"
+        if self._driver_operation_simulate:
+            return True
+        deadline = None
+        if timeout is not None:
+            deadline = time.time() + timeout
+        while not condition():
+            if deadline is not None:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                interval = min(interval, remaining)
+            time.sleep(interval)
+            interval = min(interval * 2, max_interval)
+        return True
+
+    def _wait_for_stb(self, mask, timeout=None):
+        "Wait until any of the bits in mask are set in the status byte"
+        return self._wait_for(lambda: self._read_stb() & mask, timeout)
+
+    def _wait_for_operation_complete(self, timeout=None):
+        "Block on *OPC? until all pending operations complete"
+        if self._driver_operation_simulate:
+            return
+        self._with_io_timeout(timeout, self._ask, "*OPC?")
+    
     def _read_ieee_block(self):
         "Read IEEE block"
         # IEEE block binary data is prefixed with #lnnnnnnnn
@@ -2195,10 +2891,46 @@ class Driver(DriverOperation, DriverIdentity, DriverUtility):
 
         return raw_data
     
+    def _read_ieee_block_chunks(self, chunk_size):
+        "Read IEEE block as a sequence of chunks of at most chunk_size bytes"
+        ch = self._read_raw(1)
+
+        if len(ch) == 0:
+            return
+
+        while ch != b'#':
+            ch = self._read_raw(1)
+
+        l = int(self._read_raw(1))
+        if l == 0:
+            yield self._read_raw()
+            return
+
+        remaining = int(self._read_raw(l))
+
+        try:
+            while remaining > 0:
+                data = bytearray()
+                while len(data) < min(chunk_size, remaining):
+                    d = self._read_raw(min(chunk_size, remaining) - len(data))
+                    if len(d) == 0:
+                        raise UnexpectedResponseException()
+                    data.extend(d)
+                remaining -= len(data)
+                yield bytes(data)
+        finally:
+            # discard the rest of the block if the caller stopped early
+            while remaining > 0:
+                d = self._read_raw(min(chunk_size, remaining))
+                if len(d) == 0:
+                    break
+                remaining -= len(d)
+
     def _ask_for_ieee_block(self, data, encoding = 'utf-8'):
         "Write string then read IEEE block"
-        self._write(data, encoding)
-        return self._read_ieee_block()
+        with self._session_lock:
+            self._write(data, encoding)
+            return self._read_ieee_block()
 
     def _write_ieee_block(self, data, prefix = None, encoding = 'utf-8'):
         "Write IEEE block"
@@ -2218,6 +2950,19 @@ class Driver(DriverOperation, DriverIdentity, DriverUtility):
         
         self._write_raw(block)
     
+    def _write_ieee_block_chunks(self, chunks, length, prefix = None, encoding = 'utf-8'):
+        "Write IEEE block of length bytes from an iterable of chunks"
+        block = b''
+        
+        if type(prefix) == str:
+            block = prefix.encode(encoding)
+        elif type(prefix) == bytes:
+            block = prefix
+        
+        block = block + ieee_block_header(length)
+        
+        self._write_raw_chunks(itertools.chain([block], chunks))
+    
     def doc(self, obj=None, itm=None, docs=None, prefix=None):
         """Python IVI documentation generator"""
         
@@ -24,19 +24,21 @@ THE SOFTWARE.
 
 """
 
-import time
+import datetime
 import struct
 
+import numpy as np
+
 from .. import ivi
 from .. import scope
 from .. import scpi
 from .. import extra
 
-AcquisitionTypeMapping = {
+AcquisitionTypeMapping = ivi.ValueMapping({
     'normal': 'norm',
     'peak_detect': 'peak',
     'high_resolution': 'hres',
-    'average': 'aver'}
+    'average': 'aver'})
 VerticalCoupling = set(['ac', 'dc', 'gnd'])
 InputImpedance = set([1000000, 50, 'gnd'])
 # Bandwidth Limits, OFF = none, ON = 20 MHz, 200MHZ = 200 MHz
@@ -58,7 +60,7 @@ TriggerCouplingMapping = {
     'hf_noise_reject': ('dc', 1, 1),
     'hf_noise_reject_ac': ('ac', 1, 1),
     'lf_noise_reject': ('lfr', 1, 0)}
-TVTriggerEventMapping = {'field1': 'fie1',
+TVTriggerEventMapping = ivi.ValueMapping({'field1': 'fie1',
                          'field2': 'fie2',
                          'any_field': 'afi',
                          'any_line': 'alin',
@@ -68,8 +70,8 @@ TVTriggerEventMapping = {'field1': 'fie1',
                          'line_field2': 'lfi2',
                          'line': 'line',
                          'line_alternate': 'lalt',
-                         'lvertical': 'lver'}
-TVTriggerFormatMapping = {'generic': 'gen',
+                         'lvertical': 'lver'})
+TVTriggerFormatMapping = ivi.ValueMapping({'generic': 'gen',
                           'ntsc': 'ntsc',
                           'pal': 'pal',
                           'palm': 'palm',
@@ -85,19 +87,19 @@ TVTriggerFormatMapping = {'generic': 'gen',
                           'p1080l60hz': 'p1080l60hz',
                           'i1080l50hz': 'i1080l50hz',
                           'i1080': 'i1080l50hz',
-                          'i1080l60hz': 'i1080l60hz'}
-PolarityMapping = {'positive': 'pos',
-                   'negative': 'neg'}
-GlitchConditionMapping = {'less_than': 'less',
-                          'greater_than': 'gre'}
-WidthConditionMapping = {'within': 'rang'}
-SampleModeMapping = {'real_time': 'rtim',
-                     'equivalent_time': 'etim'}
-SlopeMapping = {
+                          'i1080l60hz': 'i1080l60hz'})
+PolarityMapping = ivi.ValueMapping({'positive': 'pos',
+                   'negative': 'neg'})
+GlitchConditionMapping = ivi.ValueMapping({'less_than': 'less',
+                          'greater_than': 'gre'})
+WidthConditionMapping = ivi.ValueMapping({'within': 'rang'})
+SampleModeMapping = ivi.ValueMapping({'real_time': 'rtim',
+                     'equivalent_time': 'etim'})
+SlopeMapping = ivi.ValueMapping({
     'positive': 'pos',
     'negative': 'neg',
     'either': 'eith',
-    'alternating': 'alt'}
+    'alternating': 'alt'})
 MeasurementFunctionMapping = {
     'rise_time': 'risetime',
     'fall_time': 'falltime',
@@ -138,15 +140,62 @@ ScreenshotImageFormatMapping = {
     'png24': 'png',
     'psd': 'psd',
     'tiff': 'tiff'}
-TimebaseModeMapping = {
+TimebaseModeMapping = ivi.ValueMapping({
     'main': 'main',
     'window': 'wind',
     'xy': 'xy',
-    'roll': 'roll'}
-TimebaseReferenceMapping = {
+    'roll': 'roll'})
+TimebaseReferenceMapping = ivi.ValueMapping({
     'left': 'left',
     'center': 'cent',
-    'right': 'righ'}
+    'right': 'righ'})
+
+# Offsets and struct formats of the fields of the LECROY_2_3 wave descriptor
+WaveDescFields = [
+    ('comm_type', 32, 'h'),
+    ('comm_order', 34, 'h'),
+    ('wave_descriptor', 36, 'l'),
+    ('user_text', 40, 'l'),
+    ('trigtime_array', 48, 'l'),
+    ('ris_time_array', 52, 'l'),
+    ('res_array1', 56, 'l'),
+    ('wave_array_1', 60, 'l'),
+    ('wave_array_2', 64, 'l'),
+    ('wave_array_count', 116, 'l'),
+    ('pnts_per_screen', 120, 'l'),
+    ('first_valid_pnt', 124, 'l'),
+    ('last_valid_pnt', 128, 'l'),
+    ('segment_index', 140, 'l'),
+    ('subarray_count', 144, 'l'),
+    ('sweeps_per_acq', 148, 'l'),
+    ('vertical_gain', 156, 'f'),
+    ('vertical_offset', 160, 'f'),
+    ('horiz_interval', 176, 'f'),
+    ('horiz_offset', 180, 'd'),
+    ('record_type', 316, 'h')]
+WaveDescLength = 346
+
+def decode_wavedesc(data):
+    "Decode binary LeCroy wave descriptor into a dict"
+    if len(data) < WaveDescLength:
+        raise ivi.UnexpectedResponseException()
+
+    # COMM_ORDER is 0 for big endian and 1 for little endian
+    byte_order = '<' if struct.unpack('<h', data[34:36])[0] == 1 else '>'
+
+    desc = dict()
+    desc['byte_order'] = byte_order
+    for name, offset, fmt in WaveDescFields:
+        desc[name] = struct.unpack_from(byte_order + fmt, data, offset)[0]
+
+    # trigger time stamp: seconds, minutes, hours, days, months, year
+    seconds, minutes, hours, days, months, year = struct.unpack_from(byte_order + 'dBBBBh', data, 296)
+    try:
+        desc['trigger_time'] = datetime.datetime(year, months, days, hours, minutes, int(seconds), int((seconds % 1) * 1e6))
+    except ValueError:
+        desc['trigger_time'] = None
+
+    return desc
 
 
 class lecroyBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.common.Reset,
@@ -157,6 +206,7 @@ class lecroyBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.commo
                        scope.ContinuousAcquisition, scope.AverageAcquisition,
                        scope.SampleMode, scope.AutoSetup,
                        extra.common.SystemSetup, extra.common.Screenshot,
+                       extra.scope.SegmentedWaveform,
                        ivi.Driver):
     "LeCroy generic IVI oscilloscope driver"
 
@@ -513,9 +563,6 @@ class lecroyBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.commo
             error_message = error_message.strip(' "')
         return (error_code, error_message)
 
-    def _utility_lock_object(self):
-        pass
-
     # TODO: test utility reset
     def _utility_reset(self):
         if not self._driver_operation_simulate:
@@ -525,22 +572,17 @@ class lecroyBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.commo
     def _utility_reset_with_defaults(self):
         self._utility_reset()
 
-    # TODO: test self test, check if the time.sleep() is sufficient
     def _utility_self_test(self):
         code = 0
         message = "Self test passed"
         if not self._driver_operation_simulate:
             self._write("*TST?")
             # Wait for test to complete - may be adjusted if required
-            time.sleep(40)
-            code = int(self._read())
+            code = int(self._read_with_timeout(40))
             if code != 0:
                 message = "Self test failed"
         return (code, message)
 
-    def _utility_unlock_object(self):
-        pass
-
     def _init_channels(self):
         try:
             super(lecroyBaseScope, self)._init_channels()
@@ -638,14 +680,15 @@ class lecroyBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.commo
             color = "WHITE"
         self._write(
             "HCSU DEV,%s,FORMAT,PORTRAIT,BCKG,%s,DEST,\"REMOTE\",PORT,\"NET\",AREA,GRIDAREAONLY" % (str(format), color))
-        self._write("SCDP")
-        return self._read_raw()
+        with self._session_lock:
+            self._write("SCDP")
+            return self._read_raw()
 
     # TODO: determine how to handle all :timebase: methods for LeCroy
     def _get_timebase_mode(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":timebase:mode?").lower()
-            self._timebase_mode = [k for k, v in TimebaseModeMapping.items() if v == value][0]
+            self._timebase_mode = TimebaseModeMapping.reverse(value)
             self._set_cache_valid
         return self._timebase_mode
 
@@ -660,7 +703,7 @@ class lecroyBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.commo
     def _get_timebase_reference(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":timebase:reference?").lower()
-            self._timebase_reference = [k for k, v in TimebaseReferenceMapping.items() if v == value][0]
+            self._timebase_reference = TimebaseReferenceMapping.reverse(value)
             self._set_cache_valid
         return self._timebase_reference
 
@@ -814,7 +857,7 @@ class lecroyBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.commo
     def _get_acquisition_type(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":acquire:type?").lower()
-            self._acquisition_type = [k for k, v in AcquisitionTypeMapping.items() if v == value][0]
+            self._acquisition_type = AcquisitionTypeMapping.reverse(value)
             self._set_cache_valid()
         return self._acquisition_type
 
@@ -1166,7 +1209,7 @@ class lecroyBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.commo
     def _get_trigger_edge_slope(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":trigger:edge:slope?").lower()
-            self._trigger_edge_slope = [k for k, v in SlopeMapping.items() if v == value][0]
+            self._trigger_edge_slope = SlopeMapping.reverse(value)
             self._set_cache_valid()
         return self._trigger_edge_slope
 
@@ -1249,7 +1292,7 @@ class lecroyBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.commo
     #     if not self._driver_operation_simulate and not self._get_cache_valid():
     #         value = self._ask(":trigger:tv:mode?").lower()
     #         # may need processing
-    #         self._trigger_tv_trigger_event = [k for k, v in TVTriggerEventMapping.items() if v == value][0]
+    #         self._trigger_tv_trigger_event = TVTriggerEventMapping.reverse(value)
     #         self._set_cache_valid()
     #     return self._trigger_tv_trigger_event
     #
@@ -1281,7 +1324,7 @@ class lecroyBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.commo
     # def _get_trigger_tv_polarity(self):
     #     if not self._driver_operation_simulate and not self._get_cache_valid():
     #         value = self._ask(":trigger:tv:polarity?").lower()
-    #         self._trigger_tv_polarity = [k for k, v in PolarityMapping.items() if v == value][0]
+    #         self._trigger_tv_polarity = PolarityMapping.reverse(value)
     #         self._set_cache_valid()
     #     return self._trigger_tv_polarity
     #
@@ -1296,7 +1339,7 @@ class lecroyBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.commo
     # def _get_trigger_tv_signal_format(self):
     #     if not self._driver_operation_simulate and not self._get_cache_valid():
     #         value = self._ask(":trigger:tv:standard?").lower()
-    #         self._trigger_tv_signal_format = [k for k, v in TVTriggerFormatMapping.items() if v == value][0]
+    #         self._trigger_tv_signal_format = TVTriggerFormatMapping.reverse(value)
     #         self._set_cache_valid()
     #     return self._trigger_tv_signal_format
     #
@@ -1312,7 +1355,7 @@ class lecroyBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.commo
     #     if not self._driver_operation_simulate and not self._get_cache_valid():
     #         value = self._ask(":trigger:glitch:qualifier?").lower()
     #         if value in GlitchConditionMapping.values():
-    #             self._trigger_glitch_condition = [k for k, v in GlitchConditionMapping.items() if v == value][0]
+    #             self._trigger_glitch_condition = GlitchConditionMapping.reverse(value)
     #             self._set_cache_valid()
     #     return self._trigger_glitch_condition
     #
@@ -1346,7 +1389,7 @@ class lecroyBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.commo
     #     if not self._driver_operation_simulate and not self._get_cache_valid():
     #         value = self._ask(":trigger:glitch:qualifier?").lower()
     #         if value in WidthConditionMapping.values():
-    #             self._trigger_width_condition = [k for k, v in WidthConditionMapping.items() if v == value][0]
+    #             self._trigger_width_condition = WidthConditionMapping.reverse(value)
     #             self._set_cache_valid()
     #     return self._trigger_width_condition
     #
@@ -1387,7 +1430,7 @@ class lecroyBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.commo
     # def _get_trigger_width_polarity(self):
     #     if not self._driver_operation_simulate and not self._get_cache_valid():
     #         value = self._ask(":trigger:glitch:polarity?").lower()
-    #         self._trigger_width_polarity = [k for k, v in PolarityMapping.items() if v == value][0]
+    #         self._trigger_width_polarity = PolarityMapping.reverse(value)
     #         self._set_cache_valid()
     #     return self._trigger_width_polarity
     #
@@ -1406,72 +1449,74 @@ class lecroyBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.commo
     #     self._set_trigger_edge_slope(value)
 
     # Modified for LeCroy, WORKING ON WR104XI-A
-    def _measurement_fetch_waveform(self, index):
-        index = ivi.get_index(self._channel_name, index)
+    def _read_waveform_block(self, index, trace):
+        self._write_setting("COMM_ORDER HI")
+        self._write_setting("COMM_FORMAT DEF9,WORD,BIN")
 
-        if self._driver_operation_simulate:
-            return list()
+        # Read wave descriptor, time arrays and waveform data in one transfer
+        raw_data = self._ask_for_ieee_block("%s:WAVEFORM? ALL" % self._channel_name[index])
 
-        # Send the MSB first
-        # old - self._write(":waveform:byteorder msbfirst")
-        self._write("COMM_ORDER HI")
-        self._write("COMM_FORMAT DEF9,WORD,BIN")
+        desc = decode_wavedesc(raw_data)
 
-        # Read wave description and split up parts into variables
-        pre = self._ask("%s:INSPECT? WAVEDESC" % self._channel_name[index]).split("\r\n")
+        # Verify that the data is in 'word' format
+        if desc['comm_type'] != 1:
+            raise ivi.UnexpectedResponseException()
 
+        trace.average_count = desc['sweeps_per_acq']
+        trace.x_increment = desc['horiz_interval']
+        trace.x_origin = desc['horiz_offset']
+        trace.x_reference = 0
+        trace.y_increment = desc['vertical_gain']
+        trace.y_origin = -desc['vertical_offset']
+        trace.y_reference = 0
+        trace.trigger_time = desc['trigger_time']
 
-        # Replace following with a more simple solution, make it < Python 2.7 compatible
-        temp = []
-        for item in pre:
-            temp.append(item.split(':'))
+        return raw_data, desc
 
-        # Dict comprehension, python 2.7+
-        #mydict = {t[0].strip(): ["".join(elem.strip()) for elem in t[1:]] for t in temp}
-        #format = str(mydict["COMM_TYPE"][0])
-        #points = int(mydict["PNTS_PER_SCREEN"][0])
-        #xincrement = float(mydict["HORIZ_INTERVAL"][0])
-        #xorigin = float(mydict["HORIZ_OFFSET"][0])
-        #yincrement = float(mydict["VERTICAL_GAIN"][0])
-        #yorigin = float(mydict["VERTICAL_OFFSET"][0])
+    def _read_waveform(self, index, trace):
+        raw_data, desc = self._read_waveform_block(index, trace)
 
-        # Dict with lost comprehension, python 2.6+
-        mydict = dict([(d[0].strip(), "".join(d[1:]).strip()) for d in temp])
+        # Blocks follow the descriptor in a fixed order
+        offset = desc['wave_descriptor'] + desc['user_text']
+        trigtime = np.frombuffer(raw_data, desc['byte_order'] + 'f8', desc['trigtime_array'] // 8, offset).reshape(-1, 2)
+        offset += desc['trigtime_array'] + desc['ris_time_array'] + desc['res_array1']
+        y_raw = np.frombuffer(raw_data, desc['byte_order'] + 'i2', desc['wave_array_1'] // 2, offset)
 
-        format = str(mydict["COMM_TYPE"])
-        points = int(mydict["PNTS_PER_SCREEN"])
-        xincrement = float(mydict["HORIZ_INTERVAL"])
-        xorigin = float(mydict["HORIZ_OFFSET"])
-        yincrement = float(mydict["VERTICAL_GAIN"])
-        yorigin = float(mydict["VERTICAL_OFFSET"])
+        return y_raw, max(desc['subarray_count'], 1), trigtime
 
-        # Verify that the data is in 'word' format
-        if format.lower() != "word":
-            raise ivi.UnexpectedResponseException()
+    def _measurement_fetch_waveform(self, index):
+        index = ivi.get_index(self._channel_name, index)
 
-        # Read waveform data
-        self._write("%s:WAVEFORM? DAT1" % self._channel_name[index])
-        raw_data = raw_data = self._read_ieee_block()
+        if self._driver_operation_simulate:
+            return ivi.TraceYT()
 
-        # Split out points and convert to time and voltage pairs
-        data = list()
-        for i in range(points):
-            x = (i * xincrement) + xorigin
+        trace = ivi.TraceYT()
 
-            yval = struct.unpack(">H", raw_data[i * 2:i * 2 + 2])[0]
+        trace.y_raw, count, trigtime = self._read_waveform(index, trace)
 
-            if yval > 32767:
-                yval = yval - (2 ** 16)
+        return trace
 
-            if yval == 0:
-                # hole value
-                y = float('nan')
-            else:
-                y = (yincrement * yval) - yorigin
+    def _measurement_fetch_waveform_segmented(self, index):
+        index = ivi.get_index(self._channel_name, index)
+
+        if self._driver_operation_simulate:
+            return ivi.TraceYTSegmented()
+
+        trace = ivi.TraceYTSegmented()
 
-            data.append((x, y))
+        y_raw, count, trigtime = self._read_waveform(index, trace)
+
+        # Sequence mode data holds all segments back to back
+        points = len(y_raw) // count
+        trace.y_raw = y_raw[0:count*points].reshape(count, points)
+
+        # Trigger times in the trigger time array are relative to the first segment
+        if len(trigtime) >= count:
+            trace.time_tag = trigtime[0:count, 0]
+        else:
+            trace.time_tag = np.zeros(count)
 
-        return data
+        return trace
 
     def _measurement_read_waveform(self, index, maximum_time):
         return self._measurement_fetch_waveform(index)
@@ -1558,11 +1603,31 @@ class lecroyBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.commo
 
     def _measurement_fetch_waveform_min_max(self, index):
         index = ivi.get_index(self._channel_name, index)
-        data = list()
-        return data
+
+        if self._driver_operation_simulate:
+            return ivi.TraceYTMinMax()
+
+        trace = ivi.TraceYT()
+
+        raw_data, desc = self._read_waveform_block(index, trace)
+
+        offset = desc['wave_descriptor'] + desc['user_text'] + desc['trigtime_array'] + desc['ris_time_array'] + desc['res_array1']
+        dtype = desc['byte_order'] + 'i2'
+        y_raw = np.frombuffer(raw_data, dtype, desc['wave_array_1'] // 2, offset)
+
+        if desc['record_type'] == 6:
+            # extrema waveform, the floor follows the roof in the second array
+            y_min = np.frombuffer(raw_data, dtype, desc['wave_array_2'] // 2, offset + desc['wave_array_1'])
+            n = min(len(y_min), len(y_raw))
+            return trace.min_max(y_min[0:n], y_raw[0:n])
+        elif desc['record_type'] == 9:
+            # peak detect, min/max pairs in the data array
+            return trace.min_max_pairs(y_raw, desc['wave_array_count'])
+
+        raise scope.InvalidAcquisitionTypeException()
 
     def _measurement_read_waveform_min_max(self, index, maximum_time):
-        return _measurement_fetch_waveform_min_max(index)
+        return self._measurement_fetch_waveform_min_max(index)
 
     def _get_trigger_continuous(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
@@ -1596,7 +1661,7 @@ class lecroyBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.commo
     def _get_acquisition_sample_mode(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":acquire:mode?").lower()
-            self._acquisition_sample_mode = [k for k, v in SampleModeMapping.items() if v == value][0]
+            self._acquisition_sample_mode = SampleModeMapping.reverse(value)
             self._set_cache_valid()
         return self._acquisition_sample_mode
 
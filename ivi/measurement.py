@@ -0,0 +1,196 @@
+"""
+
+Python Interchangeable Virtual Instrument Library
+
+Copyright (c) 2012-2017 Alex Forencich
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+import warnings
+
+import numpy as np
+
+from . import ivi
+from . import scope
+
+# Host-side waveform measurements on TraceYT objects
+#
+# All measurements are computed along the last axis of the trace, so a
+# TraceYTSegmented with a 2D y_raw produces one value per segment.  Levels
+# follow the IVI definitions: voltage_high and voltage_low are the typical top
+# and base levels, and the reference levels are percentages of the amplitude
+# between them.
+
+TimingFunctions = set(['rise_time', 'fall_time', 'frequency', 'period',
+        'width_negative', 'width_positive', 'duty_cycle_negative',
+        'duty_cycle_positive', 'voltage_cycle_rms', 'voltage_cycle_average'])
+
+
+def _crossings(y, level, rising):
+    "Return row and fractional sample index of every crossing of level"
+    a = y - level[:, np.newaxis]
+    above = a >= 0
+    valid = ~np.isnan(a)
+    if rising:
+        mask = ~above[:, :-1] & above[:, 1:]
+    else:
+        mask = above[:, :-1] & ~above[:, 1:]
+    mask &= valid[:, :-1] & valid[:, 1:]
+    rows, idx = np.nonzero(mask)
+    a0 = a[rows, idx]
+    a1 = a[rows, idx+1]
+    return rows, idx + a0 / (a0 - a1)
+
+
+def _first(rows, pos, m):
+    out = np.full(m, np.inf)
+    np.minimum.at(out, rows, pos)
+    out[np.isinf(out)] = np.nan
+    return out
+
+
+def _last(rows, pos, m):
+    out = np.full(m, -np.inf)
+    np.maximum.at(out, rows, pos)
+    out[np.isinf(out)] = np.nan
+    return out
+
+
+def _search(rows, pos, start, n, after):
+    "Return the first crossing after start, or the last one before start, in the same row"
+    m = len(start)
+    key = rows * (n + 1) + pos
+    ok = ~np.isnan(start)
+    q = np.arange(m) * (n + 1) + np.where(ok, start, 0)
+    if after:
+        i = np.searchsorted(key, q, side='right')
+    else:
+        i = np.searchsorted(key, q, side='left') - 1
+    ok &= (i >= 0) & (i < len(key))
+    i = np.where(ok, i, 0)
+    if len(key):
+        ok &= rows[i] == np.arange(m)
+    out = np.full(m, np.nan)
+    out[ok] = pos[i[ok]]
+    return out
+
+
+def measure(trace, measurement_functions=None, reference_level_high=90,
+        reference_level_middle=50, reference_level_low=10):
+    """Compute waveform measurements on a TraceYT
+
+    Returns a dict mapping each of measurement_functions (default: all of
+    scope.MeasurementFunction) to its value.  Values are floats for a single
+    trace and arrays with one value per segment for a 2D trace.  Measurements
+    that cannot be determined, such as the period of a trace with less than two
+    rising edges, are NaN.  Times are in seconds, overshoot, preshoot and duty
+    cycles in percent."""
+    if measurement_functions is None:
+        measurement_functions = sorted(scope.MeasurementFunction)
+    elif isinstance(measurement_functions, str):
+        measurement_functions = [measurement_functions]
+    for f in measurement_functions:
+        if f not in scope.MeasurementFunction:
+            raise ivi.ValueNotSupportedException()
+
+    y = np.asarray(trace.y, dtype=float)
+    shape = y.shape[:-1]
+    n = y.shape[-1]
+    if y.size == 0:
+        # nothing to measure in an empty trace
+        if len(shape) == 0:
+            return dict((f, float('nan')) for f in measurement_functions)
+        return dict((f, np.full(shape, np.nan)) for f in measurement_functions)
+    y = y.reshape(-1, n)
+    m = y.shape[0]
+    dt = trace.x_increment
+
+    r = dict()
+
+    with warnings.catch_warnings(), np.errstate(invalid='ignore', divide='ignore'):
+        warnings.simplefilter('ignore', RuntimeWarning)
+
+        r['voltage_max'] = np.nanmax(y, axis=-1)
+        r['voltage_min'] = np.nanmin(y, axis=-1)
+        r['voltage_peak_to_peak'] = r['voltage_max'] - r['voltage_min']
+        r['voltage_average'] = np.nanmean(y, axis=-1)
+        r['voltage_rms'] = np.sqrt(np.nanmean(y**2, axis=-1))
+
+        # top and base as the median of the samples above and below the
+        # midpoint between the extremes
+        mid = ((r['voltage_max'] + r['voltage_min']) / 2)[:, np.newaxis]
+        r['voltage_high'] = np.nanmedian(np.where(y >= mid, y, np.nan), axis=-1)
+        r['voltage_low'] = np.nanmedian(np.where(y < mid, y, np.nan), axis=-1)
+        amp = r['voltage_high'] - r['voltage_low']
+        r['amplitude'] = amp
+        r['overshoot'] = (r['voltage_max'] - r['voltage_high']) / amp * 100
+        r['preshoot'] = (r['voltage_low'] - r['voltage_min']) / amp * 100
+
+        if TimingFunctions.intersection(measurement_functions):
+            lvl_high = r['voltage_low'] + amp * reference_level_high / 100
+            lvl_mid = r['voltage_low'] + amp * reference_level_middle / 100
+            lvl_low = r['voltage_low'] + amp * reference_level_low / 100
+
+            mid_rise = _crossings(y, lvl_mid, True)
+            mid_fall = _crossings(y, lvl_mid, False)
+
+            # period from the average spacing of rising middle crossings
+            first_rise = _first(mid_rise[0], mid_rise[1], m)
+            last_rise = _last(mid_rise[0], mid_rise[1], m)
+            count = np.bincount(mid_rise[0], minlength=m)
+            period = np.where(count > 1, (last_rise - first_rise) / (count - 1), np.nan)
+            r['period'] = period * dt
+            r['frequency'] = 1 / r['period']
+
+            first_fall = _first(mid_fall[0], mid_fall[1], m)
+            width_pos = _search(mid_fall[0], mid_fall[1], first_rise, n, True) - first_rise
+            width_neg = _search(mid_rise[0], mid_rise[1], first_fall, n, True) - first_fall
+            r['width_positive'] = width_pos * dt
+            r['width_negative'] = width_neg * dt
+            r['duty_cycle_positive'] = width_pos / period * 100
+            r['duty_cycle_negative'] = width_neg / period * 100
+
+            # rise time from the first complete edge: the first rising high
+            # crossing after the first rising low crossing, back to the last
+            # rising low crossing before it, and vice versa for fall time
+            high_rise = _crossings(y, lvl_high, True)
+            low_rise = _crossings(y, lvl_low, True)
+            t1 = _search(high_rise[0], high_rise[1], _first(low_rise[0], low_rise[1], m), n, True)
+            r['rise_time'] = (t1 - _search(low_rise[0], low_rise[1], t1, n, False)) * dt
+            high_fall = _crossings(y, lvl_high, False)
+            low_fall = _crossings(y, lvl_low, False)
+            t1 = _search(low_fall[0], low_fall[1], _first(high_fall[0], high_fall[1], m), n, True)
+            r['fall_time'] = (t1 - _search(high_fall[0], high_fall[1], t1, n, False)) * dt
+
+            # cycle measurements over the whole periods between the first
+            # and last rising middle crossings
+            idx = np.arange(n)
+            cycle = (idx >= first_rise[:, np.newaxis]) & (idx < last_rise[:, np.newaxis])
+            cycle &= (count > 1)[:, np.newaxis]
+            yc = np.where(cycle, y, np.nan)
+            r['voltage_cycle_average'] = np.nanmean(yc, axis=-1)
+            r['voltage_cycle_rms'] = np.sqrt(np.nanmean(yc**2, axis=-1))
+
+    out = dict()
+    for f in measurement_functions:
+        v = r[f].reshape(shape)
+        out[f] = float(v) if v.ndim == 0 else v
+    return out
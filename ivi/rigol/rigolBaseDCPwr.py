@@ -24,8 +24,11 @@ THE SOFTWARE.
 
 """
 
+import numpy as np
+
 from .. import ivi
 from .. import dcpwr
+from .. import extra
 from .. import scpi
 
 TrackingType = set(['floating'])
@@ -34,7 +37,7 @@ TriggerSourceMapping = {
         'bus': 'bus'}
 
 class rigolBaseDCPwr(scpi.dcpwr.Base, scpi.dcpwr.Trigger, scpi.dcpwr.SoftwareTrigger,
-                scpi.dcpwr.Measurement):
+                scpi.dcpwr.Measurement, extra.dcpwr.List):
     "Rigol generic IVI DC power supply driver"
     
     def __init__(self, *args, **kwargs):
@@ -75,6 +78,9 @@ class rigolBaseDCPwr(scpi.dcpwr.Base, scpi.dcpwr.Trigger, scpi.dcpwr.SoftwareTri
         ]
         
         self._memory_size = 10
+        self._output_list_length_max = 2048
+        self._output_list_dwell_min = 1
+        self._output_list_dwell_max = 99999
         
         self._identity_description = "Rigol generic IVI DC power supply driver"
         self._identity_identifier = ""
@@ -116,6 +122,51 @@ class rigolBaseDCPwr(scpi.dcpwr.Base, scpi.dcpwr.Trigger, scpi.dcpwr.SoftwareTri
         if not self._driver_operation_simulate:
             self._write("*rcl %d" % index)
 
+    def _measure_outputs(self, outputs = None):
+        if outputs is None:
+            outputs = range(self._output_count)
+        indices = [ivi.get_index(self._output_name, k) for k in outputs]
+        if self._driver_operation_simulate or len(indices) == 0:
+            return np.zeros((len(indices), 2))
+        # measure:all? returns voltage, current and power of a channel; all
+        # of the queries are sent in a single message
+        resp = self._ask(";:".join("measure:all? ch%d" % (k+1) for k in indices)).split(';')
+        if len(resp) != len(indices):
+            raise ivi.UnexpectedResponseException()
+        data = list()
+        for r in resp:
+            r = r.split(',')
+            if len(r) < 2:
+                raise ivi.UnexpectedResponseException()
+            data.append([float(r[0]), float(r[1])])
+        return np.array(data).reshape(-1, 2)
+
+    def _output_list_configure(self, index, voltage, current, dwell):
+        super(rigolBaseDCPwr, self)._output_list_configure(index, voltage, current, dwell)
+        index = ivi.get_index(self._output_name, index)
+        if not self._driver_operation_simulate:
+            # timer groups of the selected channel
+            n = len(self._output_list_voltage[index])
+            self._write_output(index, "timer:groups %d" % n)
+            for k in range(n):
+                self._write("timer:parameter %d,%.3f,%.3f,%.3f" %
+                        (k, self._output_list_voltage[index][k], self._output_list_current[index][k], self._output_list_dwell[index][k]))
+
+    def _output_list_initiate(self, index):
+        index = ivi.get_index(self._output_name, index)
+        if not self._driver_operation_simulate:
+            count = self._output_list_count[index]
+            if count == 0:
+                self._write_output(index, "timer:cycles i")
+            else:
+                self._write_output(index, "timer:cycles n,%d" % count)
+            self._write("timer:state on")
+
+    def _output_list_abort(self, index):
+        index = ivi.get_index(self._output_name, index)
+        if not self._driver_operation_simulate:
+            self._write_output(index, "timer:state off")
+
     def _utility_self_test(self):
         code = 0
         message = "No Response"
@@ -29,18 +29,20 @@ import math
 import sys
 import time
 
+import numpy as np
+
 from .. import ivi
 from .. import scope
 from .. import scpi
 from .. import extra
 
-AcquisitionTypeMapping = {
+AcquisitionTypeMapping = ivi.ValueMapping({
         'normal': 'norm',
         'peak_detect': 'peak',
         'high_resolution': 'hres',
-        'average': 'aver'}
+        'average': 'aver'})
 VerticalCoupling = set(['ac', 'dc', 'gnd'])
-TriggerTypeMapping = {
+TriggerTypeMapping = ivi.ValueMapping({
         'edge': 'edge',
         'tv': 'video',
         'width': 'puls',
@@ -57,7 +59,7 @@ TriggerTypeMapping = {
         'setup_hold': 'shold',
         'rs232': 'rs232',
         'i2c': 'iic',
-        'spi': 'spi'}
+        'spi': 'spi'})
 TriggerCouplingMapping = {
         'ac': ('ac', 0),
         'dc': ('dc', 0),
@@ -67,26 +69,26 @@ TriggerCouplingMapping = {
         'ac_noise_reject': ('ac', 1),
         'hf_noise_reject': ('hfr', 1),
         'lf_noise_reject': ('lfr', 1)}
-TVTriggerEventMapping = {
+TVTriggerEventMapping = ivi.ValueMapping({
         'field1': 'oddf',
         'field2': 'even',
         'any_line': 'alin',
-        'line_number': 'line'}
-TVTriggerFormatMapping = {
+        'line_number': 'line'})
+TVTriggerFormatMapping = ivi.ValueMapping({
         'ntsc': 'ntsc',
         'pal': 'pals',
         'secam': 'pals',
         'p480': '480p',
-        'p576': '576p'}
-PolarityMapping = {'positive': 'pos',
-        'negative': 'neg'}
+        'p576': '576p'})
+PolarityMapping = ivi.ValueMapping({'positive': 'pos',
+        'negative': 'neg'})
 GlitchConditionMapping = {'less_than': 'less',
         'greater_than': 'gre'}
 WidthConditionMapping = {'within': ''}
-SlopeMapping = {
+SlopeMapping = ivi.ValueMapping({
         'positive': 'pos',
         'negative': 'neg',
-        'either': 'rfal'}
+        'either': 'rfal'})
 MeasurementFunctionMapping = {
         'rise_time': 'risetime',
         'fall_time': 'falltime',
@@ -128,12 +130,12 @@ ScreenshotImageFormatMapping = {
         'png24': 'png',
         'jpg': 'jpeg',
         'jpeg': 'jpeg'}
-TimebaseModeMapping = {
+TimebaseModeMapping = ivi.ValueMapping({
         'main': 'main',
         'window': 'window',
         'xy': 'xy',
-        'roll': 'roll'}
-TriggerModifierMapping = {'none': 'norm', 'auto': 'auto'}
+        'roll': 'roll'})
+TriggerModifierMapping = ivi.ValueMapping({'none': 'norm', 'auto': 'auto'})
 
 class rigolBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.common.Reset,
                 scpi.common.SelfTest, scpi.common.Memory,
@@ -142,6 +144,7 @@ class rigolBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.common
                 scope.ContinuousAcquisition, scope.AverageAcquisition,
                 scope.TriggerModifier, scope.AutoSetup,
                 extra.common.SystemSetup, extra.common.Screenshot,
+                extra.scope.DigitalWaveform,
                 ivi.Driver):
     "Rigol generic IVI oscilloscope driver"
 
@@ -337,12 +340,6 @@ class rigolBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.common
     def _utility_disable(self):
         pass
 
-    def _utility_lock_object(self):
-        pass
-
-    def _utility_unlock_object(self):
-        pass
-
     def _init_channels(self):
         super(rigolBaseScope, self)._init_channels()
 
@@ -421,7 +418,7 @@ class rigolBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.common
                 self._timebase_mode = "window"
             else:
                 value = self._ask(":timebase:mode?").lower()
-                self._timebase_mode = [k for k,v in TimebaseModeMapping.items() if v==value][0]
+                self._timebase_mode = TimebaseModeMapping.reverse(value)
             self._set_cache_valid()
         return self._timebase_mode
 
@@ -548,7 +545,7 @@ class rigolBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.common
     def _get_acquisition_type(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":acquire:type?").lower()
-            self._acquisition_type = [k for k,v in AcquisitionTypeMapping.items() if v==value][0]
+            self._acquisition_type = AcquisitionTypeMapping.reverse(value)
             self._set_cache_valid()
         return self._acquisition_type
 
@@ -814,7 +811,7 @@ class rigolBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.common
     def _get_trigger_edge_slope(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":trigger:edge:slope?").lower()
-            self._trigger_edge_slope = [k for k,v in SlopeMapping.items() if v==value][0]
+            self._trigger_edge_slope = SlopeMapping.reverse(value)
             self._set_cache_valid()
         return self._trigger_edge_slope
 
@@ -859,7 +856,7 @@ class rigolBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.common
                 else:
                     value = 'glitch'
             else:
-                value = [k for k,v in TriggerTypeMapping.items() if v==value][0]
+                value = TriggerTypeMapping.reverse(value)
             self._trigger_type = value
             self._set_cache_valid()
         return self._trigger_type
@@ -897,7 +894,7 @@ class rigolBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.common
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":trigger:video:mode?").lower()
             # may need processing
-            self._trigger_tv_trigger_event = [k for k,v in TVTriggerEventMapping.items() if v==value][0]
+            self._trigger_tv_trigger_event = TVTriggerEventMapping.reverse(value)
             self._set_cache_valid()
         return self._trigger_tv_trigger_event
 
@@ -929,7 +926,7 @@ class rigolBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.common
     def _get_trigger_tv_polarity(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":trigger:video:polarity?").lower()
-            self._trigger_tv_polarity = [k for k,v in PolarityMapping.items() if v==value][0]
+            self._trigger_tv_polarity = PolarityMapping.reverse(value)
             self._set_cache_valid()
         return self._trigger_tv_polarity
 
@@ -944,7 +941,7 @@ class rigolBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.common
     def _get_trigger_tv_signal_format(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":trigger:video:standard?").lower()
-            self._trigger_tv_signal_format = [k for k,v in TVTriggerFormatMapping.items() if v==value][0]
+            self._trigger_tv_signal_format = TVTriggerFormatMapping.reverse(value)
             self._set_cache_valid()
         return self._trigger_tv_signal_format
 
@@ -1070,12 +1067,7 @@ class rigolBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.common
     def _set_trigger_ac_line_slope(self, value):
         self._set_trigger_edge_slope(value)
 
-    def _measurement_fetch_waveform(self, index):
-        index = ivi.get_index(self._channel_name, index)
-
-        if self._driver_operation_simulate:
-            return ivi.TraceYT()
-
+    def _setup_waveform_transfer(self, index):
         expected_points = float(self._ask("acquire:srate?"))*(self._horizontal_divisions*float(self._ask("timebase:scale?")))
 
         self._write(":waveform:source %s" % self._channel_name[index])
@@ -1085,6 +1077,13 @@ class rigolBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.common
         else:
             self._write(":waveform:mode raw")
 
+        # number of digital channels in each sample; raw data of digital
+        # channels contains the whole pod
+        return 1 if expected_points == 1200 else 8
+
+    def _iter_waveform_raw(self, index, chunk_points):
+        group = self._setup_waveform_transfer(index)
+
         trace = ivi.TraceYT()
 
         # Read preamble
@@ -1103,41 +1102,102 @@ class rigolBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.common
 
         if acq_format == 0:
             block_size = 250000
+            dtype = np.dtype('B')
         elif acq_format == 1:
             block_size = 125000
+            dtype = np.dtype('<H')
         else:
-            raise UnexpectedResponseException()
+            raise ivi.UnexpectedResponseException()
 
-        # Read waveform data
-        data = bytearray()
+        # chunks cannot exceed the maximum transfer size of the instrument
+        chunk_points = min(chunk_points, block_size)
 
-        for offset in range(1, points+1, block_size):
-            self._write(":waveform:start %d" % offset)
-            self._write(":waveform:stop %d" % min(points, offset+block_size-1))
-            self._write(":waveform:data?")
-            raw_data = self._read_raw()
-            data.extend(ivi.decode_ieee_block(raw_data))
+        if self._channel_name[index] in self._digital_channel_name:
+            trace.y_increment = 1
+            trace.y_reference = 0
 
-        # Store in trace object
-        if acq_format == 0:
-            trace.y_raw = array.array('B', data[0:points])
-        elif acq_format == 1:
-            trace.y_raw = array.array('H', data[0:points*2])
+        # Read waveform data one block at a time
+        for offset in range(0, points, chunk_points):
+            self._write(":waveform:start %d" % (offset+1))
+            self._write(":waveform:stop %d" % min(points, offset+chunk_points))
+            with self._session_lock:
+                self._write(":waveform:data?")
+                raw_data = ivi.decode_ieee_block(self._read_raw())
+
+            y_raw = np.frombuffer(raw_data, dtype)[0:min(chunk_points, points-offset)]
 
-            if sys.byteorder == 'big':
-                trace.y_raw.byteswap()
+            yield trace.chunk(offset, y_raw), group
+
+    def _measurement_iter_waveform_chunks(self, index, chunk_points = 1000000):
+        index = ivi.get_index(self._channel_name, index)
+
+        if self._driver_operation_simulate:
+            return
 
-        # handle digital channels
         if self._channel_name[index] in self._digital_channel_name:
-            trace.y_increment = 1
+            digital_index = self._digital_channel_name.index(self._channel_name[index])
 
-            if points != 1200:
-                # raw waveform; extract channel from group
-                digital_index = self._digital_channel_name.index(self._channel_name[index])
-                offset = digital_index % 8
+        for chunk, group in self._iter_waveform_raw(index, chunk_points):
+            # extract channel from group
+            if self._channel_name[index] in self._digital_channel_name and group > 1:
+                chunk.y_raw = (chunk.y_raw >> (digital_index % group)) & 1
+            yield chunk
 
-                for k in range(points):
-                    trace.y_raw[k] = (trace.y_raw[k] >> offset) & 1
+    def _measurement_fetch_waveform(self, index):
+        if self._driver_operation_simulate:
+            return ivi.TraceYT()
+
+        chunks = list(self._measurement_iter_waveform_chunks(index))
+
+        if len(chunks) == 0:
+            return ivi.TraceYT()
+
+        # Store in trace object
+        trace = chunks[0]
+        trace.y_raw = np.concatenate([c.y_raw for c in chunks])
+
+        return trace
+
+    def _measurement_fetch_digital_waveform(self, packed = False):
+        if self._digital_channel_count == 0:
+            raise ivi.OperationNotSupportedException()
+
+        if self._driver_operation_simulate:
+            return ivi.TraceYT()
+
+        trace = None
+        data = None
+
+        # Read each group of digital channels once
+        k = 0
+        while k < self._digital_channel_count:
+            index = ivi.get_index(self._channel_name, self._digital_channel_name[k])
+            chunks = list(self._iter_waveform_raw(index, 1000000))
+
+            if len(chunks) == 0:
+                break
+
+            trace, group = chunks[0]
+            y_raw = np.concatenate([c.y_raw for c, g in chunks]).astype(np.uint16)
+
+            if group == 1:
+                y_raw &= 1
+
+            if data is None:
+                data = y_raw << k
+            else:
+                n = min(len(data), len(y_raw))
+                data = data[0:n] | (y_raw[0:n] << k)
+
+            k += group
+
+        if trace is None:
+            return ivi.TraceYT()
+
+        if packed:
+            trace.y_raw = data
+        else:
+            trace.y_raw = ivi.unpack_bits(data, self._digital_channel_count)
 
         return trace
 
@@ -1254,7 +1314,7 @@ class rigolBaseScope(scpi.common.IdnCommand, scpi.common.ErrorQuery, scpi.common
             if value == 'sing':
                 self._trigger_modifier = 'none'
             else:
-                self._trigger_modifier = [k for k,v in TriggerModifierMapping.items() if v==value][0]
+                self._trigger_modifier = TriggerModifierMapping.reverse(value)
                 self._set_cache_valid()
         return self._trigger_modifier
 
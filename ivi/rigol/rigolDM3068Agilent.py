@@ -32,7 +32,7 @@ from .. import ivi
 from .. import dmm
 from .. import scpi
 
-MeasurementFunctionMapping = {
+MeasurementFunctionMapping = ivi.ValueMapping({
         'dc_volts': 'volt:dc',
         'ac_volts': 'volt:ac',
         'dc_current': 'curr:dc',
@@ -44,7 +44,7 @@ MeasurementFunctionMapping = {
         'continuity': 'cont',
         'diode': 'diod',
         'capacitance': 'cap',
-        'temperature': 'temp'}
+        'temperature': 'temp'})
 
 MeasurementRangeMapping = {
         'dc_volts': 'volt:dc:range',
@@ -75,13 +75,13 @@ MeasurementResolutionMapping = {
 ValidRtdAlpha = set([85, 89, 91, 92])
 ValidThermistor = set([2252, 3000, 5000, 10000, 30000])
 ThermocoupleType = set(['b', 'e', 'j', 'k', 'n', 'r', 's', 't'])
-TemperatureTransducerType = {
+TemperatureTransducerType = ivi.ValueMapping({
         'thermocouple': 'tc', 
         'thermistor': 'thermistor',
         'two_wire_thermistor': 'thermistor',
         'four_wire_thermistor': 'fthermistor',
         'two_wire_rtd': 'rtd', 
-        'four_wire_rtd': 'frtd'}
+        'four_wire_rtd': 'frtd'})
 
 class rigolDM3068Agilent(
         scpi.dmm.Base,
@@ -143,7 +143,7 @@ class rigolDM3068Agilent(
     def _get_measurement_function(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":conf?").lower().strip('"').split(" ")[0]
-            value = [k for k,v in MeasurementFunctionMapping.items() if v==value][0]
+            value = MeasurementFunctionMapping.reverse(value)
             self._measurement_function = value
             self._set_cache_valid()
         return self._measurement_function
@@ -226,7 +226,7 @@ class rigolDM3068Agilent(
     def _get_temperature_transducer_type(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":temperature:transducer:type?").lower()
-            value = [k for k,v in TemperatureTransducerType.items() if v==value][0]
+            value = TemperatureTransducerType.reverse(value)
             self._temperature_transducer_type = value
             self._set_cache_valid()
         return self._temperature_transducer_type
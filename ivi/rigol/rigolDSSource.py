@@ -32,7 +32,7 @@ from .. import fgen
 
 OutputMode = set(['function', 'arbitrary'])
 OperationMode = set(['continuous'])
-StandardWaveformMapping = {
+StandardWaveformMapping = ivi.ValueMapping({
         'sine': 'sin',
         'square': 'squ',
         'triangle': 'ramp',
@@ -48,7 +48,7 @@ StandardWaveformMapping = {
         'gaussian': 'gaus',
         'lorentz': 'lor',
         'haversine': 'hav'
-        }
+        })
 
 class rigolDSSource(fgen.Base, fgen.StdFunc, fgen.ArbWfm, fgen.ArbFrequency,
                 fgen.ArbChannelWfm):
@@ -313,7 +313,7 @@ class rigolDSSource(fgen.Base, fgen.StdFunc, fgen.ArbWfm, fgen.ArbFrequency,
             resp = self._ask(":%s:function?" % self._output_name[index]).lower()
             if resp == 'arbitrary':
                 resp = 'sine'
-            resp = [k for k,v in StandardWaveformMapping.items() if v==resp][0]
+            resp = StandardWaveformMapping.reverse(resp)
             if resp == 'ramp_up':
                 if self._get_output_standard_waveform_symmetry(index) <= 10.0:
                     resp = 'ramp_down'
@@ -118,9 +118,6 @@ class santecOTF930(ivi.Driver):
             pass
         return (error_code, error_message)
 
-    def _utility_lock_object(self):
-        pass
-
     def _utility_reset(self):
         if not self._driver_operation_simulate:
             self._write("RE")
@@ -137,9 +134,6 @@ class santecOTF930(ivi.Driver):
             pass
         return (code, message)
 
-    def _utility_unlock_object(self):
-        pass
-
 
 
     def _get_wavelength(self):
@@ -24,6 +24,16 @@ THE SOFTWARE.
 
 """
 
+import threading
+import time
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+import numpy as np
+
 from . import ivi
 
 # Exceptions
@@ -32,6 +42,10 @@ class InvalidAcquisitionTypeException(ivi.IviException): pass
 class UnableToPerformMeasurementException(ivi.IviException): pass
 
 # Parameter Values
+ContinuousQueuePolicy = set(['drop_oldest', 'block'])
+MeasurementResultDtype = np.dtype([('channel', 'U32'), ('measurement_function', 'U32'),
+        ('value', float), ('minimum', float), ('maximum', float), ('mean', float),
+        ('std_dev', float), ('count', int)])
 AcquisitionType = set(['normal', 'peak_detect', 'high_resolution', 'average'])
 VerticalCoupling = set(['ac', 'dc', 'gnd'])
 TriggerCoupling = set(['ac', 'dc', 'hf_reject', 'lf_reject', 'noise_reject'])
@@ -352,6 +366,24 @@ class Base(ivi.IviContainer):
                         
                         any(any(math.isnan(b) for b in a) for a in waveform)
                         """, cls, grp, '4.3.16'))
+        self._add_method('channels[].measurement.iter_waveform_chunks',
+                        self._measurement_iter_waveform_chunks,
+                        ivi.Doc("""
+                        This function returns a generator that yields the waveform the
+                        oscilloscope acquired for the specified channel in consecutive chunks of
+                        at most chunk_points points. The waveform is from a previously initiated
+                        acquisition, as with the Fetch Waveform function.
+                        
+                        Each chunk is a TraceYT object carrying the scaling of the complete
+                        record, so the scaled voltages and times of the chunk are available as
+                        NumPy arrays in y and x. Drivers that support it read the chunks from the
+                        instrument as they are consumed, which allows very deep records to be
+                        processed or written to disk with bounded memory. If the generator is
+                        closed before the end of the record, the remaining data is discarded.
+                        
+                        The instrument must not be accessed for other purposes until the
+                        generator is exhausted or closed.
+                        """))
         self._add_property('measurement.status',
                         self._get_measurement_status,
                         None,
@@ -405,6 +437,28 @@ class Base(ivi.IviContainer):
                         interaction with the instrument. Call the Error Query function at the
                         conclusion of the sequence to check the instrument status.
                         """, cls, grp, '4.3.14'))
+        self._add_method('measurement.start_continuous',
+                        self._measurement_start_continuous,
+                        ivi.Doc("""
+                        This function starts continuous acquisition on a background thread and
+                        returns a ContinuousCapture object. The thread waits for each
+                        acquisition to complete, reads the raw waveform data of the requested
+                        channels and re-arms the trigger immediately, so that the oscilloscope
+                        acquires the next waveform while the previous one is decoded.
+                        
+                        If channels is None, all enabled channels are acquired. Completed frames
+                        are passed to the consumer through a queue holding up to queue_size
+                        frames. Call get on the returned object to retrieve the next frame as a
+                        dict mapping channel names to TraceYT objects. When the queue is full,
+                        the 'drop_oldest' policy discards the oldest frame and the 'block'
+                        policy waits for the consumer. The update_rate and dropped attributes
+                        report the achieved frame rate and the number of discarded frames. Call
+                        stop to end the acquisition.
+                        
+                        The waveform data is decoded into a set of preallocated buffers that is
+                        reused, so the y_raw arrays of a frame returned by get remain valid only
+                        until the next call to get. Copy the data to keep it for longer.
+                        """))
         self._add_property('trigger.coupling',
                         self._get_trigger_coupling,
                         self._set_trigger_coupling,
@@ -751,11 +805,42 @@ class Base(ivi.IviContainer):
         data = list()
         return data
     
+    def _measurement_iter_waveform_chunks(self, index, chunk_points = 1000000):
+        trace = self._measurement_fetch_waveform(index)
+        if not isinstance(trace, ivi.TraceYT) or trace.y_raw is None:
+            return
+        for offset in range(0, len(trace.y_raw), chunk_points):
+            yield trace.chunk(offset, trace.y_raw[offset:offset+chunk_points])
+    
     def _measurement_read_waveform(self, index, maximum_time):
         return self._measurement_fetch_waveform(index)
     
     def _measurement_initiate(self):
         pass
+    
+    def _measurement_start_continuous(self, channels = None, queue_size = 4, policy = 'drop_oldest'):
+        if channels is None:
+            channels = [self._channel_name[i] for i in range(self._channel_count) if self._channel_enabled[i]]
+        acq = ContinuousCapture(self, channels, queue_size, policy)
+        acq.start()
+        return acq
+    
+    def _measurement_continuous_arm(self):
+        self._measurement_initiate()
+    
+    def _measurement_continuous_wait(self, timeout):
+        return self._wait_for(lambda: self._get_measurement_status() == 'complete', timeout)
+    
+    def _measurement_continuous_read(self, index):
+        # return the scaling of the waveform as a TraceYT without y_raw and
+        # the undecoded samples, so that decoding can be deferred until after
+        # the trigger is re-armed
+        trace = self._measurement_fetch_waveform(index)
+        if not isinstance(trace, ivi.TraceYT):
+            return ivi.TraceYT(), np.zeros(0)
+        data = np.asarray(trace.y_raw) if trace.y_raw is not None else np.zeros(0)
+        trace.y_raw = None
+        return trace, data
 
 
 class Interpolation(ivi.IviContainer):
@@ -1383,6 +1468,45 @@ class WaveformMeasurement(ivi.IviContainer):
                         * Measurement Low Reference
                         * Measurement Mid Reference
                         """, cls, grp, '11.3.3'))
+        self._add_method('measurement.fetch_waveform_measurements',
+                        self._measurement_fetch_waveform_measurements,
+                        ivi.Doc("""
+                        This function fetches several waveform measurements from a previously
+                        initiated waveform acquisition at once. measurements is a list of
+                        (channel, measurement_function) pairs. For the measurements that need a
+                        reference channel, such as phase and delay, a (channel,
+                        measurement_function, reference_channel) tuple can be given instead.
+                        
+                        Drivers retrieve all of the values in as few instrument queries as
+                        possible, using the results table of the instrument where available.
+                        
+                        The return value is a structured NumPy array with one record per
+                        requested measurement and the fields channel, measurement_function,
+                        value, minimum, maximum, mean, std_dev and count. If statistics is True
+                        and the instrument supports measurement statistics, the statistics
+                        fields are filled in; otherwise they are NaN and count is 0.
+                        
+                        Values for measurement_function are the same as for Fetch Waveform
+                        Measurement.
+                        """))
+        self._add_method('channels[].measurement.compute_waveform_measurements',
+                        self._measurement_compute_waveform_measurements,
+                        ivi.Doc("""
+                        This function computes waveform measurements on the host instead of on
+                        the oscilloscope. If trace is None, the waveform is fetched from the
+                        specified channel with the Fetch Waveform function first. Any TraceYT
+                        object can be passed as trace, including the segmented traces returned
+                        by Fetch Waveform Segmented, in which case one value per segment is
+                        returned.
+                        
+                        All of the requested measurements are computed in one pass with the
+                        current Measurement High, Mid and Low Reference settings. The return
+                        value is a dict mapping each measurement function to its value. Values
+                        that cannot be determined from the waveform are NaN.
+                        
+                        Values for measurement_functions are the same as for Fetch Waveform
+                        Measurement. If measurement_functions is None, all of them are computed.
+                        """))
     
     def _get_reference_level_high(self):
         return self._reference_level_high
@@ -1418,6 +1542,41 @@ class WaveformMeasurement(ivi.IviContainer):
     
     def _measurement_read_waveform_measurement(self, index, measurement_function, maximum_time):
         return self._measurement_fetch_waveform_measurement(index, measurement_function)
+    
+    def _init_measurement_results(self, measurements):
+        # returns the result array and a list of (index, function, reference)
+        result = np.zeros(len(measurements), MeasurementResultDtype)
+        for f in ['minimum', 'maximum', 'mean', 'std_dev']:
+            result[f] = float('nan')
+        l = list()
+        for k, m in enumerate(measurements):
+            index = ivi.get_index(self._channel_name, m[0])
+            ref = m[2] if len(m) > 2 else None
+            if hasattr(ref, 'name'):
+                ref = ref.name
+            l.append((index, m[1], ref))
+            result[k]['channel'] = self._channel_name[index]
+            result[k]['measurement_function'] = m[1]
+        return result, l
+    
+    def _measurement_fetch_waveform_measurements(self, measurements, statistics = False):
+        result, l = self._init_measurement_results(measurements)
+        for k, (index, func, ref) in enumerate(l):
+            if ref is None:
+                result[k]['value'] = self._measurement_fetch_waveform_measurement(index, func)
+            else:
+                result[k]['value'] = self._measurement_fetch_waveform_measurement(index, func, ref)
+        return result
+    
+    def _measurement_compute_waveform_measurements(self, index, measurement_functions = None, trace = None):
+        from . import measurement
+        index = ivi.get_index(self._channel_name, index)
+        if trace is None:
+            trace = self._measurement_fetch_waveform(index)
+        return measurement.measure(trace, measurement_functions,
+                self._get_reference_level_high(),
+                self._get_reference_level_middle(),
+                self._get_reference_level_low())
 
 
 class MinMaxWaveform(ivi.IviContainer):
@@ -1478,9 +1637,12 @@ class MinMaxWaveform(ivi.IviContainer):
                         MaxWaveform parameters is either a voltage or a value indicating that the
                         oscilloscope could not sample a voltage.
                         
-                        The return value is a list of (x, y_min, y_max) tuples that represent the
-                        time and voltage of each data point.  Either of the y points may be NaN in
-                        the case that the oscilloscope could not sample the voltage.
+                        The return value is a TraceYTMinMax object. Iterating over it yields
+                        (x, y_min, y_max) tuples that represent the time and voltage of each data
+                        point, and the y_min and y_max attributes hold the minimum and maximum
+                        records as arrays.  Either of the y points may be NaN in the case that the
+                        oscilloscope could not sample the voltage. Use the decimate_min_max method
+                        of any TraceYT to reduce a long record to a min/max envelope on the host.
                         
                         The end-user configures the interpolation method the oscilloscope uses
                         with the Acquisition.Interpolation property. If interpolation is disabled,
@@ -1518,9 +1680,12 @@ class MinMaxWaveform(ivi.IviContainer):
                         complete the acquisition within the time period the user specified with
                         the max_time parameter, the function returns the Max Time Exceeded error.
                         
-                        The return value is a list of (x, y_min, y_max) tuples that represent the
-                        time and voltage of each data point.  Either of the y points may be NaN in
-                        the case that the oscilloscope could not sample the voltage.
+                        The return value is a TraceYTMinMax object. Iterating over it yields
+                        (x, y_min, y_max) tuples that represent the time and voltage of each data
+                        point, and the y_min and y_max attributes hold the minimum and maximum
+                        records as arrays.  Either of the y points may be NaN in the case that the
+                        oscilloscope could not sample the voltage. Use the decimate_min_max method
+                        of any TraceYT to reduce a long record to a min/max envelope on the host.
                         
                         The end-user configures the interpolation method the oscilloscope uses
                         with the Acquisition.Interpolation property. If interpolation is disabled,
@@ -1552,7 +1717,7 @@ class MinMaxWaveform(ivi.IviContainer):
         return data
     
     def _measurement_read_waveform_min_max(self, index, maximum_time):
-        return _measurement_fetch_waveform_min_max(index)
+        return self._measurement_fetch_waveform_min_max(index)
 
 
 class ProbeAutoSense(ivi.IviContainer):
@@ -1756,3 +1921,172 @@ class AutoSetup(ivi.IviContainer):
     def _measurement_auto_setup(self):
         pass
 
+
+class ContinuousCapture(object):
+    """Continuously acquire waveforms from an oscilloscope on a background thread
+
+    Created by measurement.start_continuous.  Each frame is a dict mapping
+    channel names to TraceYT objects.
+    """
+    def __init__(self, driver, channels, queue_size = 4, policy = 'drop_oldest'):
+        if policy not in ContinuousQueuePolicy:
+            raise ivi.ValueNotSupportedException()
+        self.driver = driver
+        self.channels = [driver._channel_name[ivi.get_index(driver._channel_name, c)] for c in channels]
+        self.queue_size = int(queue_size)
+        self.policy = policy
+        self.poll_timeout = 0.1
+        self.error = None
+        self.frames = 0
+        self.dropped = 0
+        self._queue = queue.Queue(self.queue_size)
+        # one set of buffers being filled, one held by the consumer and one
+        # per queued frame; a set is only reused once it is back on the free
+        # list, which happens when its frame is dropped or the consumer gets
+        # the next frame
+        self._free = [dict() for i in range(self.queue_size + 2)]
+        self._held = None
+        self._pool = threading.Condition()
+        self._start_time = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def update_rate(self):
+        "Average number of frames acquired per second since start"
+        if self._start_time is None or self.frames == 0:
+            return 0.0
+        return self.frames / (time.time() - self._start_time)
+
+    def start(self):
+        "Start acquiring"
+        if self.running:
+            return
+        self._stop.clear()
+        self.frames = 0
+        self.dropped = 0
+        self._start_time = time.time()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        "Stop acquiring and wait for the acquisition thread to exit"
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self._thread = None
+
+    def get(self, timeout = None):
+        """Return the next frame, or None if no frame arrives within timeout seconds
+
+        Once the acquisition thread has exited and all frames have been
+        returned, the error that stopped it is raised, or None is returned if
+        it was stopped normally.  The arrays of the returned frame remain valid
+        until the next call to get.
+        """
+        deadline = None
+        if timeout is not None:
+            deadline = time.time() + timeout
+        while True:
+            # wait in short steps so that the exit of the thread is noticed
+            wait = self.poll_timeout
+            if deadline is not None:
+                wait = max(0, min(wait, deadline - time.time()))
+            try:
+                frame, buffers = self._queue.get(timeout=wait)
+                break
+            except queue.Empty:
+                if not self.running and self._queue.empty():
+                    if self.error is not None:
+                        raise self.error
+                    return None
+                if deadline is not None and time.time() >= deadline:
+                    return None
+        with self._pool:
+            if self._held is not None:
+                self._free.append(self._held)
+            self._held = buffers
+            self._pool.notify()
+        return frame
+
+    def _run(self):
+        driver = self.driver
+        try:
+            driver.utility.lock_object()
+            try:
+                driver._measurement_continuous_arm()
+            finally:
+                driver.utility.unlock_object()
+
+            while not self._stop.is_set():
+                # wait in short steps so that stop requests are serviced; the
+                # session is only locked for each status query, so other
+                # users of the session are not held off while polling
+                if not driver._measurement_continuous_wait(self.poll_timeout):
+                    continue
+                driver.utility.lock_object()
+                try:
+                    raw = [driver._measurement_continuous_read(ch) for ch in self.channels]
+                    driver._measurement_continuous_arm()
+                finally:
+                    driver.utility.unlock_object()
+
+                buffers = self._get_buffers()
+                if buffers is None:
+                    break
+                self._put(self._decode(raw, buffers), buffers)
+        except Exception as e:
+            self.error = e
+
+    def _get_buffers(self):
+        "Take a set of buffers from the free list, or None if stopped"
+        with self._pool:
+            while not self._free:
+                if self._stop.is_set():
+                    return None
+                self._pool.wait(self.poll_timeout)
+            return self._free.pop()
+
+    def _release_buffers(self, buffers):
+        with self._pool:
+            self._free.append(buffers)
+            self._pool.notify()
+
+    def _decode(self, raw, buffers):
+        frame = dict()
+        for ch, (trace, data) in zip(self.channels, raw):
+            buf = buffers.get(ch)
+            if buf is None or len(buf) < len(data) or buf.dtype != data.dtype:
+                buf = np.empty(len(data), data.dtype)
+                buffers[ch] = buf
+            buf[:len(data)] = data
+            trace.y_raw = buf[:len(data)]
+            frame[ch] = trace
+        return frame
+
+    def _put(self, frame, buffers):
+        self.frames += 1
+        if self.policy == 'drop_oldest':
+            while True:
+                try:
+                    self._queue.put_nowait((frame, buffers))
+                    return
+                except queue.Full:
+                    try:
+                        old_frame, old_buffers = self._queue.get_nowait()
+                        self._release_buffers(old_buffers)
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+        while not self._stop.is_set():
+            try:
+                self._queue.put((frame, buffers), timeout=self.poll_timeout)
+                return
+            except queue.Full:
+                pass
+        self._release_buffers(buffers)
@@ -24,8 +24,6 @@ THE SOFTWARE.
 
 """
 
-import time
-
 from .. import ivi
 from .. import extra
 
@@ -103,6 +101,7 @@ class SelfTest(object):
     def __init__(self, *args, **kwargs):
         super(SelfTest, self).__init__(*args, **kwargs)
 
+        # maximum time for the self test to complete, in seconds
         self._self_test_delay = 10
 
     def _utility_self_test(self):
@@ -111,8 +110,7 @@ class SelfTest(object):
         if not self._driver_operation_simulate:
             self._write("*TST?")
             # wait for test to complete
-            time.sleep(self._self_test_delay)
-            code = int(self._read())
+            code = int(self._read_with_timeout(self._self_test_delay))
             if code != 0:
                 message = "Self test failed"
         return (code, message)
@@ -24,15 +24,17 @@ THE SOFTWARE.
 
 """
 
+import numpy as np
+
 from .. import ivi
 from .. import dcpwr
 from .. import extra
 from . import common
 
 TrackingType = set(['floating'])
-TriggerSourceMapping = {
+TriggerSourceMapping = ivi.ValueMapping({
         'immediate': 'imm',
-        'bus': 'bus'}
+        'bus': 'bus'})
 
 class Base(common.IdnCommand, common.ErrorQuery, common.Reset, common.SelfTest,
            dcpwr.Base,
@@ -50,6 +52,7 @@ class Base(common.IdnCommand, common.ErrorQuery, common.Reset, common.SelfTest,
         self._self_test_delay = 5
 
         self._output_count = 1
+        self._output_selected = 0
 
         self._output_spec = [
             {
@@ -109,13 +112,43 @@ class Base(common.IdnCommand, common.ErrorQuery, common.Reset, common.SelfTest,
             return '1'
         return '0'
 
-    def _utility_disable(self):
-        pass
-
-    def _utility_lock_object(self):
-        pass
+    def _select_output(self, index):
+        """
+        Returns the command prefix that selects the output, or an empty string
+        if the output is already selected.  The selection is only recorded by
+        _set_output_selected once the command has been sent.
+        """
+        if self._output_count < 2:
+            return ''
+        if self._get_cache_valid('output_selected') and self._output_selected == index:
+            return ''
+        return "instrument:nselect %d;:" % (index+1)
+
+    def _set_output_selected(self, index):
+        self._output_selected = index
+        self._set_cache_valid(True, 'output_selected')
+
+    def _write_output(self, index, data):
+        "Write a command to an output, selecting it first if required"
+        self._write(self._select_output(index) + data)
+        self._set_output_selected(index)
+
+    def _ask_output(self, index, data):
+        "Query an output, selecting it first if required"
+        resp = self._ask(self._select_output(index) + data)
+        self._set_output_selected(index)
+        return resp
+
+    def _remote(self):
+        # front panel may have changed the selected output
+        self._set_cache_valid(False, 'output_selected')
+        return super(Base, self)._remote()
+
+    def _local(self):
+        self._set_cache_valid(False, 'output_selected')
+        return super(Base, self)._local()
 
-    def _utility_unlock_object(self):
+    def _utility_disable(self):
         pass
 
     def _init_outputs(self):
@@ -145,9 +178,7 @@ class Base(common.IdnCommand, common.ErrorQuery, common.Reset, common.SelfTest,
     def _get_output_current_limit(self, index):
         index = ivi.get_index(self._output_name, index)
         if not self._driver_operation_simulate and not self._get_cache_valid(index=index):
-            if self._output_count > 1:
-                self._write("instrument:nselect %d" % (index+1))
-            self._output_current_limit[index] = float(self._ask("source:current:level?"))
+            self._output_current_limit[index] = float(self._ask_output(index, "source:current:level?"))
             self._set_cache_valid(index=index)
         return self._output_current_limit[index]
     
@@ -157,18 +188,14 @@ class Base(common.IdnCommand, common.ErrorQuery, common.Reset, common.SelfTest,
         if value < 0 or value > self._output_spec[index]['current_max']:
             raise ivi.OutOfRangeException()
         if not self._driver_operation_simulate:
-            if self._output_count > 1:
-                self._write("instrument:nselect %d" % (index+1))
-            self._write("source:current:level %.6f" % value)
+            self._write_output(index, "source:current:level %.6f" % value)
         self._output_current_limit[index] = value
         self._set_cache_valid(index=index)
     
     def _get_output_current_limit_behavior(self, index):
         index = ivi.get_index(self._output_name, index)
         if not self._driver_operation_simulate and not self._get_cache_valid(index=index):
-            if self._output_count > 1:
-                self._write("instrument:nselect %d" % (index+1))
-            value = self._ask("source:current:protection:state?") == self._get_bool_str(True)
+            value = self._ask_output(index, "source:current:protection:state?") == self._get_bool_str(True)
             if value:
                 self._output_current_limit_behavior[index] = 'trip'
             else:
@@ -181,9 +208,7 @@ class Base(common.IdnCommand, common.ErrorQuery, common.Reset, common.SelfTest,
         if value not in dcpwr.CurrentLimitBehavior:
             raise ivi.ValueNotSupportedException()
         if not self._driver_operation_simulate:
-            if self._output_count > 1:
-                self._write("instrument:nselect %d" % (index+1))
-            self._write("source:current:protection:state %s" % self._get_bool_str(value == 'trip'))
+            self._write_output(index, "source:current:protection:state %s" % self._get_bool_str(value == 'trip'))
         self._output_current_limit_behavior[index] = value
         for k in range(self._output_count):
             self._set_cache_valid(valid=False,index=k)
@@ -192,9 +217,7 @@ class Base(common.IdnCommand, common.ErrorQuery, common.Reset, common.SelfTest,
     def _get_output_enabled(self, index):
         index = ivi.get_index(self._output_name, index)
         if not self._driver_operation_simulate and not self._get_cache_valid(index=index):
-            if self._output_count > 1:
-                self._write("instrument:nselect %d" % (index+1))
-            self._output_enabled[index] = self._ask("output?") == self._get_bool_str(True)
+            self._output_enabled[index] = self._ask_output(index, "output?") == self._get_bool_str(True)
             self._set_cache_valid(index=index)
         return self._output_enabled[index]
     
@@ -202,9 +225,7 @@ class Base(common.IdnCommand, common.ErrorQuery, common.Reset, common.SelfTest,
         index = ivi.get_index(self._output_name, index)
         value = bool(value)
         if not self._driver_operation_simulate:
-            if self._output_count > 1:
-                self._write("instrument:nselect %d" % (index+1))
-            self._write("output %s" % self._get_bool_str(value))
+            self._write_output(index, "output %s" % self._get_bool_str(value))
         self._output_enabled[index] = value
         for k in range(self._output_count):
             self._set_cache_valid(valid=False,index=k)
@@ -213,9 +234,7 @@ class Base(common.IdnCommand, common.ErrorQuery, common.Reset, common.SelfTest,
     def _get_output_ovp_enabled(self, index):
         index = ivi.get_index(self._output_name, index)
         if not self._driver_operation_simulate and not self._get_cache_valid(index=index):
-            if self._output_count > 1:
-                self._write("instrument:nselect %d" % (index+1))
-            self._output_ovp_enabled[index] = self._ask("source:voltage:protection:state?") == self._get_bool_str(True)
+            self._output_ovp_enabled[index] = self._ask_output(index, "source:voltage:protection:state?") == self._get_bool_str(True)
             self._set_cache_valid(index=index)
         return self._output_ovp_enabled[index]
     
@@ -223,18 +242,14 @@ class Base(common.IdnCommand, common.ErrorQuery, common.Reset, common.SelfTest,
         index = ivi.get_index(self._output_name, index)
         value = bool(value)
         if not self._driver_operation_simulate:
-            if self._output_count > 1:
-                self._write("instrument:nselect %d" % (index+1))
-            self._write("source:voltage:protection:state %s" % self._get_bool_str(value))
+            self._write_output(index, "source:voltage:protection:state %s" % self._get_bool_str(value))
         self._output_ovp_enabled[index] = value
         self._set_cache_valid(index=index)
     
     def _get_output_ovp_limit(self, index):
         index = ivi.get_index(self._output_name, index)
         if not self._driver_operation_simulate and not self._get_cache_valid(index=index):
-            if self._output_count > 1:
-                self._write("instrument:nselect %d" % (index+1))
-            self._output_ovp_limit[index] = float(self._ask("source:voltage:protection:level?"))
+            self._output_ovp_limit[index] = float(self._ask_output(index, "source:voltage:protection:level?"))
             self._set_cache_valid(index=index)
         return self._output_ovp_limit[index]
     
@@ -248,18 +263,14 @@ class Base(common.IdnCommand, common.ErrorQuery, common.Reset, common.SelfTest,
             if value > 0 or value < self._output_spec[index]['ovp_max']:
                 raise ivi.OutOfRangeException()
         if not self._driver_operation_simulate:
-            if self._output_count > 1:
-                self._write("instrument:nselect %d" % (index+1))
-            self._write("source:voltage:protection:level %.6f" % value)
+            self._write_output(index, "source:voltage:protection:level %.6f" % value)
         self._output_ovp_limit[index] = value
         self._set_cache_valid(index=index)
     
     def _get_output_voltage_level(self, index):
         index = ivi.get_index(self._output_name, index)
         if not self._driver_operation_simulate and not self._get_cache_valid(index=index):
-            if self._output_count > 1:
-                self._write("instrument:nselect %d" % (index+1))
-            self._output_voltage_level[index] = float(self._ask("source:voltage:level?"))
+            self._output_voltage_level[index] = float(self._ask_output(index, "source:voltage:level?"))
             self._set_cache_valid(index=index)
         return self._output_voltage_level[index]
     
@@ -273,9 +284,7 @@ class Base(common.IdnCommand, common.ErrorQuery, common.Reset, common.SelfTest,
             if value > 0 or value < self._output_spec[index]['voltage_max']:
                 raise ivi.OutOfRangeException()
         if not self._driver_operation_simulate:
-            if self._output_count > 1:
-                self._write("instrument:nselect %d" % (index+1))
-            self._write("source:voltage:level %.6f" % value)
+            self._write_output(index, "source:voltage:level %.6f" % value)
         self._output_voltage_level[index] = value
         self._set_cache_valid(index=index)
     
@@ -290,15 +299,13 @@ class Base(common.IdnCommand, common.ErrorQuery, common.Reset, common.SelfTest,
         if len(self._output_spec[index]['range']) < 2:
             # do not set range if there is only one range
             return
-        k = dcpwr.get_range(self._output_spec[index]['range'], t, range_val)
+        k = self._get_output_range(index, 'range', t, range_val)
         if k is None:
             raise ivi.OutOfRangeException()
         self._output_spec[index]['voltage_max'] = self._output_spec[index]['range'][k][0]
         self._output_spec[index]['current_max'] = self._output_spec[index]['range'][k][1]
         if not self._driver_operation_simulate:
-            if self._output_count > 1:
-                self._write("instrument:nselect %d" % (index+1))
-            self._write("source:voltage:range %s" % k)
+            self._write_output(index, "source:voltage:range %s" % k)
     
     def _output_query_current_limit_max(self, index, voltage_level):
         index = ivi.get_index(self._output_name, index)
@@ -337,9 +344,7 @@ class Base(common.IdnCommand, common.ErrorQuery, common.Reset, common.SelfTest,
     
     def _output_reset_output_protection(self, index):
         if not self._driver_operation_simulate:
-            if self._output_count > 1:
-                self._write("instrument:nselect %d" % (index+1))
-            self._write("source:voltage:protection:clear")
+            self._write_output(index, "source:voltage:protection:clear")
 
 class OCP(extra.dcpwr.OCP):
 
@@ -355,9 +360,7 @@ class OCP(extra.dcpwr.OCP):
     def _get_output_ocp_enabled(self, index):
         index = ivi.get_index(self._output_name, index)
         if not self._driver_operation_simulate and not self._get_cache_valid(index=index):
-            if self._output_count > 1:
-                self._write("instrument:nselect %d" % (index+1))
-            self._output_ocp_enabled[index] = self._ask("source:current:protection:state?") == self._get_bool_str(True)
+            self._output_ocp_enabled[index] = self._ask_output(index, "source:current:protection:state?") == self._get_bool_str(True)
             self._set_cache_valid(index=index)
         return self._output_ocp_enabled[index]
     
@@ -365,18 +368,14 @@ class OCP(extra.dcpwr.OCP):
         index = ivi.get_index(self._output_name, index)
         value = bool(value)
         if not self._driver_operation_simulate:
-            if self._output_count > 1:
-                self._write("instrument:nselect %d" % (index+1))
-            self._write("source:current:protection:state %s" % self._get_bool_str(value))
+            self._write_output(index, "source:current:protection:state %s" % self._get_bool_str(value))
         self._output_ocp_enabled[index] = value
         self._set_cache_valid(index=index)
     
     def _get_output_ocp_limit(self, index):
         index = ivi.get_index(self._output_name, index)
         if not self._driver_operation_simulate and not self._get_cache_valid(index=index):
-            if self._output_count > 1:
-                self._write("instrument:nselect %d" % (index+1))
-            self._output_ocp_limit[index] = float(self._ask("source:current:protection:level?"))
+            self._output_ocp_limit[index] = float(self._ask_output(index, "source:current:protection:level?"))
             self._set_cache_valid(index=index)
         return self._output_ocp_limit[index]
     
@@ -386,27 +385,21 @@ class OCP(extra.dcpwr.OCP):
         if value < 0 or value > self._output_spec[index]['ocp_max']:
             raise ivi.OutOfRangeException()
         if not self._driver_operation_simulate:
-            if self._output_count > 1:
-                self._write("instrument:nselect %d" % (index+1))
-            self._write("source:current:protection:level %.6f" % value)
+            self._write_output(index, "source:current:protection:level %.6f" % value)
         self._output_ocp_limit[index] = value
         self._set_cache_valid(index=index)
     
     def _output_reset_output_protection(self, index):
         if not self._driver_operation_simulate:
-            if self._output_count > 1:
-                self._write("instrument:nselect %d" % (index+1))
-            self._write("source:voltage:protection:clear")
+            self._write_output(index, "source:voltage:protection:clear")
             self._write("source:current:protection:clear")
 
 class Trigger(dcpwr.Trigger):
     def _get_output_trigger_source(self, index):
         index = ivi.get_index(self._output_name, index)
         if not self._driver_operation_simulate and not self._get_cache_valid():
-            if self._output_count > 1:
-                self._write("instrument:nselect %d" % (index+1))
-            value = self._ask("trigger:source?").lower()
-            self._output_trigger_source[index] = [k for k,v in TriggerSourceMapping.items() if v==value][0]
+            value = self._ask_output(index, "trigger:source?").lower()
+            self._output_trigger_source[index] = TriggerSourceMapping.reverse(value)
         return self._output_trigger_source[index]
     
     def _set_output_trigger_source(self, index, value):
@@ -415,18 +408,14 @@ class Trigger(dcpwr.Trigger):
         if value not in TriggerSourceMapping:
             raise ivi.ValueNotSupportedException()
         if not self._driver_operation_simulate:
-            if self._output_count > 1:
-                self._write("instrument:nselect %d" % (index+1))
-            self._write("trigger:source %s" % TriggerSourceMapping[value])
+            self._write_output(index, "trigger:source %s" % TriggerSourceMapping[value])
         self._output_trigger_source[index] = value
         self._set_cache_valid(index=index)
     
     def _get_output_triggered_current_limit(self, index):
         index = ivi.get_index(self._output_name, index)
         if not self._driver_operation_simulate and not self._get_cache_valid(index=index):
-            if self._output_count > 1:
-                self._write("instrument:nselect %d" % (index+1))
-            self._output_triggered_current_limit[index] = float(self._ask("source:current:level:triggered?"))
+            self._output_triggered_current_limit[index] = float(self._ask_output(index, "source:current:level:triggered?"))
             self._set_cache_valid(index=index)
         return self._output_triggered_current_limit[index]
     
@@ -436,18 +425,14 @@ class Trigger(dcpwr.Trigger):
         if value < 0 or value > self._output_spec[index]['current_max']:
             raise ivi.OutOfRangeException()
         if not self._driver_operation_simulate:
-            if self._output_count > 1:
-                self._write("instrument:nselect %d" % (index+1))
-            self._write("source:current:level:triggered %.6f" % value)
+            self._write_output(index, "source:current:level:triggered %.6f" % value)
         self._output_triggered_current_limit[index] = value
         self._set_cache_valid(index=index)
     
     def _get_output_triggered_voltage_level(self, index):
         index = ivi.get_index(self._output_name, index)
         if not self._driver_operation_simulate and not self._get_cache_valid(index=index):
-            if self._output_count > 1:
-                self._write("instrument:nselect %d" % (index+1))
-            self._output_triggered_voltage_level[index] = float(self._ask("source:voltage:level:triggered?"))
+            self._output_triggered_voltage_level[index] = float(self._ask_output(index, "source:voltage:level:triggered?"))
             self._set_cache_valid(index=index)
         return self._output_triggered_voltage_level[index]
     
@@ -461,18 +446,14 @@ class Trigger(dcpwr.Trigger):
             if value > 0 or value < self._output_spec[index]['voltage_max']:
                 raise ivi.OutOfRangeException()
         if not self._driver_operation_simulate:
-            if self._output_count > 1:
-                self._write("instrument:nselect %d" % (index+1))
-            self._write("source:voltage:level:triggered %.6f" % value)
+            self._write_output(index, "source:voltage:level:triggered %.6f" % value)
         self._output_triggered_voltage_level[index] = value
         self._set_cache_valid(index=index)
     
     def _get_output_trigger_delay(self, index):
         index = ivi.get_index(self._output_name, index)
         if not self._driver_operation_simulate and not self._get_cache_valid(index=index):
-            if self._output_count > 1:
-                self._write("instrument:nselect %d" % (index+1))
-            self._output_trigger_delay[index] = float(self._ask("trigger:delay?"))
+            self._output_trigger_delay[index] = float(self._ask_output(index, "trigger:delay?"))
             self._set_cache_valid(index=index)
         return self._output_trigger_delay[index]
     
@@ -482,9 +463,7 @@ class Trigger(dcpwr.Trigger):
         if value < 0:
             raise ivi.OutOfRangeException()
         if not self._driver_operation_simulate:
-            if self._output_count > 1:
-                self._write("instrument:nselect %d" % (index+1))
-            self._write("trigger:delay %.6f" % value)
+            self._write_output(index, "trigger:delay %.6f" % value)
         self._output_trigger_delay[index] = value
         self._set_cache_valid(index=index)
     
@@ -507,12 +486,31 @@ class Measurement(dcpwr.Measurement):
             raise ivi.ValueNotSupportedException()
         if type == 'voltage':
             if not self._driver_operation_simulate:
-                if self._output_count > 1:
-                    self._write("instrument:nselect %d" % (index+1))
-                return float(self._ask("measure:voltage?"))
+                return float(self._ask_output(index, "measure:voltage?"))
         elif type == 'current':
             if not self._driver_operation_simulate:
-                if self._output_count > 1:
-                    self._write("instrument:nselect %d" % (index+1))
-                return float(self._ask("measure:current?"))
+                return float(self._ask_output(index, "measure:current?"))
         return 0
+
+    def _measure_outputs(self, outputs = None):
+        if outputs is None:
+            outputs = range(self._output_count)
+        indices = [ivi.get_index(self._output_name, k) for k in outputs]
+        if self._driver_operation_simulate or len(indices) == 0:
+            return np.zeros((len(indices), 2))
+        # pipeline all of the queries in a single message
+        cmd = list()
+        for i, k in enumerate(indices):
+            if i == 0:
+                prefix = self._select_output(k)
+            elif self._output_count < 2 or k == indices[i-1]:
+                prefix = ''
+            else:
+                prefix = "instrument:nselect %d;:" % (k+1)
+            cmd.append(prefix + "measure:voltage?")
+            cmd.append("measure:current?")
+        resp = self._ask(";:".join(cmd)).split(';')
+        self._set_output_selected(indices[-1])
+        if len(resp) != 2*len(indices):
+            raise ivi.UnexpectedResponseException()
+        return np.array([float(x) for x in resp]).reshape(-1, 2)
@@ -26,11 +26,13 @@ THE SOFTWARE.
 
 import math
 
+import numpy as np
+
 from .. import ivi
 from .. import dmm
 from . import common
 
-MeasurementFunctionMapping = {
+MeasurementFunctionMapping = ivi.ValueMapping({
         'dc_volts': 'volt',
         'ac_volts': 'volt:ac',
         'dc_current': 'curr',
@@ -42,7 +44,7 @@ MeasurementFunctionMapping = {
         'temperature': 'temp',
         'capacitance': 'cap',
         'continuity': 'cont',
-        'diode': 'diod'}
+        'diode': 'diod'})
 
 MeasurementRangeMapping = {
         'dc_volts': 'volt:dc:range',
@@ -72,10 +74,10 @@ MeasurementResolutionMapping = {
         'two_wire_resistance': 'res:resolution',
         'four_wire_resistance': 'fres:resolution'}
 
-TriggerSourceMapping = {
+TriggerSourceMapping = ivi.ValueMapping({
         'bus': 'bus',
         'external': 'ext',
-        'immediate': 'imm'}
+        'immediate': 'imm'})
 
 class Base(common.IdnCommand, common.ErrorQuery, common.Reset, common.SelfTest,
            ivi.Driver,
@@ -128,16 +130,10 @@ class Base(common.IdnCommand, common.ErrorQuery, common.Reset, common.SelfTest,
     def _utility_disable(self):
         pass
     
-    def _utility_lock_object(self):
-        pass
-    
-    def _utility_unlock_object(self):
-        pass
-    
     def _get_measurement_function(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":sense:function?").lower().strip('"')
-            value = [k for k,v in MeasurementFunctionMapping.items() if v==value][0]
+            value = MeasurementFunctionMapping.reverse(value)
             self._measurement_function = value
             self._set_cache_valid()
         return self._measurement_function
@@ -253,7 +249,7 @@ class Base(common.IdnCommand, common.ErrorQuery, common.Reset, common.SelfTest,
     def _get_trigger_source(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask("trigger:source?").lower()
-            value = [k for k,v in TriggerSourceMapping.items() if v==value][0]
+            value = TriggerSourceMapping.reverse(value)
             self._trigger_source = value
             self._set_cache_valid()
         return self._trigger_source
@@ -296,6 +292,15 @@ class Base(common.IdnCommand, common.ErrorQuery, common.Reset, common.SelfTest,
 class MultiPoint(dmm.MultiPoint):
     "Extension IVI methods for DMMs capable of acquiring measurements based on multiple triggers"
     
+    def __init__(self, *args, **kwargs):
+        super(MultiPoint, self).__init__(*args, **kwargs)
+        
+        # set in drivers for instruments that support FORM:DATA REAL,64
+        self._multi_point_binary_transfer = False
+        # set in drivers for instruments that support R? for removing readings
+        # from reading memory during an acquisition
+        self._multi_point_reading_memory_size = 0
+    
     def _get_trigger_measurement_complete_destination(self):
         return self._trigger_measurement_complete_destination
     
@@ -355,14 +360,51 @@ class MultiPoint(dmm.MultiPoint):
         self._trigger_multi_point_count = value
         self._set_cache_valid()
     
+    def _ask_for_binary_readings(self, cmd):
+        # readings are transferred as REAL,64 and the output format is then
+        # returned to ASCII, which the single point fetch and read expect
+        with self._session_lock:
+            self._write_setting(":format:border normal")
+            self._write(":format:data real,64")
+            try:
+                raw_data = self._ask_for_ieee_block(cmd)
+                self._read_raw() # flush buffer
+            finally:
+                self._write(":format:data ascii")
+        return np.frombuffer(raw_data, '>f8').astype(float)
+    
+    def _ask_for_multi_point_values(self, cmd):
+        if not self._multi_point_binary_transfer:
+            return self._ask_for_values(cmd, array=False)
+        return self._ask_for_binary_readings(cmd)
+    
+    def _measurement_remove_readings(self, max_count):
+        if self._driver_operation_simulate:
+            return super(MultiPoint, self)._measurement_remove_readings(max_count)
+        if not self._multi_point_reading_memory_size:
+            raise ivi.OperationNotSupportedException()
+        # the count and the removal must not be split by another thread
+        with self._session_lock:
+            points = int(self._ask("data:points?"))
+            # reading memory discards readings once it is full
+            overflow = points >= self._multi_point_reading_memory_size
+            max_count = min(points, max_count)
+            if max_count <= 0:
+                return np.zeros(0), overflow
+            if self._multi_point_binary_transfer:
+                return self._ask_for_binary_readings("r? %d" % max_count), overflow
+            raw_data = self._ask_for_ieee_block("r? %d" % max_count)
+            self._read_raw() # flush buffer
+        return np.array(raw_data.decode('ascii').split(','), dtype=float), overflow
+    
     def _measurement_fetch_multi_point(self, max_time, num_of_measurements = 0):
         if not self._driver_operation_simulate:
-            return self._ask_for_values(":fetch?", array=False)
+            return self._ask_for_multi_point_values(":fetch?")
         return [0.0 for i in range(self._trigger_multi_point_count*self._trigger_multi_point_sample_count)]
     
     def _measurement_read_multi_point(self, max_time, num_of_measurements = 0):
         if not self._driver_operation_simulate:
-            return self._ask_for_values(":read?", array=False)
+            return self._ask_for_multi_point_values(":read?")
         return [0.0 for i in range(self._trigger_multi_point_count*self._trigger_multi_point_sample_count)]
     
     
@@ -210,9 +210,6 @@ class tektronixAM5030(ivi.Driver):
                 error_code = 0
         return (error_code, error_message)
 
-    def _utility_lock_object(self):
-        pass
-
     def _utility_reset(self):
         if not self._driver_operation_simulate:
             self._write("init")
@@ -231,9 +228,6 @@ class tektronixAM5030(ivi.Driver):
                 message = "Self test failed"
         return (code, message)
 
-    def _utility_unlock_object(self):
-        pass
-
 
 
     def _get_amps(self):
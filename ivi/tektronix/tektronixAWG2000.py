@@ -24,21 +24,19 @@ THE SOFTWARE.
 
 """
 
-import time
-import struct
 from numpy import *
 
 from .. import ivi
 from .. import fgen
 
-StandardWaveformMapping = {
+StandardWaveformMapping = ivi.ValueMapping({
         'sine': 'sin',
         'square': 'squ',
         'triangle': 'tri',
         'ramp_up': 'ramp',
         #'ramp_down',
         #'dc'
-        }
+        })
 
 class tektronixAWG2000(ivi.Driver, fgen.Base, fgen.StdFunc, fgen.ArbWfm,
                 fgen.ArbSeq, fgen.SoftwareTrigger, fgen.Burst,
@@ -63,7 +61,7 @@ class tektronixAWG2000(ivi.Driver, fgen.Base, fgen.StdFunc, fgen.ArbWfm,
         self._arbitrary_sequence_length_max = 0
         self._arbitrary_sequence_length_min = 0
         
-        self._catalog_names = list()
+        self._catalog = ivi.Catalog()
         
         self._arbitrary_waveform_n = 0
         self._arbitrary_sequence_n = 0
@@ -79,6 +77,16 @@ class tektronixAWG2000(ivi.Driver, fgen.Base, fgen.StdFunc, fgen.ArbWfm,
         self._identity_specification_minor_version = 0
         self._identity_supported_instrument_models = ['AWG2005','AWG2020','AWG2021','AWG2040','AWG2041']
         
+        self._add_property('arbitrary.waveform.catalog_ttl',
+                        self._get_arbitrary_waveform_catalog_ttl,
+                        self._set_arbitrary_waveform_catalog_ttl,
+                        None,
+                        ivi.Doc("""
+                        Maximum age in seconds of the locally kept listing of the files in
+                        instrument memory before it is read back from the instrument, or None
+                        to keep it until the attribute cache is invalidated.
+                        """))
+        
         self._init_outputs()
     
     def _initialize(self, resource = None, id_query = False, reset = False, **keywargs):
@@ -151,9 +159,6 @@ class tektronixAWG2000(ivi.Driver, fgen.Base, fgen.StdFunc, fgen.ArbWfm,
             error_message = error_message.strip(' "')
         return (error_code, error_message)
     
-    def _utility_lock_object(self):
-        pass
-    
     def _utility_reset(self):
         if not self._driver_operation_simulate:
             self._write("*RST")
@@ -168,15 +173,11 @@ class tektronixAWG2000(ivi.Driver, fgen.Base, fgen.StdFunc, fgen.ArbWfm,
         if not self._driver_operation_simulate:
             self._write("*TST?")
             # wait for test to complete
-            time.sleep(60)
-            code = int(self._read())
+            code = int(self._read_with_timeout(60))
             if code != 0:
                 message = "Self test failed"
         return (code, message)
     
-    def _utility_unlock_object(self):
-        pass
-    
     
     
     def _init_outputs(self):
@@ -191,16 +192,27 @@ class tektronixAWG2000(ivi.Driver, fgen.Base, fgen.StdFunc, fgen.ArbWfm,
     
     
     def _load_catalog(self):
-        self._catalog = list()
-        self._catalog_names = list()
+        # catalog is kept up to date locally, only read it back when invalid
+        if self._get_cache_valid() and not self._catalog.expired():
+            return
+        entries = list()
         if not self._driver_operation_simulate:
             raw = self._ask(":memory:catalog:all?").lower()
             raw = raw.split(' ', 1)[1]
             
             l = raw.split(',')
             l = [s.strip('"') for s in l]
-            self._catalog = [l[i:i+3] for i in range(0, len(l), 3)]
-            self._catalog_names = [l[0] for l in self._catalog]
+            entries = [l[i:i+3] for i in range(0, len(l), 3)]
+        self._catalog.update(entries)
+        self._set_cache_valid()
+    
+    def _get_arbitrary_waveform_catalog_ttl(self):
+        return self._catalog.ttl
+    
+    def _set_arbitrary_waveform_catalog_ttl(self, value):
+        if value is not None:
+            value = float(value)
+        self._catalog.ttl = value
     
     def _get_output_operation_mode(self, index):
         index = ivi.get_index(self._output_name, index)
@@ -362,7 +374,7 @@ class tektronixAWG2000(ivi.Driver, fgen.Base, fgen.StdFunc, fgen.ArbWfm,
         if not self._driver_operation_simulate and not self._get_cache_valid(index=index):
             resp = self._ask(":fg:ch%d:shape?" % (index+1)).split(' ', 1)[1]
             value = resp.lower()
-            value = [k for k,v in StandardWaveformMapping.items() if v==value][0]
+            value = StandardWaveformMapping.reverse(value)
             self._output_standard_waveform_waveform[index] = value
             self._set_cache_valid(index=index)
         return self._output_standard_waveform_waveform[index]
@@ -425,7 +437,7 @@ class tektronixAWG2000(ivi.Driver, fgen.Base, fgen.StdFunc, fgen.ArbWfm,
             raise ivi.ValueNotSupportedException()
         # waveform must exist on arb
         self._load_catalog()
-        if value not in self._catalog_names:
+        if value not in self._catalog:
             raise ivi.ValueNotSupportedException()
         if not self._driver_operation_simulate:
             self._write(":ch%d:waveform \"%s\"" % (index+1, value))
@@ -458,33 +470,66 @@ class tektronixAWG2000(ivi.Driver, fgen.Base, fgen.StdFunc, fgen.ArbWfm,
         return self._arbitrary_waveform_quantum
     
     def _arbitrary_waveform_clear(self, handle):
-        pass
+        if not self._driver_operation_simulate:
+            self._write(":memory:delete \"%s\"" % handle)
+        self._catalog.remove(handle)
+        self._arbitrary_waveform_cache_evict(handle)
+    
+    def _arbitrary_waveform_exists(self, handle, size = None):
+        self._load_catalog()
+        entry = self._catalog.get(handle)
+        if entry is None:
+            return False
+        # entries are name, type, size in bytes
+        return size is None or (len(entry) > 2 and entry[2] != '' and int(entry[2]) == size)
     
     def _arbitrary_waveform_create(self, data):
+        buf = ivi.BlockBuffer()
+        try:
+            return self._arbitrary_waveform_upload(data, buf)
+        finally:
+            buf.close()
+    
+    def _arbitrary_waveform_upload(self, data, buf):
         y = None
         x = None
         if type(data) == list and type(data[0]) == float:
             # list
             y = array(data)
-        elif type(data) == ndarray and len(data.shape) == 1:
+        elif isinstance(data, ndarray) and len(data.shape) == 1:
             # 1D array
             y = data
-        elif type(data) == ndarray and len(data.shape) == 2 and data.shape[0] == 1:
+        elif isinstance(data, ndarray) and len(data.shape) == 2 and data.shape[0] == 1:
             # 2D array, hieght 1
             y = data[0]
-        elif type(data) == ndarray and len(data.shape) == 2 and data.shape[1] == 1:
+        elif isinstance(data, ndarray) and len(data.shape) == 2 and data.shape[1] == 1:
             # 2D array, width 1
             y = data[:,0]
-        else:
+        elif isinstance(data, (tuple, ndarray)) or (type(data) == list and type(data[0]) == tuple):
+            # x, y signal
             x, y = ivi.get_sig(data)
+        else:
+            # iterable of samples or sample arrays
+            y = data
         
         if x is None:
-            x = arange(0,len(y)) / 10e6
+            xincr = 1 / 10e6
+        else:
+            xincr = ivi.rms(diff(x))
+        
+        # clip at -1 and 1 and scale to 12 bits, MSB first
+        for c in ivi.iter_sample_chunks(y):
+            c = (clip(c, -1.0, 1.0) + 1) / 2
+            buf.write(floor(c * ((1 << 12) - 2) + 0.5).astype('>u2').tobytes())
         
-        if len(y) % self._arbitrary_waveform_quantum != 0:
+        if (len(buf) // 2) % self._arbitrary_waveform_quantum != 0:
             raise ivi.ValueNotSupportedException()
         
-        xincr = ivi.rms(diff(x))
+        # reuse the existing waveform if the same data is still in memory
+        key = self._arbitrary_waveform_cache_key(buf.chunks(), 'wfm', 12, xincr)
+        handle = self._arbitrary_waveform_cache_lookup(key)
+        if handle is not None:
+            return handle
         
         # get unused handle
         self._load_catalog()
@@ -492,7 +537,7 @@ class tektronixAWG2000(ivi.Driver, fgen.Base, fgen.StdFunc, fgen.ArbWfm,
         while not have_handle:
             self._arbitrary_waveform_n += 1
             handle = "w%04d.wfm" % self._arbitrary_waveform_n
-            have_handle = handle not in self._catalog_names
+            have_handle = handle not in self._catalog
         self._write(":data:destination \"%s\"" % handle)
         self._write(":wfmpre:bit_nr 12")
         self._write(":wfmpre:bn_fmt rp")
@@ -504,22 +549,10 @@ class tektronixAWG2000(ivi.Driver, fgen.Base, fgen.StdFunc, fgen.ArbWfm,
         self._write(":wfmpre:ymult %e" % (2/(1<<12)))
         self._write(":wfmpre:xincr %e" % xincr)
         
-        raw_data = b''
+        self._write_ieee_block_chunks(buf.chunks(), len(buf), ':curve ')
         
-        for f in y:
-            # clip at -1 and 1
-            if f > 1.0: f = 1.0
-            if f < -1.0: f = -1.0
-            
-            f = (f + 1) / 2
-            
-            # scale to 12 bits
-            i = int(f * ((1 << 12) - 2) + 0.5) & 0x000fffff
-            
-            # add to raw data, MSB first
-            raw_data = raw_data + struct.pack('>H', i)
-        
-        self._write_ieee_block(raw_data, ':curve ')
+        self._catalog.add(handle, 'wfm', len(buf))
+        self._arbitrary_waveform_cache_store(key, handle, len(buf))
         
         return handle
     
@@ -536,7 +569,12 @@ class tektronixAWG2000(ivi.Driver, fgen.Base, fgen.StdFunc, fgen.ArbWfm,
         return self._arbitrary_sequence_length_min
     
     def _arbitrary_clear_memory(self):
-        pass
+        self._load_catalog()
+        for handle in self._catalog.names():
+            if handle.endswith('.wfm'):
+                self._write(":memory:delete \"%s\"" % handle)
+                self._catalog.remove(handle)
+        self._arbitrary_waveform_cache_evict()
     
     def _arbitrary_sequence_clear(self, handle):
         pass
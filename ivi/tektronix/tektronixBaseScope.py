@@ -25,22 +25,25 @@ THE SOFTWARE.
 """
 
 import array
+import datetime
 import sys
 import time
 
+import numpy as np
+
 from .. import ivi
 from .. import scope
 from .. import scpi
 from .. import extra
 
-AcquisitionTypeMapping = {
+AcquisitionTypeMapping = ivi.ValueMapping({
         'normal': 'sample',
         'peak_detect': 'peakdetect',
         'high_resolution': 'hires',
         'average': 'average',
-        'envelope': 'envelope'}
+        'envelope': 'envelope'})
 VerticalCoupling = set(['ac', 'dc'])
-TriggerTypeMapping = {
+TriggerTypeMapping = ivi.ValueMapping({
         'edge': 'edge',
         'runt': 'pulse',
         'width': 'pulse',
@@ -49,19 +52,19 @@ TriggerTypeMapping = {
         #'immediate': '',
         'ac_line': 'edge',
         'logic': 'logic',
-        'bus': 'bus'}
-TriggerCouplingMapping = {
+        'bus': 'bus'})
+TriggerCouplingMapping = ivi.ValueMapping({
         'ac': 'ac',
         'dc': 'dc',
         'hf_reject': 'hfrej',
         'lf_reject': 'lfrej',
-        'noise_reject': 'noiserej'}
-TVTriggerEventMapping = {'field1': 'odd',
+        'noise_reject': 'noiserej'})
+TVTriggerEventMapping = ivi.ValueMapping({'field1': 'odd',
         'field2': 'even',
         'any_field': 'allfields',
         'any_line': 'alllines',
-        'line_number': 'numeric'}
-TVTriggerFormatMapping = {'ntsc': 'ntsc',
+        'line_number': 'numeric'})
+TVTriggerFormatMapping = ivi.ValueMapping({'ntsc': 'ntsc',
         'pal': 'pal',
         'secam': 'secam',
         'bilevelcustom': 'bilevelcustom',
@@ -79,24 +82,24 @@ TVTriggerFormatMapping = {'ntsc': 'ntsc',
         'hd1080p25' : 'hd1080p25',
         'hd1080p30' : 'hd1080p30',
         'hd1080p50' : 'hd1080p50',
-        'hd1080p60' : 'hd1080p60'}
-PolarityMapping = {'positive': 'positive',
-        'negative': 'negative'}
-PolarityMapping3 = {'positive': 'positive',
+        'hd1080p60' : 'hd1080p60'})
+PolarityMapping = ivi.ValueMapping({'positive': 'positive',
+        'negative': 'negative'})
+PolarityMapping3 = ivi.ValueMapping({'positive': 'positive',
         'negative': 'negative',
-        'either': 'either'}
-GlitchConditionMapping = {'less_than': 'lessthan',
+        'either': 'either'})
+GlitchConditionMapping = ivi.ValueMapping({'less_than': 'lessthan',
         'greater_than': 'morethan',
         'equal': 'equal',
-        'unequal': 'unequal'}
-WidthConditionMapping = {'within': 'within', 'outside': 'outside'}
+        'unequal': 'unequal'})
+WidthConditionMapping = ivi.ValueMapping({'within': 'within', 'outside': 'outside'})
 SampleModeMapping = {'real_time': 'rtim',
         'equivalent_time': 'etim',
         'segmented': 'segm'}
-SlopeMapping = {
+SlopeMapping = ivi.ValueMapping({
         'positive': 'rise',
         'negative': 'fall',
-        'either': 'either'}
+        'either': 'either'})
 MeasurementFunctionMapping = {
         'rise_time': 'rise',
         'fall_time': 'fall',
@@ -158,7 +161,21 @@ TimebaseModeMapping = {
         'main': 'main',
         'window': 'window',
         'xy': 'xy'}
-TriggerModifierMapping = {'none': 'normal', 'auto': 'auto'}
+TriggerModifierMapping = ivi.ValueMapping({'none': 'normal', 'auto': 'auto'})
+CurveFormatMapping = {
+        ('RP', 1): 'B',
+        ('RP', 2): 'H',
+        ('RI', 1): 'b',
+        ('RI', 2): 'h',
+        ('FP', 4): 'f'}
+
+def parse_fastframe_timestamp(s):
+    "Parse FastFrame time stamp (dd mmm yyyy hh:mm:ss.sss sss sss sss) to a datetime object"
+    s = s.strip().strip('"')
+    t, frac = s.rsplit('.', 1)
+    t = datetime.datetime.strptime(t, '%d %b %Y %H:%M:%S')
+    # datetime resolution is limited to microseconds
+    return t + datetime.timedelta(seconds=float('0.' + frac.replace(' ', '')))
 
 class tektronixBaseScope(scpi.common.IdnCommand, scpi.common.Reset, scpi.common.Memory,
                          scpi.common.SystemSetup,
@@ -168,6 +185,7 @@ class tektronixBaseScope(scpi.common.IdnCommand, scpi.common.Reset, scpi.common.
                          scope.ContinuousAcquisition, scope.AverageAcquisition,
                          scope.TriggerModifier, scope.AutoSetup,
                          extra.common.Screenshot,
+                         extra.scope.SegmentedWaveform, extra.scope.DigitalWaveform,
                          ivi.Driver):
     "Tektronix generic IVI oscilloscope driver"
 
@@ -199,6 +217,7 @@ class tektronixBaseScope(scpi.common.IdnCommand, scpi.common.Reset, scpi.common.
         self._bandwidth = 1e9
 
         self._horizontal_divisions = 10
+        self._measurement_slot_count = 4
         self._vertical_divisions = 10
 
         self._acquisition_segmented_count = 2
@@ -395,12 +414,6 @@ class tektronixBaseScope(scpi.common.IdnCommand, scpi.common.Reset, scpi.common.
     def _utility_disable(self):
         pass
 
-    def _utility_lock_object(self):
-        pass
-
-    def _utility_unlock_object(self):
-        pass
-
     def _init_channels(self):
         try:
             super(tektronixBaseScope, self)._init_channels()
@@ -636,7 +649,7 @@ class tektronixBaseScope(scpi.common.IdnCommand, scpi.common.Reset, scpi.common.
     def _get_acquisition_type(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":acquire:mode?").lower()
-            self._acquisition_type = [k for k,v in AcquisitionTypeMapping.items() if v==value][0]
+            self._acquisition_type = AcquisitionTypeMapping.reverse(value)
             self._set_cache_valid()
         return self._acquisition_type
 
@@ -873,7 +886,7 @@ class tektronixBaseScope(scpi.common.IdnCommand, scpi.common.Reset, scpi.common.
     def _get_trigger_coupling(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":trigger:a:edge:coupling?").lower()
-            self._trigger_coupling = [k for k,v in TriggerCouplingMapping.items() if v==value][0]
+            self._trigger_coupling = TriggerCouplingMapping.reverse(value)
         return self._trigger_coupling
 
     def _set_trigger_coupling(self, value):
@@ -918,7 +931,7 @@ class tektronixBaseScope(scpi.common.IdnCommand, scpi.common.Reset, scpi.common.
     def _get_trigger_edge_slope(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":trigger:a:edge:slope?").lower()
-            self._trigger_edge_slope = [k for k,v in SlopeMapping.items() if v==value][0]
+            self._trigger_edge_slope = SlopeMapping.reverse(value)
             self._set_cache_valid()
         return self._trigger_edge_slope
 
@@ -1020,7 +1033,7 @@ class tektronixBaseScope(scpi.common.IdnCommand, scpi.common.Reset, scpi.common.
             elif value == 'video':
                 value = 'tv'
             #else:
-            #    value = [k for k,v in TriggerTypeMapping.items() if v==value][0]
+            #    value = TriggerTypeMapping.reverse(value)
             self._trigger_type = value
             self._set_cache_valid()
         return self._trigger_type
@@ -1055,7 +1068,7 @@ class tektronixBaseScope(scpi.common.IdnCommand, scpi.common.Reset, scpi.common.
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":trigger:a:video:sync?").lower()
             # may need processing
-            self._trigger_tv_trigger_event = [k for k,v in TVTriggerEventMapping.items() if v==value][0]
+            self._trigger_tv_trigger_event = TVTriggerEventMapping.reverse(value)
             self._set_cache_valid()
         return self._trigger_tv_trigger_event
 
@@ -1087,7 +1100,7 @@ class tektronixBaseScope(scpi.common.IdnCommand, scpi.common.Reset, scpi.common.
     def _get_trigger_tv_polarity(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":trigger:a:video:polarity?").lower()
-            self._trigger_tv_polarity = [k for k,v in PolarityMapping.items() if v==value][0]
+            self._trigger_tv_polarity = PolarityMapping.reverse(value)
             self._set_cache_valid()
         return self._trigger_tv_polarity
 
@@ -1102,7 +1115,7 @@ class tektronixBaseScope(scpi.common.IdnCommand, scpi.common.Reset, scpi.common.
     def _get_trigger_tv_signal_format(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":trigger:a:video:standard?").lower()
-            self._trigger_tv_signal_format = [k for k,v in TVTriggerFormatMapping.items() if v==value][0]
+            self._trigger_tv_signal_format = TVTriggerFormatMapping.reverse(value)
             self._set_cache_valid()
         return self._trigger_tv_signal_format
 
@@ -1149,7 +1162,7 @@ class tektronixBaseScope(scpi.common.IdnCommand, scpi.common.Reset, scpi.common.
     def _get_trigger_runt_polarity(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":trigger:a:runt:polarity?").lower()
-            self._trigger_runt_polarity = [k for k,v in PolarityMapping3.items() if v==value][0]
+            self._trigger_runt_polarity = PolarityMapping3.reverse(value)
             self._set_cache_valid()
         return self._trigger_runt_polarity
 
@@ -1167,7 +1180,7 @@ class tektronixBaseScope(scpi.common.IdnCommand, scpi.common.Reset, scpi.common.
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":trigger:a:pulsewidth:when?").lower()
             if value in GlitchConditionMapping.values():
-                self._trigger_glitch_condition = [k for k,v in GlitchConditionMapping.items() if v==value][0]
+                self._trigger_glitch_condition = GlitchConditionMapping.reverse(value)
                 self._set_cache_valid()
         return self._trigger_glitch_condition
 
@@ -1202,7 +1215,7 @@ class tektronixBaseScope(scpi.common.IdnCommand, scpi.common.Reset, scpi.common.
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":trigger:a:pulsewidth:when?").lower()
             if value in WidthConditionMapping.values():
-                self._trigger_width_condition = [k for k,v in WidthConditionMapping.items() if v==value][0]
+                self._trigger_width_condition = WidthConditionMapping.reverse(value)
                 self._set_cache_valid()
         return self._trigger_width_condition
 
@@ -1243,7 +1256,7 @@ class tektronixBaseScope(scpi.common.IdnCommand, scpi.common.Reset, scpi.common.
     def _get_trigger_width_polarity(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":trigger:a:pulsewidth:polarity?").lower()
-            self._trigger_width_polarity = [k for k,v in PolarityMapping.items() if v==value][0]
+            self._trigger_width_polarity = PolarityMapping.reverse(value)
             self._set_cache_valid()
         return self._trigger_width_polarity
 
@@ -1261,21 +1274,14 @@ class tektronixBaseScope(scpi.common.IdnCommand, scpi.common.Reset, scpi.common.
     def _set_trigger_ac_line_slope(self, value):
         self._set_trigger_edge_slope(value)
 
-    def _measurement_fetch_waveform(self, index):
-        index = ivi.get_index(self._channel_name, index)
-
-        if self._driver_operation_simulate:
-            return ivi.TraceYT()
-
-        self._write(":data:source %s" % self._channel_name[index])
-        self._write(":data:encdg fastest")
-        self._write(":data:width 2")
-        self._write(":data:start 1")
-        self._write(":data:stop 1e10")
+    def _setup_waveform_transfer(self, index):
+        self._write_setting(":data:source %s" % self._channel_name[index])
+        self._write_setting(":data:encdg fastest")
+        self._write_setting(":data:width 2")
+        self._write_setting(":data:start 1")
+        self._write_setting(":data:stop 1e10")
 
-        trace = ivi.TraceYT()
-
-        # Read preamble
+    def _read_waveform_preamble(self, trace, envelope = False):
         pre = self._ask(":wfmoutpre?").split(';')
 
         acq_format = pre[7].strip().upper()
@@ -1291,38 +1297,165 @@ class tektronixBaseScope(scpi.common.IdnCommand, scpi.common.Reset, scpi.common.
         trace.y_reference = int(float(pre[15]))
         trace.y_origin = float(pre[16])
 
-        if acq_format != 'Y':
-            raise UnexpectedResponseException()
+        if envelope and acq_format != 'ENV':
+            raise scope.InvalidAcquisitionTypeException()
+
+        if not envelope and acq_format != 'Y':
+            raise ivi.UnexpectedResponseException()
 
         if point_enc != 'BINARY':
-            raise UnexpectedResponseException()
+            raise ivi.UnexpectedResponseException()
+
+        if (point_fmt, point_size) not in CurveFormatMapping:
+            raise ivi.UnexpectedResponseException()
+
+        if point_fmt == 'FP':
+            trace.y_increment = 1
+            trace.y_reference = 0
+            trace.y_origin = 0
+
+        return (points, point_size, point_fmt, byte_order)
+
+    def _measurement_fetch_waveform(self, index):
+        index = ivi.get_index(self._channel_name, index)
+
+        if self._driver_operation_simulate:
+            return ivi.TraceYT()
+
+        self._setup_waveform_transfer(index)
+
+        trace = ivi.TraceYT()
+
+        # Read preamble
+        points, point_size, point_fmt, byte_order = self._read_waveform_preamble(trace)
 
         # Read waveform data
         raw_data = self._ask_for_ieee_block(":curve?")
         self._read_raw() # flush buffer
 
         # Store in trace object
-        if point_fmt == 'RP' and point_size == 1:
-            trace.y_raw = array.array('B', raw_data[0:points*point_size])
-        elif point_fmt == 'RP' and point_size == 2:
-            trace.y_raw = array.array('H', raw_data[0:points*point_size])
-        elif point_fmt == 'RI' and point_size == 1:
-            trace.y_raw = array.array('b', raw_data[0:points*point_size])
-        elif point_fmt == 'RI' and point_size == 2:
-            trace.y_raw = array.array('h', raw_data[0:points*point_size])
-        elif point_fmt == 'FP' and point_size == 4:
-            trace.y_increment = 1
-            trace.y_reference = 0
-            trace.y_origin = 0
-            trace.y_raw = array.array('f', raw_data[0:points*point_size])
-        else:
-            raise UnexpectedResponseException()
+        trace.y_raw = array.array(CurveFormatMapping[(point_fmt, point_size)], raw_data[0:points*point_size])
 
         if (byte_order == 'LSB') != (sys.byteorder == 'little'):
             trace.y_raw.byteswap()
 
         return trace
 
+    def _measurement_fetch_digital_waveform(self, packed = False):
+        if self._digital_channel_count == 0:
+            raise ivi.OperationNotSupportedException()
+
+        if self._driver_operation_simulate:
+            return ivi.TraceYT()
+
+        # All digital channels in a single transfer, one bit per channel
+        self._write_setting(":data:source digital")
+        self._write_setting(":data:encdg fastest")
+        self._write_setting(":data:width 2")
+        self._write_setting(":data:start 1")
+        self._write_setting(":data:stop 1e10")
+
+        trace = ivi.TraceYT()
+
+        # Read preamble
+        points, point_size, point_fmt, byte_order = self._read_waveform_preamble(trace)
+
+        trace.y_increment = 1
+        trace.y_reference = 0
+        trace.y_origin = 0
+
+        # Read waveform data
+        raw_data = self._ask_for_ieee_block(":curve?")
+        self._read_raw() # flush buffer
+
+        dtype = np.dtype(CurveFormatMapping[(point_fmt, point_size)])
+        dtype = dtype.newbyteorder('<' if byte_order == 'LSB' else '>')
+        data = np.frombuffer(raw_data[0:points*point_size], dtype).astype(np.uint16)
+
+        # Store in trace object
+        if packed:
+            trace.y_raw = data
+        else:
+            trace.y_raw = ivi.unpack_bits(data, self._digital_channel_count)
+
+        return trace
+
+    def _measurement_iter_waveform_chunks(self, index, chunk_points = 1000000):
+        index = ivi.get_index(self._channel_name, index)
+
+        if self._driver_operation_simulate:
+            return
+
+        self._setup_waveform_transfer(index)
+
+        trace = ivi.TraceYT()
+
+        # Read preamble
+        points, point_size, point_fmt, byte_order = self._read_waveform_preamble(trace)
+
+        dtype = np.dtype(CurveFormatMapping[(point_fmt, point_size)])
+        dtype = dtype.newbyteorder('<' if byte_order == 'LSB' else '>')
+
+        # Read waveform data as it arrives; the session lock is held until
+        # the transfer completes or the generator is closed
+        with self._session_lock:
+            self._write(":curve?")
+            block = self._read_ieee_block_chunks(chunk_points*point_size)
+            offset = 0
+            try:
+                for raw_data in block:
+                    y_raw = np.frombuffer(raw_data, dtype)[0:max(points-offset, 0)]
+                    if len(y_raw) > 0:
+                        yield trace.chunk(offset, y_raw)
+                    offset += len(y_raw)
+            finally:
+                block.close()
+                self._read_raw() # flush buffer
+
+    def _measurement_fetch_waveform_segmented(self, index):
+        index = ivi.get_index(self._channel_name, index)
+
+        if self._driver_operation_simulate:
+            return ivi.TraceYTSegmented()
+
+        count = int(self._ask(":horizontal:fastframe:count?"))
+
+        self._setup_waveform_transfer(index)
+
+        # the frame range also applies to single waveform transfers, so it is
+        # restored afterwards
+        frames = self._ask(":data:framestart?;:data:framestop?").split(';')
+        self._write(":data:framestart 1")
+        self._write(":data:framestop %d" % count)
+
+        trace = ivi.TraceYTSegmented()
+
+        try:
+            # Read preamble; scaling is common to all frames
+            points, point_size, point_fmt, byte_order = self._read_waveform_preamble(trace)
+
+            # Read all frames in one transfer
+            raw_data = self._ask_for_ieee_block(":curve?")
+            self._read_raw() # flush buffer
+        finally:
+            self._write(":data:framestart %s" % frames[0].strip())
+            self._write(":data:framestop %s" % frames[-1].strip())
+
+        if len(raw_data) != count*points*point_size:
+            raise ivi.UnexpectedResponseException()
+
+        # Read time stamps of all frames in one query
+        ts = self._ask(":horizontal:fastframe:timestamp:all:%s? 1, %d" % (self._channel_name[index], count))
+        ts = [parse_fastframe_timestamp(x) for x in ts.split(',')]
+
+        # Store in trace object
+        dtype = np.dtype(CurveFormatMapping[(point_fmt, point_size)])
+        dtype = dtype.newbyteorder('<' if byte_order == 'LSB' else '>')
+        trace.y_raw = np.frombuffer(raw_data, dtype, count*points).reshape(count, points)
+        trace.time_tag = np.array([(t - ts[0]).total_seconds() for t in ts])
+
+        return trace
+
     def _measurement_read_waveform(self, index, maximum_time):
         return self._measurement_fetch_waveform(index)
 
@@ -1332,6 +1465,27 @@ class tektronixBaseScope(scpi.common.IdnCommand, scpi.common.Reset, scpi.common.
             self._write(":acquire:state run")
             self._set_cache_valid(False, 'trigger_continuous')
 
+    def _measurement_continuous_wait(self, timeout):
+        return self._wait_for(lambda: int(self._ask(":acquire:state?")) == 0, timeout, max_interval=0.01)
+
+    def _measurement_continuous_read(self, index):
+        index = ivi.get_index(self._channel_name, index)
+
+        trace = ivi.TraceYT()
+
+        if self._driver_operation_simulate:
+            return trace, np.zeros(0, np.int16)
+
+        self._setup_waveform_transfer(index)
+        points, point_size, point_fmt, byte_order = self._read_waveform_preamble(trace)
+
+        raw_data = self._ask_for_ieee_block(":curve?")
+        self._read_raw() # flush buffer
+
+        dtype = np.dtype(CurveFormatMapping[(point_fmt, point_size)])
+        dtype = dtype.newbyteorder('<' if byte_order == 'LSB' else '>')
+        return trace, np.frombuffer(raw_data[0:points*point_size], dtype)
+
     def _get_reference_level_high(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             self._reference_level_high = float(self._ask(":measurement:reflevel:percent:high?"))
@@ -1405,6 +1559,72 @@ class tektronixBaseScope(scpi.common.IdnCommand, scpi.common.Reset, scpi.common.
     def _measurement_read_waveform_measurement(self, index, measurement_function, maximum_time):
         return self._measurement_fetch_waveform_measurement(index, measurement_function)
 
+    def _measurement_fetch_waveform_measurements(self, measurements, statistics = False):
+        """Fetch several measurements at once
+        
+        The measurements are set up in the periodic measurement slots, whose
+        previous type, sources and state are restored afterwards.
+        """
+        result, l = self._init_measurement_results(measurements)
+        funcs = list()
+        for index, func, ref in l:
+            if index < self._analog_channel_count:
+                if func not in MeasurementFunctionMapping:
+                    raise ivi.ValueNotSupportedException()
+                funcs.append(MeasurementFunctionMapping[func])
+            else:
+                if func not in MeasurementFunctionMappingDigital:
+                    raise ivi.ValueNotSupportedException()
+                funcs.append(MeasurementFunctionMappingDigital[func])
+        if self._driver_operation_simulate:
+            return result
+        n = self._measurement_slot_count
+        # the slots are shared with the front panel and other sessions, so
+        # they are always written rather than cached, and their setup is
+        # saved and restored afterwards
+        slots = [":measurement:meas%d" % (j+1) for j in range(min(n, len(l)))]
+        fields = ['type', 'source1', 'source2', 'state']
+        saved = self._ask(";".join("%s:%s?" % (slot, f) for slot in slots for f in fields)).split(';')
+        if len(saved) != len(slots)*len(fields):
+            raise ivi.UnexpectedResponseException()
+        try:
+            self._measurement_fetch_slots(result, l, funcs, statistics)
+        finally:
+            for i, slot in enumerate(slots):
+                for j, f in enumerate(fields):
+                    self._write("%s:%s %s" % (slot, f, saved[i*len(fields)+j].strip()))
+        return result
+
+    def _measurement_fetch_slots(self, result, l, funcs, statistics):
+        # set up the periodic measurement slots, then read all of them with
+        # a single query
+        n = self._measurement_slot_count
+        for k in range(0, len(l), n):
+            queries = list()
+            for j in range(len(l[k:k+n])):
+                index, func, ref = l[k+j]
+                slot = ":measurement:meas%d" % (j+1)
+                self._write("%s:type %s" % (slot, funcs[k+j]))
+                self._write("%s:source1 %s" % (slot, self._channel_name[index]))
+                if func in ['ratio', 'phase', 'delay']:
+                    ref_index = ivi.get_index(self._channel_name, ref)
+                    self._write("%s:source2 %s" % (slot, self._channel_name[ref_index]))
+                self._write("%s:state on" % slot)
+                queries.append("%s:value?" % slot)
+                if statistics:
+                    queries.extend("%s:%s?" % (slot, q) for q in ['minimum', 'maximum', 'mean', 'stdev', 'count'])
+            resp = [float(v) for v in self._ask(";".join(queries)).split(';')]
+            w = 6 if statistics else 1
+            for j in range(len(l[k:k+n])):
+                r = resp[j*w:j*w+w]
+                result[k+j]['value'] = r[0]
+                if statistics:
+                    result[k+j]['minimum'] = r[1]
+                    result[k+j]['maximum'] = r[2]
+                    result[k+j]['mean'] = r[3]
+                    result[k+j]['std_dev'] = r[4]
+                    result[k+j]['count'] = int(r[5])
+
     def _get_acquisition_number_of_envelopes(self):
         return self._acquisition_number_of_envelopes
 
@@ -1413,8 +1633,27 @@ class tektronixBaseScope(scpi.common.IdnCommand, scpi.common.Reset, scpi.common.
 
     def _measurement_fetch_waveform_min_max(self, index):
         index = ivi.get_index(self._channel_name, index)
-        data = list()
-        return data
+
+        if self._driver_operation_simulate:
+            return ivi.TraceYTMinMax()
+
+        self._setup_waveform_transfer(index)
+
+        trace = ivi.TraceYT()
+
+        # Read preamble, peak detect and envelope records are sent in the
+        # envelope point format with a min/max pair per point
+        points, point_size, point_fmt, byte_order = self._read_waveform_preamble(trace, True)
+
+        # Read waveform data
+        raw_data = self._ask_for_ieee_block(":curve?")
+        self._read_raw() # flush buffer
+
+        dtype = np.dtype(CurveFormatMapping[(point_fmt, point_size)])
+        dtype = dtype.newbyteorder('<' if byte_order == 'LSB' else '>')
+        y_raw = np.frombuffer(raw_data, dtype, len(raw_data) // point_size)
+
+        return trace.min_max_pairs(y_raw.astype(dtype.newbyteorder('=')), points)
 
     def _measurement_read_waveform_min_max(self, index, maximum_time):
         return self._measurement_fetch_waveform_min_max(index)
@@ -1453,7 +1692,7 @@ class tektronixBaseScope(scpi.common.IdnCommand, scpi.common.Reset, scpi.common.
     def _get_trigger_modifier(self):
         if not self._driver_operation_simulate and not self._get_cache_valid():
             value = self._ask(":trigger:a:mode?").lower()
-            self._trigger_modifier = [k for k,v in TriggerModifierMapping.items() if v==value][0]
+            self._trigger_modifier = TriggerModifierMapping.reverse(value)
             self._set_cache_valid()
         return self._trigger_modifier
 
@@ -115,21 +115,7 @@ class tektronixDPO5000(tektronixBaseScope):
         self._timebase_mode = value
         self._set_cache_valid()
 
-    def _measurement_fetch_waveform(self, index):
-        index = ivi.get_index(self._channel_name, index)
-
-        if self._driver_operation_simulate:
-            return ivi.TraceYT()
-
-        self._write(":data:source %s" % self._channel_name[index])
-        self._write(":data:encdg fastest")
-        self._write(":data:width 2")
-        self._write(":data:start 1")
-        self._write(":data:stop 1e10")
-
-        trace = ivi.TraceYT()
-
-        # Read preamble
+    def _read_waveform_preamble(self, trace, envelope = False):
         pre = self._ask(":wfmoutpre?").split(';')
 
         acq_format = pre[7].strip().upper()
@@ -145,35 +131,22 @@ class tektronixDPO5000(tektronixBaseScope):
         trace.y_reference = int(float(pre[14]))
         trace.y_origin = float(pre[15])
 
-        if acq_format != 'Y':
-            raise UnexpectedResponseException()
+        if envelope and acq_format != 'ENV':
+            raise scope.InvalidAcquisitionTypeException()
+
+        if not envelope and acq_format != 'Y':
+            raise ivi.UnexpectedResponseException()
 
         if point_enc != 'BINARY':
-            raise UnexpectedResponseException()
-
-        # Read waveform data
-        raw_data = self._ask_for_ieee_block(":curve?")
-        self._read_raw() # flush buffer
-
-        # Store in trace object
-        if point_fmt == 'RP' and point_size == 1:
-            trace.y_raw = array.array('B', raw_data[0:points*point_size])
-        elif point_fmt == 'RP' and point_size == 2:
-            trace.y_raw = array.array('H', raw_data[0:points*point_size])
-        elif point_fmt == 'RI' and point_size == 1:
-            trace.y_raw = array.array('b', raw_data[0:points*point_size])
-        elif point_fmt == 'RI' and point_size == 2:
-            trace.y_raw = array.array('h', raw_data[0:points*point_size])
-        elif point_fmt == 'FP' and point_size == 4:
+            raise ivi.UnexpectedResponseException()
+
+        if (point_fmt, point_size) not in CurveFormatMapping:
+            raise ivi.UnexpectedResponseException()
+
+        if point_fmt == 'FP':
             trace.y_increment = 1
             trace.y_reference = 0
             trace.y_origin = 0
-            trace.y_raw = array.array('f', raw_data[0:points*point_size])
-        else:
-            raise UnexpectedResponseException()
-
-        if (byte_order == 'LSB') != (sys.byteorder == 'little'):
-            trace.y_raw.byteswap()
 
-        return trace
+        return (points, point_size, point_fmt, byte_order)
 
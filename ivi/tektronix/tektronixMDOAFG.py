@@ -32,7 +32,7 @@ from .. import fgen
 
 OutputMode = set(['function', 'arbitrary'])
 OperationMode = set(['continuous'])
-StandardWaveformMapping = {
+StandardWaveformMapping = ivi.ValueMapping({
         'sine': 'sine',
         'square': 'square',
         'triangle': 'ramp',
@@ -49,7 +49,7 @@ StandardWaveformMapping = {
         'gaussian': 'gaussian',
         'lorentz': 'lorentz',
         'haversine': 'haversine'
-        }
+        })
 
 class tektronixMDOAFG(fgen.Base, fgen.StdFunc, fgen.ArbWfm, fgen.ArbFrequency,
                 fgen.ArbChannelWfm):
@@ -366,7 +366,7 @@ class tektronixMDOAFG(fgen.Base, fgen.StdFunc, fgen.ArbWfm, fgen.ArbFrequency,
             resp = self._ask(":%s:function?" % self._output_name[index]).lower()
             if resp == 'arbitrary':
                 resp = 'sine'
-            resp = [k for k,v in StandardWaveformMapping.items() if v==resp][0]
+            resp = StandardWaveformMapping.reverse(resp)
             if resp == 'ramp_up':
                 if self._get_output_standard_waveform_symmetry(index) <= 10.0:
                     resp = 'ramp_down'
@@ -0,0 +1,94 @@
+"""
+
+Python Interchangeable Virtual Instrument Library
+
+Copyright (c) 2014-2017 Alex Forencich
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+# Microbenchmark for Driver._ask_for_values on 100k value responses
+#
+# Run with python -m ivi.test.bench_ask_for_values
+
+import struct
+import timeit
+
+import numpy as np
+
+import ivi
+
+N = 100000
+
+
+class FakeInterface(object):
+    "Interface that returns a canned response to every query"
+
+    def __init__(self, response):
+        self.response = response
+        self.buf = b''
+
+    def write_raw(self, data):
+        self.buf = self.response
+
+    def read_raw(self, num=-1):
+        if num < 0:
+            num = len(self.buf)
+        data = self.buf[:num]
+        self.buf = self.buf[num:]
+        return data
+
+
+def make_driver(response):
+    driver = ivi.Driver(simulate=True)
+    driver._driver_operation_simulate = False
+    driver._interface = FakeInterface(response)
+    driver._initialized = True
+    return driver
+
+
+def main():
+    values = np.random.uniform(-10, 10, N)
+    text = ','.join('%+.9E' % v for v in values).encode('ascii') + b'\n'
+    data = struct.pack('>%dd' % N, *values)
+    block = ('#%d%d' % (len(str(len(data))), len(data))).encode('ascii') + data + b'\n'
+    out = np.empty(N)
+
+    text_driver = make_driver(text)
+    block_driver = make_driver(block)
+
+    def legacy():
+        s = text_driver._ask("fetch?")
+        return np.array(list(map(float, s.split(','))))
+
+    cases = [
+        ('legacy split/map', legacy),
+        ('text', lambda: text_driver._ask_for_values("fetch?")),
+        ('text, preallocated', lambda: text_driver._ask_for_values("fetch?", out=out)),
+        ('binary block', lambda: block_driver._ask_for_values("fetch?", binary_dtype='>f8')),
+    ]
+
+    for name, func in cases:
+        t = min(timeit.repeat(func, number=5, repeat=3)) / 5
+        print("%-20s %8.2f ms" % (name, t * 1e3))
+
+
+if __name__ == '__main__':
+    main()
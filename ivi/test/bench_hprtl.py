@@ -0,0 +1,57 @@
+"""
+
+Python Interchangeable Virtual Instrument Library
+
+Copyright (c) 2012-2017 Alex Forencich
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+
+# Benchmark for hprtl.parse_hprtl and hprtl.generate_bmp on stored 8590
+# series screenshots
+#
+# Run with python -m ivi.test.bench_hprtl [file.rtl ...]
+
+import glob
+import os
+import sys
+import timeit
+
+from ivi.agilent import hprtl
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+def main(files=None):
+    if not files:
+        files = sorted(glob.glob(os.path.join(FIXTURES, '*.rtl')))
+
+    for fn in files:
+        with open(fn, 'rb') as f:
+            rtl = f.read()
+        img = hprtl.parse_hprtl(rtl)
+        t = min(timeit.repeat(lambda: hprtl.parse_hprtl(rtl), number=5, repeat=3)) / 5
+        t_bmp = min(timeit.repeat(lambda: hprtl.generate_bmp(img), number=5, repeat=3)) / 5
+        print("%-20s %4dx%-4d parse %8.2f ms  bmp %8.2f ms" % (os.path.basename(fn), img.shape[1], img.shape[0], t * 1e3, t_bmp * 1e3))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,86 @@
+"""
+
+Python Interchangeable Virtual Instrument Library
+
+Copyright (c) 2012-2017 Alex Forencich
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+
+# Benchmark for tracefile.save and tracefile.load compared with pickle on
+# a set of 8 bit captures
+#
+# Run with python -m ivi.test.bench_tracefile [count] [points]
+
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import timeit
+
+import numpy as np
+
+import ivi
+from ivi import tracefile
+
+
+def main(count=1000, points=10000):
+    traces = list()
+    for k in range(count):
+        trace = ivi.TraceYT()
+        trace.x_increment = 1e-9
+        trace.y_increment = 0.01
+        trace.y_reference = 128
+        trace.y_raw = np.random.randint(0, 256, points).astype(np.uint8)
+        traces.append(trace)
+
+    d = tempfile.mkdtemp()
+    try:
+        fn = os.path.join(d, 'traces.trc')
+        pfn = os.path.join(d, 'traces.pkl')
+
+        def save_pickle():
+            with open(pfn, 'wb') as f:
+                pickle.dump(traces, f, pickle.HIGHEST_PROTOCOL)
+
+        def load_pickle():
+            with open(pfn, 'rb') as f:
+                return pickle.load(f)
+
+        def load_sum():
+            return sum(int(t.y_raw[0]) for t in tracefile.load(fn))
+
+        t_save = min(timeit.repeat(lambda: tracefile.save(fn, traces), number=1, repeat=3))
+        t_load = min(timeit.repeat(lambda: tracefile.load(fn), number=1, repeat=3))
+        t_sum = min(timeit.repeat(load_sum, number=1, repeat=3))
+        t_psave = min(timeit.repeat(save_pickle, number=1, repeat=3))
+        t_pload = min(timeit.repeat(load_pickle, number=1, repeat=3))
+
+        print("%d traces x %d points" % (count, points))
+        print("tracefile save %8.2f ms  load %8.2f ms  load+touch %8.2f ms  %10d bytes" % (t_save * 1e3, t_load * 1e3, t_sum * 1e3, os.path.getsize(fn)))
+        print("pickle    save %8.2f ms  load %8.2f ms  %28d bytes" % (t_psave * 1e3, t_pload * 1e3, os.path.getsize(pfn)))
+    finally:
+        shutil.rmtree(d)
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
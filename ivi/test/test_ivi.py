@@ -24,10 +24,16 @@ THE SOFTWARE.
 
 """
 
+import os
+import threading
+import time
 import unittest
 
+import numpy as np
+
 import ivi
 
+
 class TestIndex(unittest.TestCase):
 
     def setUp(self):
@@ -57,5 +63,963 @@ class TestIndex(unittest.TestCase):
         self.assertRaises(ivi.SelectorRangeException, ivi.get_index, self.index_dict, 100);
         self.assertRaises(ivi.SelectorNameException, ivi.get_index, self.index_dict, 'bad_item');
 
+
+class TestTraceYTSegmented(unittest.TestCase):
+
+    def setUp(self):
+        self.trace = ivi.TraceYTSegmented()
+        self.trace.x_increment = 0.5
+        self.trace.y_increment = 2
+        self.trace.y_origin = 1
+        self.trace.y_raw = np.arange(12).reshape(3, 4)
+        self.trace.time_tag = np.array([0.0, 1e-3, 2e-3])
+
+    def test_shape(self):
+        self.assertEqual(len(self.trace), 3)
+        self.assertEqual(self.trace.y.shape, (3, 4))
+        self.assertEqual(len(self.trace.x), 4)
+
+    def test_segment(self):
+        seg = self.trace[1]
+        self.assertIsInstance(seg, ivi.TraceYT)
+        self.assertEqual(list(seg.y), [9, 11, 13, 15])
+        self.assertEqual(list(seg.x), [0, 0.5, 1.0, 1.5])
+        self.assertEqual(len(list(self.trace)), 3)
+
+    def test_chunk(self):
+        seg = self.trace[2]
+        chunk = seg.chunk(2, seg.y_raw[2:])
+        self.assertEqual(list(chunk.x), list(seg.x[2:]))
+        self.assertEqual(list(chunk.y), list(seg.y[2:]))
+
+
+class TestTraceYTMinMax(unittest.TestCase):
+
+    def setUp(self):
+        self.trace = ivi.TraceYT()
+        self.trace.x_increment = 1e-3
+        self.trace.y_increment = 0.5
+        self.trace.y_hole = 0
+        self.trace.y_raw = np.array([4, 2, 7, 0, 5, 1, 0, 0, 3, 8], 'H')
+
+    def test_decimate(self):
+        env = self.trace.decimate_min_max(4)
+        self.assertEqual(len(env), 4)
+        np.testing.assert_array_equal(env.y_min, [1, 2.5, 0.5, 1.5])
+        np.testing.assert_array_equal(env.y_max, [2, 3.5, 0.5, 4])
+        np.testing.assert_allclose(env.t, [0, 2.5e-3, 5e-3, 7.5e-3])
+        self.assertEqual(env[2], (5e-3, 0.5, 0.5))
+
+    def test_hole_bin(self):
+        env = self.trace.decimate_min_max(5)
+        self.assertTrue(np.isnan(env.y_min[3]))
+        self.assertTrue(np.isnan(env.y_max[3]))
+
+    def test_pairs(self):
+        env = self.trace.min_max_pairs(self.trace.y_raw, 10)
+        np.testing.assert_array_equal(env.y_min_raw, [4, 7, 5, 0, 3])
+        np.testing.assert_array_equal(env.y_max_raw, [2, 0, 1, 0, 8])
+        np.testing.assert_allclose(env.t, [0, 2e-3, 4e-3, 6e-3, 8e-3])
+
+
+class TestTraceFile(unittest.TestCase):
+
+    def setUp(self):
+        import tempfile
+        fd, self.filename = tempfile.mkstemp()
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.filename)
+
+    def test_round_trip(self):
+        from ivi import tracefile
+        traces = list()
+        for k in range(3):
+            trace = ivi.TraceYT()
+            trace.x_increment = 1e-6
+            trace.y_increment = 0.5
+            trace.y_hole = -1
+            trace.y_raw = np.array([k, -1, 3], dtype='>i2')
+            traces.append(trace)
+        seg = ivi.TraceYTSegmented()
+        seg.y_raw = np.arange(6, dtype=np.uint8).reshape(2, 3)
+        seg.time_tag = np.array([0.0, 1e-3])
+        tracefile.save(self.filename, traces[0:2])
+        tracefile.save(self.filename, traces[2:] + [seg], append=True)
+
+        with tracefile.TraceReader(self.filename) as r:
+            self.assertEqual(len(r), 4)
+            self.assertEqual(r._index[1][0], r._index[0][0])
+            t = r[2]
+            self.assertIs(type(t), ivi.TraceYT)
+            self.assertEqual(t.y_raw.dtype, np.dtype('>i2'))
+            self.assertEqual(t.x_increment, 1e-6)
+            np.testing.assert_equal(t.y, [1.0, float('nan'), 1.5])
+            s = r[3]
+            self.assertIs(type(s), ivi.TraceYTSegmented)
+            self.assertEqual(s.y_raw.shape, (2, 3))
+            self.assertEqual(list(s.time_tag), [0.0, 1e-3])
+
+    def test_datetime(self):
+        import datetime
+        from ivi import tracefile
+        naive = datetime.datetime(2017, 3, 1, 12, 30, 0)
+        aware = datetime.datetime(2017, 3, 1, 12, 30, 0, 250,
+                tracefile._timezone(datetime.timedelta(hours=-5)))
+        traces = list()
+        for t in (naive, aware):
+            trace = ivi.TraceYT()
+            trace.trigger_time = t
+            trace.y_raw = np.zeros(4)
+            traces.append(trace)
+        tracefile.save(self.filename, traces)
+        r = tracefile.load(self.filename)
+        self.assertEqual(r[0].trigger_time, naive)
+        self.assertIsNone(r[0].trigger_time.tzinfo)
+        self.assertEqual(r[1].trigger_time, aware)
+        self.assertEqual(r[1].trigger_time.utcoffset(), datetime.timedelta(hours=-5))
+        self.assertRaises(ivi.FileFormatException, tracefile._decode_value, {'value': 1})
+
+    def test_bad_file(self):
+        from ivi import tracefile
+        with open(self.filename, 'wb') as f:
+            f.write(b'not a trace file')
+        self.assertRaises(ivi.FileFormatException, tracefile.load, self.filename)
+
+
+class TestHPRTL(unittest.TestCase):
+
+    def test_packbits(self):
+        from ivi.agilent import hprtl
+        d = bytes(bytearray([0xfe, 0xaa, 0x02, 0x80, 0x00, 0x2a, 0xfd, 0xaa, 0x03, 0x80, 0x00, 0x2a, 0x22, 0xf7, 0xaa]))
+        r = bytearray([0xaa]*3 + [0x80, 0x00, 0x2a] + [0xaa]*4 + [0x80, 0x00, 0x2a, 0x22] + [0xaa]*10)
+        np.testing.assert_array_equal(hprtl.unpack_packbits(d), np.array(r, dtype=np.uint8))
+
+    def test_parse(self):
+        from ivi.agilent import hprtl
+        rtl = b'\x1b*r3U\x1b*r12S\x1b*b0M\x1b*r1A'
+        rtl += b'\x1b*b2V\xf0\x00\x1b*b2V\x0f\x00\x1b*b2W\xff\x00'
+        rtl += b'\x1b*rC'
+        img = hprtl.parse_hprtl(rtl)
+        self.assertEqual(img.shape, (1, 12, 3))
+        np.testing.assert_array_equal(img[0, 0], (255, 0, 255))
+        np.testing.assert_array_equal(img[0, 4], (255, 255, 0))
+        np.testing.assert_array_equal(img[0, 8], (0, 0, 0))
+
+    def test_bmp(self):
+        from ivi.agilent import hprtl
+        img = np.random.randint(0, 256, (7, 13, 3)).astype(np.uint8)
+        np.testing.assert_array_equal(ivi.decode_bmp(hprtl.generate_bmp(img)), img)
+        mono = np.random.randint(0, 2, (7, 13, 1)).astype(np.uint8)
+        np.testing.assert_array_equal(ivi.decode_bmp(hprtl.generate_bmp(mono))[:, :, 0], 255 * (1 - mono[:, :, 0]))
+
+    def test_bmp_bitfields(self):
+        import struct
+        # 2x1 32 bit image with 10 bit channels packed as 0x3ff00000 red,
+        # 0x000ffc00 green, 0x000003ff blue
+        pix = np.array([0x3ff << 20 | 0x200 << 10, 0x3ff], '<u4')
+        masks = struct.pack('<LLL', 0x3ff00000, 0x000ffc00, 0x000003ff)
+        offset = 54 + len(masks)
+        header = b'BM' + struct.pack('<LHHL', offset + pix.nbytes, 0, 0, offset)
+        header += struct.pack('<LllHHLLllLL', 40, 2, 1, 1, 32, 3, pix.nbytes, 0, 0, 0, 0)
+        img = ivi.decode_bmp(header + masks + pix.tobytes())
+        np.testing.assert_array_equal(img, [[[255, 128, 0], [0, 0, 255]]])
+        # masks are only supported for 32 bit pixels
+        header = header[:28] + struct.pack('<H', 24) + header[30:]
+        self.assertRaises(ivi.FileFormatException, ivi.decode_bmp, header + masks + pix.tobytes())
+
+
+class TestSampleChunks(unittest.TestCase):
+
+    def test_chunks(self):
+        y = np.arange(10.0)
+        for data in [y, list(y), iter(y), [y[0:3], 3.0, 4.0, y[5:10]]]:
+            chunks = list(ivi.iter_sample_chunks(data, 4))
+            self.assertTrue(all(len(c) <= 4 for c in chunks))
+            np.testing.assert_array_equal(np.concatenate(chunks), y)
+
+    def test_block_buffer(self):
+        buf = ivi.BlockBuffer(max_size=16, chunk_size=5)
+        buf.write(b'0123456789')
+        buf.write(b'abcdefghij')
+        self.assertEqual(len(buf), 20)
+        self.assertEqual(list(buf.chunks()), [b'01234', b'56789', b'abcde', b'fghij'])
+        buf.close()
+
+
+class TestUnpackBits(unittest.TestCase):
+
+    def test_unpack_bits(self):
+        bits = ivi.unpack_bits(np.array([0x0001, 0x8002, 0x0003], dtype=np.uint16), 16)
+        self.assertEqual(bits.shape, (16, 3))
+        self.assertEqual(list(bits[0]), [True, False, True])
+        self.assertEqual(list(bits[1]), [False, True, True])
+        self.assertEqual(list(bits[15]), [False, True, False])
+        self.assertFalse(bits[2:15].any())
+
+
+class TestCatalog(unittest.TestCase):
+
+    def setUp(self):
+        from ivi.tektronix import tektronixAWG2020
+        self.driver = tektronixAWG2020(simulate=True)
+        self.driver._driver_operation_simulate = False
+        self.queries = []
+        def ask(data, *args, **kwargs):
+            self.queries.append(data)
+            return ':MEMORY:CATALOG:ALL "A.WFM","WFM",100,"B.SEQ","SEQ",50'
+        self.driver._ask = ask
+        self.driver._write = lambda data, *args, **kwargs: None
+
+    def test_local_updates(self):
+        d = self.driver
+        self.assertTrue(d._arbitrary_waveform_exists('a.wfm'))
+        self.assertFalse(d._arbitrary_waveform_exists('w0001.wfm'))
+        self.assertEqual(len(self.queries), 1)
+        d._arbitrary_waveform_clear('a.wfm')
+        d._catalog.add('w0001.wfm')
+        self.assertFalse(d._arbitrary_waveform_exists('a.wfm'))
+        self.assertTrue(d._arbitrary_waveform_exists('w0001.wfm'))
+        self.assertEqual(len(self.queries), 1)
+
+    def test_ttl(self):
+        d = self.driver
+        d.arbitrary.waveform.catalog_ttl = 10
+        self.assertTrue(d._arbitrary_waveform_exists('a.wfm'))
+        self.assertTrue(d._arbitrary_waveform_exists('a.wfm'))
+        self.assertEqual(len(self.queries), 1)
+        d._catalog.time -= 20
+        self.assertTrue(d._arbitrary_waveform_exists('a.wfm'))
+        self.assertEqual(len(self.queries), 2)
+        d.arbitrary.waveform.catalog_ttl = None
+        self.assertIsNone(d._catalog.ttl)
+
+    def test_esgd_selected_waveform(self):
+        from ivi.agilent.agilentE4432B import agilentE4432B
+        d = agilentE4432B(simulate=True)
+        y = np.zeros(32)
+        d.digital_modulation.arb.write_waveform('Test', y, y)
+        d.digital_modulation.arb.selected_waveform = 'test'
+        self.assertEqual(d.digital_modulation.arb.selected_waveform, 'test')
+        self.assertRaises(ivi.ValueNotSupportedException, setattr,
+                d.digital_modulation.arb, 'selected_waveform', 'missing')
+
+    def test_esgd_selected_waveform_reload(self):
+        from ivi.agilent.agilentE4432B import agilentE4432B
+        d = agilentE4432B(simulate=True)
+        d._driver_operation_simulate = False
+        written = []
+        catalog = ['0,0']
+        d._ask = lambda data, *args, **kwargs: ','.join(catalog)
+        d._write = lambda data, *args, **kwargs: written.append(data)
+        d._load_arb_catalog()
+        # waveform uploaded by another tool after the catalog was read
+        catalog.append('"OTHER","WFM1","1024"')
+        d.digital_modulation.arb.selected_waveform = 'other'
+        self.assertEqual(written, ["radio:arb:waveform \"ARBI:other\""])
+        self.assertRaises(ivi.ValueNotSupportedException, setattr,
+                d.digital_modulation.arb, 'selected_waveform', 'missing')
+
+    def test_cache_size(self):
+        d = self.driver
+        d._arbitrary_waveform_cache_store('k', 'a.wfm', 100)
+        self.assertEqual(d._arbitrary_waveform_cache_lookup('k'), 'a.wfm')
+        # same name, different contents
+        d._arbitrary_waveform_cache_store('k', 'a.wfm', 200)
+        self.assertIsNone(d._arbitrary_waveform_cache_lookup('k'))
+        self.assertNotIn('k', d._arbitrary_waveform_cache)
+
+    def test_refresh(self):
+        d = self.driver
+        d._load_catalog()
+        d.driver_operation.invalidate_all_attributes()
+        d._load_catalog()
+        self.assertEqual(len(self.queries), 2)
+        d._catalog.ttl = 0
+        d._catalog.time -= 1
+        d._load_catalog()
+        self.assertEqual(len(self.queries), 3)
+        self.assertEqual(sorted(d._catalog.names()), ['a.wfm', 'b.seq'])
+
+
+class TestSampler(unittest.TestCase):
+
+    def setUp(self):
+        self.driver = ivi.Driver(simulate=True)
+        self.values = iter([0.0, 1.0, 2.0, 1.0, 0.0])
+        self.crossings = list()
+        self.sampler = ivi.Sampler(self.driver, interval=0.01, length=3)
+        self.sampler.add_source('v', lambda: next(self.values))
+        self.sampler.add_threshold('v', 1.5, lambda name, t, value: self.crossings.append((name, value)))
+
+    def test_ring_buffer(self):
+        self.sampler._buffer = np.full((3, 2), float('nan'))
+        for k in range(5):
+            self.sampler._sample()
+        t, values = self.sampler.get_samples()
+        self.assertEqual(list(values[:, 0]), [2.0, 1.0, 0.0])
+        self.assertTrue(all(t[1:] >= t[:-1]))
+        self.assertEqual(self.crossings, [('v', 2.0), ('v', 1.0)])
+
+    def test_start_stop(self):
+        self.sampler.start()
+        self.sampler.pause()
+        self.assertTrue(self.sampler.paused)
+        self.sampler.resume()
+        self.sampler.stop()
+        self.assertFalse(self.sampler.running)
+
+    def test_pause_with_session_lock(self):
+        # pausing and stopping while holding the session lock must not wait
+        # on a sample that is blocked on that lock
+        self.sampler.start()
+        self.driver.utility.lock_object()
+        try:
+            time.sleep(0.05)
+            self.sampler.pause()
+            self.assertTrue(self.sampler.paused)
+            self.sampler.resume()
+            time.sleep(0.02)
+            self.sampler.stop()
+        finally:
+            self.driver.utility.unlock_object()
+        self.assertFalse(self.sampler.running)
+
+    def test_ask_lock(self):
+        import threading
+        import time
+
+        class Interface(object):
+            # instrument output buffer holds the reply to the last query only
+            def write(self, data, encoding='utf-8'):
+                self.reply = data
+                time.sleep(0.001)
+            def read(self, num=-1, encoding='utf-8'):
+                return self.reply
+
+        d = self.driver
+        d._driver_operation_simulate = False
+        d._initialized = True
+        d._interface = Interface()
+        errors = []
+        def worker(name):
+            for k in range(20):
+                if d._ask(name) != name:
+                    errors.append(name)
+        threads = [threading.Thread(target=worker, args=(n,)) for n in ('a?', 'b?')]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+
+    def test_unlock_unbalanced(self):
+        self.driver.utility.unlock_object()
+        self.driver.utility.lock_object()
+        self.driver.utility.unlock_object()
+        self.driver.utility.unlock_object()
+
+
+class TestRangeTable(unittest.TestCase):
+
+    def setUp(self):
+        self.ranges = {'P8V': (9.0, 20.0), 'P20V': (21.0, 10.0), 'P35V': (36.0, 5.0)}
+
+    def test_lookup(self):
+        from ivi import dcpwr
+        self.assertEqual(dcpwr.get_range(self.ranges, 0, 5.0), 'P8V')
+        self.assertEqual(dcpwr.get_range(self.ranges, 0, -21.0), 'P20V')
+        self.assertEqual(dcpwr.get_range(self.ranges, 1, 15.0), 'P8V')
+        self.assertIsNone(dcpwr.get_range(self.ranges, 0, 40.0))
+
+    def test_lookup_array(self):
+        from ivi import dcpwr
+        keys = dcpwr.get_range_array(self.ranges, 0, [1.0, 9.5, 36.0, 50.0])
+        self.assertEqual(list(keys), ['P8V', 'P20V', 'P35V', None])
+
+
+class TestParseValues(unittest.TestCase):
+
+    def test_float(self):
+        values = ivi.parse_values('+1.5E+00,-2.0E-03,3\n')
+        self.assertTrue(isinstance(values, np.ndarray))
+        self.assertEqual(list(values), [1.5, -0.002, 3.0])
+
+    def test_int_delim(self):
+        self.assertEqual(list(ivi.parse_values('1;2;3', ';', int)), [1, 2, 3])
+
+    def test_converter(self):
+        self.assertEqual(ivi.parse_values('a,b', ',', str), ['a', 'b'])
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, ivi.parse_values, '1,x')
+
+
+class TestValueMapping(unittest.TestCase):
+
+    def setUp(self):
+        self.mapping = ivi.ValueMapping({
+                'positive': 'positive',
+                'negative': 'neg',
+                'either': 'eith',
+                'alternating': 'eith'})
+
+    def test_reverse(self):
+        self.assertEqual(self.mapping.reverse('neg'), 'negative')
+        self.assertEqual(self.mapping.reverse(' "NEG"\n'), 'negative')
+        self.assertEqual(self.mapping.reverse('POS'), 'positive')
+        self.assertEqual(self.mapping.reverse('eith'), 'either')
+        self.assertRaises(ivi.UnexpectedResponseException, self.mapping.reverse, 'foo')
+
+    def test_update(self):
+        self.mapping.reverse('neg')
+        self.mapping['negative'] = 'fall'
+        self.assertEqual(self.mapping.reverse('fall'), 'negative')
+
+    def test_short_form(self):
+        self.assertEqual(ivi.scpi_short_form('positive:channel1'), 'pos:chan1')
+        self.assertEqual(ivi.scpi_short_form('average'), 'aver')
+
+
+class TestMeasurement(unittest.TestCase):
+
+    def setUp(self):
+        # 1 kHz square wave, 30 % duty cycle, 20 us edges, 1 us per sample
+        k = np.arange(10000)
+        y = np.convolve(np.where(k % 1000 < 300, 1.0, 0.0), np.ones(20) / 20, mode='same')
+        self.trace = ivi.TraceYTSegmented()
+        self.trace.x_increment = 1e-6
+        self.trace.y_raw = np.vstack([y, 2 * y])
+
+    def test_segments(self):
+        from ivi import measurement
+        r = measurement.measure(self.trace, ['frequency', 'amplitude', 'duty_cycle_positive'])
+        np.testing.assert_allclose(r['frequency'], [1000, 1000])
+        np.testing.assert_allclose(r['amplitude'], [1, 2])
+        np.testing.assert_allclose(r['duty_cycle_positive'], [30, 30])
+
+    def test_reference_levels(self):
+        from ivi import measurement
+        r = measurement.measure(self.trace[0], ['rise_time'])
+        self.assertAlmostEqual(r['rise_time'], 16e-6)
+        r = measurement.measure(self.trace[0], ['rise_time'], 80, 50, 20)
+        self.assertAlmostEqual(r['rise_time'], 12e-6)
+
+    def test_empty(self):
+        from ivi import measurement
+        trace = ivi.TraceYT()
+        trace.y_raw = np.zeros(0, dtype=np.int16)
+        r = measurement.measure(trace, ['frequency', 'voltage_max'])
+        self.assertTrue(np.isnan(r['frequency']))
+        self.assertTrue(np.isnan(r['voltage_max']))
+        r = measurement.measure(self.trace.chunk(0, np.zeros((2, 0))), ['amplitude'])
+        self.assertEqual(r['amplitude'].shape, (2,))
+        self.assertTrue(np.isnan(r['amplitude']).all())
+
+
+class TestWaitFor(unittest.TestCase):
+
+    def setUp(self):
+        self.driver = ivi.Driver(simulate=True)
+        self.driver._driver_operation_simulate = False
+
+    def test_condition(self):
+        calls = []
+        def condition():
+            calls.append(1)
+            return len(calls) >= 4
+        self.assertTrue(self.driver._wait_for(condition, 1))
+        self.assertEqual(len(calls), 4)
+
+    def test_timeout(self):
+        self.assertFalse(self.driver._wait_for(lambda: False, 0.02))
+
+    def test_io_timeout(self):
+        class Interface(object):
+            timeout = 5
+        self.driver._interface = Interface()
+        seen = []
+        self.driver._with_io_timeout(30, lambda: seen.append(self.driver._interface.timeout))
+        self.driver._with_io_timeout(1, lambda: seen.append(self.driver._interface.timeout))
+        self.assertEqual(seen, [30, 5])
+        self.assertEqual(self.driver._interface.timeout, 5)
+
+    def test_io_timeout_fixed(self):
+        # no adjustable timeout, so wait before calling
+        self.driver._interface = object()
+        start = time.time()
+        self.assertEqual(self.driver._with_io_timeout(0.05, lambda: 1), 1)
+        self.assertGreaterEqual(time.time() - start, 0.05)
+
+    def test_stb(self):
+        stb = [0, 0, 0x10]
+        self.driver._read_stb = lambda: stb.pop(0)
+        self.assertTrue(self.driver._wait_for_stb(0x10, 1))
+        self.assertEqual(stb, [])
+        self.driver._read_stb = lambda: 0x04
+        self.assertFalse(self.driver._wait_for_stb(0x10, 0.02))
+
+    def test_operation_complete(self):
+        class Interface(object):
+            timeout = 5
+        self.driver._interface = Interface()
+        seen = []
+        def ask(data):
+            seen.append((data, self.driver._interface.timeout))
+            return '1'
+        self.driver._ask = ask
+        self.driver._wait_for_operation_complete(30)
+        self.assertEqual(seen, [('*OPC?', 30)])
+        self.assertEqual(self.driver._interface.timeout, 5)
+
+
+class FakeCaptureScope(object):
+    "Driver stub for ContinuousCapture returning numbered waveforms"
+
+    def __init__(self):
+        self._channel_name = ['channel1']
+        self._session_lock = threading.RLock()
+        self.utility = self
+        self.count = 0
+        self.fail_at = None
+
+    def lock_object(self):
+        self._session_lock.acquire()
+
+    def unlock_object(self):
+        self._session_lock.release()
+
+    def _measurement_continuous_arm(self):
+        pass
+
+    def _measurement_continuous_wait(self, timeout):
+        time.sleep(0.001)
+        return True
+
+    def _measurement_continuous_read(self, index):
+        self.count += 1
+        if self.count == self.fail_at:
+            raise ivi.UnexpectedResponseException()
+        return ivi.TraceYT(), np.full(16, self.count, np.int16)
+
+
+class TestContinuousCapture(unittest.TestCase):
+
+    def test_slow_consumer(self):
+        from ivi import scope
+        acq = scope.ContinuousCapture(FakeCaptureScope(), ['channel1'], 1, 'drop_oldest')
+        acq.start()
+        try:
+            last = 0
+            for i in range(5):
+                y = acq.get(1)['channel1'].y_raw
+                n = y[0]
+                self.assertGreater(n, last)
+                # frame must not be reused while the consumer holds it
+                time.sleep(0.02)
+                self.assertTrue((y == n).all())
+                last = n
+        finally:
+            acq.stop()
+        self.assertIsNone(acq.error)
+        self.assertGreater(acq.dropped, 0)
+
+    def test_error(self):
+        from ivi import scope
+        driver = FakeCaptureScope()
+        driver.fail_at = 3
+        acq = scope.ContinuousCapture(driver, ['channel1'], 4, 'block')
+        acq.start()
+        try:
+            self.assertEqual(acq.get(1)['channel1'].y_raw[0], 1)
+            self.assertEqual(acq.get(1)['channel1'].y_raw[0], 2)
+            self.assertRaises(ivi.UnexpectedResponseException, acq.get)
+        finally:
+            acq.stop()
+
+    def test_agilent_wait(self):
+        from ivi.agilent.agilentDSOX3014A import agilentDSOX3014A
+        driver = agilentDSOX3014A(simulate=True)
+        driver._driver_operation_simulate = False
+        # run bit not yet set after arming, then set until the acquisition
+        # completes
+        replies = {':ter?': ['+0', '+0', '+0', '+1'], ':operegister:condition?': ['+8', '+0']}
+        driver._ask = lambda data, *args, **kwargs: replies[data].pop(0)
+        driver._write = lambda data, *args, **kwargs: None
+        driver._measurement_continuous_arm()
+        self.assertFalse(driver._measurement_continuous_wait(0))
+        self.assertTrue(driver._measurement_continuous_wait(1))
+        self.assertEqual(replies, {':ter?': [], ':operegister:condition?': []})
+
+    def test_block(self):
+        from ivi import scope
+        acq = scope.ContinuousCapture(FakeCaptureScope(), ['channel1'], 2, 'block')
+        acq.start()
+        try:
+            values = []
+            for i in range(10):
+                values.append(acq.get(1)['channel1'].y_raw[0])
+                time.sleep(0.005)
+        finally:
+            acq.stop()
+        self.assertIsNone(acq.error)
+        self.assertEqual(values, list(range(1, 11)))
+        self.assertEqual(acq.dropped, 0)
+        # queued frames are still returned once stopped, then None
+        remaining = 0
+        while acq.get() is not None:
+            remaining += 1
+        self.assertLessEqual(remaining, 2)
+
+
+class FakeDMM(object):
+    "Interface stub for a SCPI DMM with reading memory and FORM:DATA"
+
+    def __init__(self, readings, memory_size=100):
+        self.real = False
+        self.out = b''
+        self.memory = list(readings)
+        self.memory_size = memory_size
+        self.removed = []
+
+    def _reply(self, values):
+        if self.real:
+            self.out = ivi.build_ieee_block(np.array(values, '>f8').tobytes()) + b'\n'
+        else:
+            self.out = (','.join('%e' % v for v in values) + '\n').encode('ascii')
+
+    def write(self, data, encoding='utf-8'):
+        for cmd in data.lower().split(';'):
+            if cmd == ':format:data real,64':
+                self.real = True
+            elif cmd == ':format:data ascii':
+                self.real = False
+            elif cmd == ':read?':
+                self._reply(self.memory[0:1])
+            elif cmd == ':fetch?':
+                self._reply(self.memory)
+            elif cmd == 'data:points?':
+                self.out = b'%d\n' % len(self.memory)
+            elif cmd in ('trigger:count?', 'sample:count?'):
+                self.out = b'5\n'
+            elif cmd.startswith('r? '):
+                n = int(cmd[3:])
+                self.removed.append(n)
+                values, self.memory = self.memory[:n], self.memory[n:]
+                if self.real:
+                    self._reply(values)
+                else:
+                    data = ','.join('%e' % v for v in values).encode('ascii')
+                    self.out = ivi.build_ieee_block(data) + b'\n'
+
+    def read_raw(self, num=-1):
+        if num < 0:
+            num = len(self.out)
+        data, self.out = self.out[:num], self.out[num:]
+        return data
+
+
+class TestDMMMultiPoint(unittest.TestCase):
+
+    def setUp(self):
+        from ivi.agilent.agilent34410A import agilent34410A
+        self.driver = agilent34410A(simulate=True)
+        self.driver._driver_operation_simulate = False
+        self.driver._initialized = True
+        self.driver._interface = FakeDMM(np.arange(25.0))
+
+    def test_fetch_then_read(self):
+        d = self.driver
+        np.testing.assert_array_equal(d.measurement.fetch_multi_point(1), np.arange(25.0))
+        self.assertEqual(d.measurement.read(1), 0.0)
+
+    def test_iter_readings(self):
+        d = self.driver
+        chunks = list(d.measurement.iter_readings(chunk_size=10, buffer_size=20, interval=0))
+        self.assertEqual([len(c) for c in chunks], [10, 10, 5])
+        np.testing.assert_array_equal(np.concatenate(chunks), np.arange(25.0))
+        # never removes more readings than fit in the ring buffer
+        self.assertEqual(d._interface.removed, [20, 5])
+        self.assertFalse(d._interface.real)
+
+    def test_iter_readings_backpressure(self):
+        d = self.driver
+        it = d.measurement.iter_readings(chunk_size=10, buffer_size=10, interval=0)
+        np.testing.assert_array_equal(next(it), np.arange(10.0))
+        # readings stay in the instrument until the consumer catches up
+        self.assertEqual(len(d._interface.memory), 15)
+        self.assertEqual(sum(len(c) for c in it), 15)
+
+    def test_iter_readings_overflow(self):
+        from ivi import dmm
+        d = self.driver
+        d._multi_point_reading_memory_size = 25
+        it = d.measurement.iter_readings(chunk_size=10, interval=0)
+        self.assertRaises(dmm.ReadingMemoryOverflowException, next, it)
+
+    def test_remove_readings_locked(self):
+        d = self.driver
+        ask = d._ask
+        free = []
+        def locked_ask(data, *args, **kwargs):
+            if data == "data:points?":
+                # another session must not get in between count and removal
+                def probe():
+                    free.append(d._session_lock.acquire(False))
+                    if free[-1]:
+                        d._session_lock.release()
+                t = threading.Thread(target=probe)
+                t.start()
+                t.join()
+            return ask(data, *args, **kwargs)
+        d._ask = locked_ask
+        for binary in (False, True):
+            d._multi_point_binary_transfer = binary
+            d._measurement_remove_readings(5)
+        self.assertEqual(free, [False, False])
+        self.assertEqual(d._interface.removed, [5, 5])
+
+
+class TestWriteSetting(unittest.TestCase):
+
+    def setUp(self):
+        self.driver = ivi.Driver(simulate=True)
+        self.written = []
+        self.driver._write = lambda data, *args, **kwargs: self.written.append(data)
+
+    def test_skip_repeated(self):
+        d = self.driver
+        d._write_setting(":waveform:source chan1")
+        d._write_setting(":waveform:source chan1")
+        d._write_setting(":waveform:format word")
+        d._write_setting(":waveform:source chan2")
+        self.assertEqual(self.written, [":waveform:source chan1", ":waveform:format word", ":waveform:source chan2"])
+
+    def test_invalidate(self):
+        d = self.driver
+        d._write_setting(":waveform:source chan1")
+        d.driver_operation.invalidate_all_attributes()
+        d._write_setting(":waveform:source chan1")
+        d.driver_operation.cache = False
+        d._write_setting(":waveform:source chan1")
+        self.assertEqual(len(self.written), 3)
+
+
+class TestDCPwrSelectOutput(unittest.TestCase):
+
+    def setUp(self):
+        from ivi.agilent.agilentE3631A import agilentE3631A
+        self.driver = agilentE3631A(simulate=True)
+        self.driver._driver_operation_simulate = False
+        self.written = []
+        self.fail = False
+        def write(data, *args, **kwargs):
+            if self.fail:
+                raise ivi.IOException()
+            self.written.append(data)
+        self.driver._write = write
+
+    def test_select_once(self):
+        d = self.driver
+        d._write_output(1, "output on")
+        d._write_output(1, "output off")
+        self.assertEqual(self.written, ["instrument:nselect 2;:output on", "output off"])
+
+    def test_failed_write(self):
+        d = self.driver
+        d._write_output(0, "output on")
+        self.fail = True
+        self.assertRaises(ivi.IOException, d._write_output, 1, "output on")
+        self.fail = False
+        d._write_output(1, "output on")
+        self.assertEqual(self.written[-1], "instrument:nselect 2;:output on")
+
+    def test_measure_outputs(self):
+        d = self.driver
+        queries = []
+        def ask(data, *args, **kwargs):
+            queries.append(data)
+            return "1.0;0.1;2.0;0.2"
+        d._ask = ask
+        r = d.measure_outputs([0, 2])
+        np.testing.assert_array_equal(r, [[1.0, 0.1], [2.0, 0.2]])
+        self.assertEqual(queries, ["instrument:nselect 1;:measure:voltage?;:measure:current?;:"
+                "instrument:nselect 3;:measure:voltage?;:measure:current?"])
+        d._write_output(2, "output on")
+        self.assertEqual(self.written[-1], "output on")
+
+
+class TestDCPwrList(unittest.TestCase):
+
+    def setUp(self):
+        from ivi.rigol.rigolDP832 import rigolDP832
+        self.driver = rigolDP832(simulate=True)
+        self.driver._driver_operation_simulate = False
+        self.written = []
+        self.driver._write = lambda data, *args, **kwargs: self.written.append(data)
+
+    def test_configure(self):
+        self.driver.outputs[0].list.configure([1.0, 2.0], 0.5, [1, 2.5])
+        self.assertEqual(self.written, ["instrument:nselect 1;:timer:groups 2",
+                "timer:parameter 0,1.000,0.500,1.000",
+                "timer:parameter 1,2.000,0.500,2.500"])
+
+    def test_measure_outputs(self):
+        queries = []
+        def ask(data, *args, **kwargs):
+            queries.append(data)
+            return "1.000,0.100,0.100;2.000,0.200,0.400"
+        self.driver._ask = ask
+        r = self.driver.measure_outputs([0, 2])
+        np.testing.assert_array_equal(r, [[1.0, 0.1], [2.0, 0.2]])
+        self.assertEqual(queries, ["measure:all? ch1;:measure:all? ch3"])
+
+    def test_dwell_range(self):
+        l = self.driver.outputs[0].list
+        self.assertRaises(ivi.OutOfRangeException, l.configure, [1.0, 2.0], 0.5, [1, 0.5])
+        self.assertRaises(ivi.OutOfRangeException, l.configure, [1.0], 0.5, 100000)
+        self.assertRaises(ivi.OutOfRangeException, l.configure, [100, 200], [1, 1], [1, 1])
+        self.assertRaises(ivi.OutOfRangeException, l.configure, [1.0, 2.0], [1, 10], [1, 1])
+        self.assertRaises(ivi.OutOfRangeException, l.configure, [-1.0], 0.5, 1)
+        self.assertEqual(self.written, [])
+
+
+
+class TestScopeMeasurements(unittest.TestCase):
+
+    def setUp(self):
+        self.written = []
+        self.asked = []
+
+    def patch(self, driver, replies):
+        driver._driver_operation_simulate = False
+        driver._write = lambda data, *args, **kwargs: self.written.append(data)
+        def ask(data, *args, **kwargs):
+            self.asked.append(data)
+            return replies[data]
+        driver._ask = ask
+
+    def test_agilent_results(self):
+        from ivi.agilent.agilentDSOX3014A import agilentDSOX3014A
+        driver = agilentDSOX3014A(simulate=True)
+        self.patch(driver, {
+            ":measure:statistics?": "CURR",
+            ":measure:results?": "Frequency(1),+1.0000E+03,+9.9990E+02,+1.0010E+03,"
+                    "+1.0000E+03,+2.1000E-01,+1.2000E+02,"
+                    "V p-p(1),+2.0000E+00,+1.9000E+00,+2.1000E+00,+2.0000E+00,+5.0000E-02,+1.2000E+02",
+        })
+        r = driver.measurement.fetch_waveform_measurements(
+                [('channel1', 'frequency'), ('channel1', 'voltage_peak_to_peak')], True)
+        self.assertEqual(list(r['value']), [1000.0, 2.0])
+        self.assertEqual(list(r['minimum']), [999.9, 1.9])
+        self.assertEqual(list(r['std_dev']), [0.21, 0.05])
+        self.assertEqual(list(r['count']), [120, 120])
+        self.assertEqual(self.written[0], ":measure:statistics on")
+        self.assertEqual(self.written[-1], ":measure:statistics CURR")
+
+    def test_agilent_short_results(self):
+        from ivi.agilent.agilentDSOX3014A import agilentDSOX3014A
+        driver = agilentDSOX3014A(simulate=True)
+        self.patch(driver, {
+            ":measure:statistics?": "ON",
+            ":measure:results?": "Frequency(1),+1.0000E+03",
+        })
+        self.assertRaises(ivi.UnexpectedResponseException,
+                driver.measurement.fetch_waveform_measurements, [('channel1', 'frequency')], True)
+        self.assertEqual(self.written[-1], ":measure:statistics ON")
+
+    def test_tektronix_restore(self):
+        from ivi.tektronix import tektronixDPO4014B
+        driver = tektronixDPO4014B(simulate=True)
+        self.patch(driver, {
+            ":measurement:meas1:type?;:measurement:meas1:source1?;"
+                    ":measurement:meas1:source2?;:measurement:meas1:state?": "PERIOD;CH2;CH1;0",
+            ":measurement:meas1:value?": "1.0E3",
+        })
+        r = driver.measurement.fetch_waveform_measurements([('ch1', 'frequency')])
+        self.assertEqual(r['value'][0], 1000.0)
+        self.assertEqual(self.written[-4:], [":measurement:meas1:type PERIOD",
+                ":measurement:meas1:source1 CH2", ":measurement:meas1:source2 CH1",
+                ":measurement:meas1:state 0"])
+        # slots may have been changed from the front panel, so a repeated
+        # fetch sets them up again
+        self.patch(driver, {
+            ":measurement:meas1:type?;:measurement:meas1:source1?;"
+                    ":measurement:meas1:source2?;:measurement:meas1:state?": "frequency;ch1;ch1;on",
+            ":measurement:meas1:value?": "1.0E3",
+        })
+        for k in range(2):
+            del self.written[:]
+            driver.measurement.fetch_waveform_measurements([('ch1', 'frequency')])
+        self.assertIn(":measurement:meas1:type frequency", self.written)
+        self.assertIn(":measurement:meas1:state on", self.written)
+
+
+
+class TestArbChunks(unittest.TestCase):
+
+    def setUp(self):
+        self.y = np.sin(np.linspace(0, 2*np.pi, 64))
+        self.written = []
+
+    def upload(self, driver, f, *args):
+        driver._write_raw_chunks = lambda chunks: self.written.append(b''.join(chunks))
+        f(*args)
+        return self.written.pop()
+
+    def test_esgd_list_of_arrays(self):
+        from ivi.agilent.agilentE4432B import agilentE4432B
+        driver = agilentE4432B(simulate=True)
+        y = self.y
+        write = driver.digital_modulation.arb.write_waveform
+        whole = self.upload(driver, write, 'a', y, y)
+        parts = self.upload(driver, write, 'c', [y[:32], y[32:]], [y[:32], y[32:]])
+        self.assertEqual(parts.split(b',', 1)[1], whole.split(b',', 1)[1])
+
+    def test_awg2000_list_of_arrays(self):
+        from ivi.tektronix import tektronixAWG2020
+        driver = tektronixAWG2020(simulate=True)
+        y = self.y
+        whole = self.upload(driver, driver.arbitrary.waveform.create, y)
+        driver._arbitrary_waveform_cache_evict()
+        parts = self.upload(driver, driver.arbitrary.waveform.create, [y[:32], y[32:]])
+        self.assertEqual(parts, whole)
+
+
+
+class TestTektronixSegmented(unittest.TestCase):
+
+    def setUp(self):
+        from ivi.tektronix import tektronixDPO4014B
+        self.driver = tektronixDPO4014B(simulate=True)
+        self.driver._driver_operation_simulate = False
+        self.written = []
+        self.driver._write = lambda data, *args, **kwargs: self.written.append(data)
+        pre = "2;16;BINARY;RI;MSB;\"Ch1\";3;Y;\"s\";0;1.0E-9;0.0;0;\"V\";0.01;0;0.0"
+        self.replies = {
+            ":horizontal:fastframe:count?": "2",
+            ":data:framestart?;:data:framestop?": "5;5",
+            ":wfmoutpre?": pre,
+            ":horizontal:fastframe:timestamp:all:ch1? 1, 2":
+                    '"01 Mar 2017 12:00:00.000 000 000 000","01 Mar 2017 12:00:00.001 000 000 000"',
+        }
+        self.driver._ask = lambda data, *args, **kwargs: self.replies[data]
+        self.driver._read_raw = lambda *args, **kwargs: b''
+
+    def test_fetch(self):
+        self.driver._ask_for_ieee_block = lambda *args: np.arange(6, dtype='>i2').tobytes()
+        trace = self.driver.channels[0].measurement.fetch_waveform_segmented()
+        np.testing.assert_array_equal(trace.y_raw, [[0, 1, 2], [3, 4, 5]])
+        np.testing.assert_almost_equal(trace.time_tag, [0, 1e-3])
+        self.assertEqual(self.written[-2:], [":data:framestart 5", ":data:framestop 5"])
+
+    def test_short_block(self):
+        self.driver._ask_for_ieee_block = lambda *args: np.arange(5, dtype='>i2').tobytes()
+        self.assertRaises(ivi.UnexpectedResponseException,
+                self.driver.channels[0].measurement.fetch_waveform_segmented)
+        self.assertEqual(self.written[-2:], [":data:framestart 5", ":data:framestop 5"])
+
+
 if __name__ == '__main__':
     unittest.main()
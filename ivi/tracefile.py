@@ -0,0 +1,290 @@
+"""
+
+Python Interchangeable Virtual Instrument Library
+
+Copyright (c) 2012-2017 Alex Forencich
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+
+import array
+import datetime
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from . import ivi
+
+# Trace archive files
+#
+# A file starts with a 16 byte header followed by any number of records, so
+# traces can be appended one capture at a time.  Each record is
+#
+#   'TRCE', metadata length (uint32), data length (uint64), little endian
+#   metadata, JSON padded with spaces to a multiple of 16 bytes
+#   data, raw arrays in native dtype, each aligned to 16 bytes
+#
+# The metadata holds the trace class, the scale attributes (x_increment,
+# y_origin, etc.) and the dtype, shape and offset of each array (y_raw, x_raw,
+# time_tag).  A record with no metadata uses that of the previous record, so
+# a run of captures with the same settings only stores it once.  Readers only
+# parse the record headers and map the data, so raw samples are never read
+# until they are used.
+
+FileMagic = b'IVITRACE\x01\x00\x00\x00\x00\x00\x00\x00'
+RecordHeader = struct.Struct('<4sLQ')
+RecordMagic = b'TRCE'
+Alignment = 16
+
+DateTimeFormat = '%Y-%m-%dT%H:%M:%S.%f'
+
+TraceTypes = dict((cls.__name__, cls) for cls in (ivi.TraceY, ivi.TraceXY,
+        ivi.TraceYT, ivi.TraceYTSegmented, ivi.TraceYTMinMax))
+
+
+def _pad(n):
+    return -n % Alignment
+
+
+try:
+    _timezone = datetime.timezone
+except AttributeError:
+    class _timezone(datetime.tzinfo):
+        "Fixed UTC offset"
+        def __init__(self, offset):
+            self._offset = offset
+
+        def utcoffset(self, dt):
+            return self._offset
+
+        def dst(self, dt):
+            return datetime.timedelta(0)
+
+        def tzname(self, dt):
+            return None
+
+
+def _encode_value(value):
+    if value is None or type(value) in (bool, int, float, str):
+        return value
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, datetime.datetime):
+        # local time and, for aware datetimes, the UTC offset in seconds
+        d = {'type': 'datetime', 'value': value.replace(tzinfo=None).strftime(DateTimeFormat)}
+        offset = value.utcoffset()
+        if offset is not None:
+            d['utcoffset'] = offset.total_seconds()
+        return d
+    raise ivi.ValueNotSupportedException()
+
+
+def _decode_value(value):
+    if not isinstance(value, dict):
+        return value
+    if value.get('type') != 'datetime':
+        raise ivi.FileFormatException()
+    t = datetime.datetime.strptime(value['value'], DateTimeFormat)
+    if 'utcoffset' in value:
+        t = t.replace(tzinfo=_timezone(datetime.timedelta(seconds=value['utcoffset'])))
+    return t
+
+
+def _encode_record(trace):
+    "Return metadata fields and list of arrays for a trace"
+    name = type(trace).__name__
+    if TraceTypes.get(name) is not type(trace):
+        raise ivi.ValueNotSupportedException()
+
+    attrs = list()
+    arrays = list()
+    data = list()
+    offset = 0
+    for k, v in sorted(trace.__dict__.items()):
+        if isinstance(v, np.ndarray):
+            a = v if v.flags.c_contiguous else np.ascontiguousarray(v)
+        elif isinstance(v, (array.array, list, tuple)):
+            a = np.asarray(v)
+        else:
+            attrs.append((k, _encode_value(v)))
+            continue
+        if a.dtype.hasobject:
+            raise ivi.ValueNotSupportedException()
+        arrays.append((k, a.dtype.str, a.shape, offset))
+        data.append(a)
+        offset += a.nbytes + _pad(a.nbytes)
+
+    return (name, tuple(attrs), tuple(arrays)), data, offset
+
+
+def _encode_metadata(fields):
+    name, attrs, arrays = fields
+    meta = json.dumps({'type': name, 'attributes': dict(attrs),
+            'arrays': dict((k, {'dtype': d, 'shape': s, 'offset': o}) for k, d, s, o in arrays)})
+    meta = meta.encode('utf-8')
+    return meta + b' ' * _pad(len(meta))
+
+
+def _decode_metadata(meta):
+    "Return trace class, attributes and array layout from metadata"
+    meta = json.loads(meta.decode('utf-8'))
+    attrs = dict((k, _decode_value(v)) for k, v in meta['attributes'].items())
+    arrays = list()
+    for k, v in meta['arrays'].items():
+        shape = tuple(v['shape'])
+        count = 1
+        for n in shape:
+            count *= n
+        arrays.append((k, np.dtype(v['dtype']), shape, count, v['offset']))
+    return TraceTypes[meta['type']], attrs, arrays
+
+
+def _check_magic(f):
+    if f.read(len(FileMagic)) != FileMagic:
+        raise ivi.FileFormatException()
+
+
+class TraceWriter(object):
+    """Write traces to an archive file
+
+    With append set, records are added to the end of an existing file.
+    """
+    def __init__(self, filename, append = False):
+        if append and os.path.exists(filename) and os.path.getsize(filename) > 0:
+            with open(filename, 'rb') as f:
+                _check_magic(f)
+            self._file = open(filename, 'ab')
+        else:
+            self._file = open(filename, 'wb')
+            self._file.write(FileMagic)
+        self._last_fields = None
+
+    def write(self, trace):
+        "Append one trace to the file"
+        fields, data, length = _encode_record(trace)
+        if fields == self._last_fields:
+            meta = b''
+        else:
+            meta = _encode_metadata(fields)
+            self._last_fields = fields
+        f = self._file
+        f.write(RecordHeader.pack(RecordMagic, len(meta), length))
+        f.write(meta)
+        for a in data:
+            f.write(a.data)
+            f.write(b'\x00' * _pad(a.nbytes))
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class TraceReader(object):
+    """Read traces from an archive file
+
+    The file is memory mapped and indexed by scanning the record headers, so
+    opening a file does not read the sample data.  Traces returned by
+    __getitem__ reference the mapped data directly unless copy is set; the
+    mapping remains valid until all such traces have been released.
+    """
+    def __init__(self, filename, copy = False):
+        self.copy = copy
+        self._index = list()
+        self._metadata = dict()
+        with open(filename, 'rb') as f:
+            _check_magic(f)
+            size = os.fstat(f.fileno()).st_size
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        pos = len(FileMagic)
+        meta = None
+        while pos < size:
+            if pos + RecordHeader.size > size:
+                raise ivi.FileFormatException()
+            magic, meta_length, data_length = RecordHeader.unpack_from(self._map, pos)
+            if magic != RecordMagic:
+                raise ivi.FileFormatException()
+            pos += RecordHeader.size
+            if meta_length > 0:
+                meta = (pos, meta_length)
+            elif meta is None:
+                raise ivi.FileFormatException()
+            pos += meta_length
+            if pos + data_length > size:
+                raise ivi.FileFormatException()
+            self._index.append((meta, pos))
+            pos += data_length
+
+    def __len__(self):
+        return len(self._index)
+
+    def __getitem__(self, index):
+        meta, data = self._index[index]
+        if meta not in self._metadata:
+            pos, length = meta
+            self._metadata[meta] = _decode_metadata(self._map[pos:pos+length])
+        cls, attrs, arrays = self._metadata[meta]
+
+        trace = cls()
+        trace.__dict__.update(attrs)
+        for k, dtype, shape, count, offset in arrays:
+            a = np.frombuffer(self._map, dtype, count, data + offset)
+            if len(shape) != 1:
+                a = a.reshape(shape)
+            if self.copy:
+                a = a.copy()
+            setattr(trace, k, a)
+        return trace
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def close(self):
+        # mapped arrays hold their own reference to the mapping
+        self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def save(filename, traces, append = False):
+    "Save a trace or a list of traces to an archive file"
+    if isinstance(traces, ivi.TraceY):
+        traces = [traces]
+    with TraceWriter(filename, append) as w:
+        for trace in traces:
+            w.write(trace)
+
+
+def load(filename, copy = False):
+    "Load all traces from an archive file"
+    with TraceReader(filename, copy) as r:
+        return list(r)